@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Headless Batch Comparison
+Runs the comparison engine without a display: pairs come from a CSV/JSON manifest or two
+directory globs, and every finished row is written as one JSON line to stdout or a file.
+With --listen the rows are handed to remote workers (batch_worker.py) instead of scored here.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from datetime import datetime
+from threading import Lock
+
+from comparison_engine import ComparisonEngine, JobJournal, AUDIO_BACKENDS, SCORE_RESOLUTIONS
+from distributed import Coordinator, is_loopback, parse_address
+
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
+
+class StderrLog:
+    """Stands in for the GUI's log queue: engine messages at or above a level go to stderr"""
+    
+    def __init__(self, level):
+        self.min_rank = LOG_LEVELS.index(level)
+        self.lock = Lock()
+    
+    def put(self, item):
+        level, message = item
+        if level in LOG_LEVELS and LOG_LEVELS.index(level) < self.min_rank:
+            return
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        with self.lock:
+            print(f"[{timestamp}] {level}: {message}", file=sys.stderr, flush=True)
+
+
+def row_record(event):
+    """Output line for a row's outcome event"""
+    job = event["job"]
+    record = {"row": job.row_idx + 1, "left": job.left_file, "right": job.right_file,
+              "status": "done" if event["type"] == "result" else event["type"]}
+    if event["type"] == "result":
+        record.update(event["result"])
+    elif "error" in event:
+        record["error"] = event["error"]
+    return record
+
+
+def read_manifest(path):
+    """Pairs from a manifest, with relative paths taken from the manifest's directory
+    
+    CSV manifests have a left and a right column (an optional "left,right" header and # comments
+    are skipped); JSON manifests are a list of {"left": ..., "right": ...} objects or [left, right] pairs.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            pairs = [(entry["left"], entry["right"]) if isinstance(entry, dict) else (entry[0], entry[1])
+                     for entry in json.load(f)]
+        else:
+            rows = [row for row in csv.reader(f) if row and row[0].strip() and not row[0].startswith("#")]
+            if rows and [cell.strip().lower() for cell in rows[0][:2]] == ["left", "right"]:
+                rows = rows[1:]
+            pairs = [(row[0].strip(), row[1].strip()) for row in rows]
+    return [(os.path.join(base, left), os.path.join(base, right)) for left, right in pairs]
+
+
+def glob_pairs(left_pattern, right_pattern):
+    """Pair the sorted matches of two globs (a directory matches every file in it) by position"""
+    matches = []
+    for pattern in (left_pattern, right_pattern):
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        matches.append(sorted(path for path in glob.glob(pattern) if os.path.isfile(path)))
+    left_files, right_files = matches
+    if len(left_files) != len(right_files):
+        raise ValueError(f"{left_pattern} matches {len(left_files)} files but {right_pattern} matches "
+                         f"{len(right_files)}")
+    return list(zip(left_files, right_files))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Compare video and audio quality of file pairs without a GUI. Each finished row is "
+                    "written as one JSON line; the exit status is 1 if any row failed or was skipped.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--manifest", help="CSV or JSON file listing left/right pairs")
+    source.add_argument("--left", help="glob or directory of left files (paired by sorted order with --right)")
+    parser.add_argument("--right", help="glob or directory of right files")
+    parser.add_argument("--output", help="write JSON lines to this file instead of stdout")
+    parser.add_argument("--metric", choices=["VMAF", "SSIM", "Multi"], default="VMAF")
+    parser.add_argument("--workers", type=int, help="rows scored in parallel (default: CPU count - 4)")
+    parser.add_argument("--mode", choices=["Full", "Sampled"], default="Full")
+    parser.add_argument("--stride", type=int, default=1, help="score every Nth frame")
+    parser.add_argument("--early-stop", action="store_true", help="stop a row once its winner is certain")
+    parser.add_argument("--scene-cuts", action="store_true", help="sampled mode: start samples at scene cuts")
+    parser.add_argument("--resolution", choices=list(SCORE_RESOLUTIONS), default="Native")
+    parser.add_argument("--split-long-files", action="store_true", help="score long rows as parallel segments")
+    parser.add_argument("--backend", choices=["FFmpeg", "NumPy"], default="FFmpeg", help="SSIM backend")
+    parser.add_argument("--audio-backend", choices=list(AUDIO_BACKENDS), default="FFmpeg")
+    parser.add_argument("--no-normalize", action="store_true", help="do not scale inputs to a common geometry")
+    parser.add_argument("--no-fused", action="store_true", help="score video and audio in separate passes")
+    parser.add_argument("--journal", help="also journal row states to this file")
+    parser.add_argument("--listen", help="coordinate workers on host:port (a bare port listens on 127.0.0.1) instead "
+                                         "of scoring locally; start them with batch_worker.py --connect")
+    parser.add_argument("--token", help="with --listen: shared secret workers must present (required unless "
+                                        "listening on a loopback address)")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="WARNING", help="stderr log level")
+    args = parser.parse_args(argv)
+    if args.left and not args.right:
+        parser.error("--left requires --right")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.listen:
+        try:
+            args.address = parse_address(args.listen, "127.0.0.1")
+        except ValueError:
+            parser.error(f"--listen must be host:port or a port, not {args.listen!r}")
+        # Workers are sent file paths and their results are written out as-is, so remote ones must authenticate
+        if not args.token and not is_loopback(args.address[0]):
+            parser.error(f"--listen on {args.address[0]} needs --token; only loopback addresses may go without")
+    return parser, args
+
+
+def main(argv=None):
+    """Run a batch from the command line; returns the exit status"""
+    parser, args = parse_args(argv)
+    try:
+        pairs = read_manifest(args.manifest) if args.manifest else glob_pairs(args.left, args.right)
+    except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+        parser.error(f"could not read pairs: {e}")
+    if not pairs:
+        parser.error("no pairs to compare")
+    
+    comparator = ComparisonEngine()
+    comparator.log_queue = StderrLog(args.log_level)
+    comparator.left_files = [left for left, _ in pairs]
+    comparator.right_files = [right for _, right in pairs]
+    if args.workers:
+        comparator.max_workers = args.workers
+    if args.journal:
+        comparator.journal = JobJournal(os.path.abspath(args.journal))
+    comparator.current_metric.set(args.metric)
+    comparator.scoring_mode.set(args.mode)
+    comparator.frame_stride.set(str(args.stride))
+    comparator.early_stop.set(args.early_stop)
+    comparator.sample_scene_cuts.set(args.scene_cuts)
+    comparator.score_resolution.set(args.resolution)
+    comparator.split_long_files.set(args.split_long_files)
+    comparator.metric_backend.set(args.backend)
+    comparator.audio_backend.set(args.audio_backend)
+    comparator.normalize_inputs.set(not args.no_normalize)
+    comparator.fused_row.set(not args.no_fused)
+    
+    # A coordinator only hands out rows, so FFmpeg is needed on the workers rather than here
+    coordinator = None
+    if args.listen:
+        try:
+            coordinator = Coordinator(comparator, args.address, args.token)
+        except OSError as e:
+            parser.error(f"cannot listen on {args.listen}: {e}")
+    else:
+        comparator.detect_ffmpeg_capabilities()
+        if comparator.ffmpeg_capabilities is None:
+            return 2
+        comparator.resolve_backends()
+    
+    # Opened only once the batch can start, so a run that fails to start leaves an existing file alone
+    try:
+        output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    except OSError as e:
+        if coordinator is not None:
+            coordinator.close(grace=0)
+        parser.error(f"cannot write {args.output}: {e}")
+    
+    # Rows are written as their outcome events arrive; Ctrl+C stops the batch cleanly
+    finished_rows = 0
+    batch = None
+    try:
+        batch = coordinator.submit(pairs) if coordinator is not None else comparator.submit(pairs)
+        for event in batch:
+            if event["type"] in ("result", "failed", "skipped", "cancelled"):
+                finished_rows += event["type"] == "result"
+                output.write(json.dumps(row_record(event)) + "\n")
+                output.flush()
+    except KeyboardInterrupt:
+        comparator.stop_event.set()
+        if batch is not None:
+            batch.wait()
+        return 130
+    finally:
+        if coordinator is not None:
+            coordinator.close()
+        if comparator.metric_pool is not None:
+            comparator.metric_pool.shutdown(wait=False, cancel_futures=True)
+        if output is not sys.stdout:
+            output.close()
+    
+    return 0 if finished_rows == len(pairs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Distributed Batch Worker
+Connects to a coordinator (batch_cli.py --listen), leases rows from it and scores them with the
+local FFmpeg, several rows at a time. Start as many as you like, on any host that sees the files
+at the same paths; the worker exits when the coordinator's batch is done.
+"""
+
+import argparse
+import sys
+
+from batch_cli import StderrLog, LOG_LEVELS
+from comparison_engine import ComparisonEngine
+from distributed import CoordinatorError, Worker, parse_address
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Score rows for a distributed batch coordinator. The exit status is 2 if the "
+                    "coordinator can't be reached or rejects the worker, and 1 if it was lost mid-batch.")
+    parser.add_argument("--connect", required=True, help="coordinator address, host:port")
+    parser.add_argument("--workers", type=int, help="rows scored in parallel (default: CPU count - 4)")
+    parser.add_argument("--token", help="shared secret, if the coordinator was started with one")
+    parser.add_argument("--retry-seconds", type=float, default=30.0,
+                        help="how long to keep retrying an unreachable coordinator")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="WARNING", help="stderr log level")
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    try:
+        args.address = parse_address(args.connect, "127.0.0.1")
+    except ValueError:
+        parser.error(f"--connect must be host:port, not {args.connect!r}")
+    return args
+
+
+def main(argv=None):
+    """Serve a coordinator from the command line; returns the exit status"""
+    args = parse_args(argv)
+    comparator = ComparisonEngine()
+    comparator.log_queue = StderrLog(args.log_level)
+    if args.workers:
+        comparator.max_workers = args.workers
+    comparator.detect_ffmpeg_capabilities()
+    if comparator.ffmpeg_capabilities is None:
+        return 2
+    
+    worker = Worker(comparator, args.address, comparator.max_workers, args.token, args.retry_seconds)
+    try:
+        worker.run()
+    except (OSError, CoordinatorError) as e:
+        comparator.log_queue.put(("ERROR", f"Worker: cannot serve {args.connect}: {e}"))
+        return 2
+    except KeyboardInterrupt:
+        worker.stop()
+        return 130
+    finally:
+        if comparator.metric_pool is not None:
+            comparator.metric_pool.shutdown(wait=False, cancel_futures=True)
+    
+    comparator.log_queue.put(("INFO", f"Worker: batch done, {worker.rows_scored} rows scored here"))
+    return 1 if worker.lost else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
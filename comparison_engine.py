@@ -0,0 +1,3577 @@
+"""
+Video Quality Comparison Engine
+Scores video and audio quality between pairs of files using FFmpeg, without any GUI dependency.
+Used by the desktop application (video_batch_compare.py) and the headless batch mode (batch_cli.py).
+"""
+
+import asyncio
+import subprocess
+import threading
+import json
+import re
+import os
+from datetime import datetime
+from queue import Queue, Empty
+import concurrent.futures
+from threading import Lock, Event
+import time
+import tempfile
+import math
+import statistics
+import hashlib
+import multiprocessing
+import shutil
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Per-job FFmpeg logs are spilled here; only a bounded tail is kept in memory. Logs of successful
+# or stopped runs are deleted, and only the newest failed-run logs are kept
+JOB_LOG_DIR = os.path.join(tempfile.gettempdir(), "video_batch_compare", "logs")
+JOB_LOG_KEEP = 200
+
+# Persistent state (segment checkpoints) lives in the user's home directory
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".video_batch_compare")
+CHECKPOINT_DIR = os.path.join(APP_DATA_DIR, "checkpoints")
+LOUDNESS_CACHE_PATH = os.path.join(APP_DATA_DIR, "loudness_cache.json")
+PROBE_CACHE_PATH = os.path.join(APP_DATA_DIR, "probe_cache.json")
+THROUGHPUT_CACHE_PATH = os.path.join(APP_DATA_DIR, "throughput.json")
+CAPABILITY_CACHE_PATH = os.path.join(APP_DATA_DIR, "ffmpeg_capabilities.json")
+RESULT_CACHE_DIR = os.path.join(APP_DATA_DIR, "results")
+JOURNAL_PATH = os.path.join(APP_DATA_DIR, "journal.jsonl")
+
+# Tk-variable options and win thresholds saved with sessions and batch journals
+SESSION_VARIABLES = ["current_metric", "review_metric", "single_pass_video", "fused_row", "frame_stride",
+                     "scoring_mode", "sample_scene_cuts", "early_stop", "normalize_inputs", "score_resolution",
+                     "split_long_files", "metric_backend", "audio_backend"]
+THRESHOLD_ATTRIBUTES = ["vmaf_win_threshold", "ssim_win_threshold", "video_psnr_win_threshold",
+                        "psnr_win_threshold", "loudness_win_threshold"]
+
+# Filters the engine can use; capability detection records which of them the FFmpeg build has
+ENGINE_FILTERS = ["libvmaf", "ssim", "apsnr", "ebur128", "split", "asplit", "scale", "fps", "framestep", "format",
+                  "setpts", "metadata", "select", "showinfo"]
+STDERR_TAIL_LINES = 2000
+
+# Row threads per process slot: more threads than slots, so a row can probe, parse or pool scores while
+# others run their FFmpeg children, and the reactor's process budget rather than the pool decides how many run
+ROW_THREADS_PER_PROCESS = 4
+
+# Bytes hashed from the start, middle and end of a file to fingerprint its content
+FINGERPRINT_CHUNK_BYTES = 1 << 20
+
+# Scene score above which a keyframe is treated as a scene cut when placing sample segments
+SCENE_CUT_THRESHOLD = 0.3
+
+# "Score at" choices: maximum height the metric sees (None keeps the native resolution)
+SCORE_RESOLUTIONS = {"Native": None, "1080p": 1080, "720p": 720, "540p": 540}
+
+# Metrics that give the same value with reference and distorted swapped, so one direction is enough
+SYMMETRIC_METRICS = {"SSIM", "APSNR"}
+
+# Audio backend choices -> (backend, downmix and decimate before scoring)
+AUDIO_BACKENDS = {"FFmpeg": ("ffmpeg", False), "NumPy": ("numpy", False), "NumPy (fast, mono)": ("numpy", True)}
+
+# Metrics computed by libvmaf (JSON log, internal frame subsampling)
+LIBVMAF_METRICS = {"VMAF", "Multi"}
+
+# Multi-metric mode: libvmaf models and extra features scored together from one decode
+MULTI_METRIC_MODELS = [
+    "version=vmaf_v0.6.1:name=vmaf",
+    "version=vmaf_4k_v0.6.1:name=vmaf_4k",
+    "version=vmaf_v0.6.1:name=vmaf_phone:enable_transform=true",
+]
+MULTI_METRIC_FEATURES = ["float_ssim", "float_ms_ssim", "psnr"]
+# Display name -> pooled metric name in the libvmaf log
+MULTI_METRIC_KEYS = {"VMAF": "vmaf", "VMAF 4K": "vmaf_4k", "VMAF Phone": "vmaf_phone",
+                     "SSIM": "float_ssim", "MS-SSIM": "float_ms_ssim", "PSNR": "psnr_y"}
+
+
+def t_central_probability(t, dof):
+    """P(-t < T < t) for Student's t with an integer dof >= 2 (the closed-form series)"""
+    theta = math.atan(t / math.sqrt(dof))
+    cos_squared = math.cos(theta) ** 2
+    term = total = 1.0
+    if dof % 2:
+        for k in range(1, (dof - 1) // 2):
+            term *= cos_squared * (2 * k) / (2 * k + 1)
+            total += term
+        return 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+    for k in range(1, dof // 2):
+        term *= cos_squared * (2 * k - 1) / (2 * k)
+        total += term
+    return math.sin(theta) * total
+
+
+def t_critical(confidence, dof):
+    """Two-sided Student's t critical value for the given confidence and degrees of freedom"""
+    p = 0.5 + confidence / 2
+    if dof <= 1:
+        return math.tan(math.pi * (p - 0.5))
+    if dof == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    
+    # Few batches (the early-stop minimum is 5): bisect the exact distribution, since the
+    # expansion below understates the value there (by 0.06 at 99% with 4 dof)
+    if dof <= 30:
+        low, high = 0.0, 1000.0
+        for _ in range(60):
+            middle = (low + high) / 2
+            if t_central_probability(middle, int(dof)) < confidence:
+                low = middle
+            else:
+                high = middle
+        return (low + high) / 2
+    
+    # Cornish-Fisher expansion around the normal quantile; accurate to ~1e-4 beyond 30 dof
+    z = statistics.NormalDist().inv_cdf(p)
+    return (z
+            + (z ** 3 + z) / (4 * dof)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * dof ** 3))
+
+
+def confidence_interval(samples, confidence):
+    """Confidence interval (low, high) on the mean of samples, using the t distribution"""
+    mean = statistics.fmean(samples)
+    if len(samples) < 2:
+        return mean, mean
+    half_width = t_critical(confidence, len(samples) - 1) * statistics.stdev(samples) / math.sqrt(len(samples))
+    return mean - half_width, mean + half_width
+
+
+class SequentialVerdict:
+    """Running left/right comparison that reports a verdict once it is statistically settled
+    
+    Scores are pooled into batches of batch_size units (frames or windows) and a t interval
+    on the batch-mean differences is checked against the win threshold. Batching keeps
+    strongly correlated neighbouring frames from looking like independent evidence.
+    """
+    
+    def __init__(self, threshold, confidence, batch_size=1, min_batches=5, min_coverage=0.0, total=None):
+        self.threshold = threshold
+        self.confidence = confidence
+        self.batch_size = batch_size
+        self.min_batches = min_batches
+        self.min_coverage = min_coverage
+        self.total = total
+        self.lock = Lock()
+        self.batch_diffs = []
+        self.batch = []
+        self.units = 0
+        self.weight = 0.0
+        self.left_sum = 0.0
+        self.right_sum = 0.0
+    
+    def add(self, left, right, weight=1.0):
+        with self.lock:
+            self.units += 1
+            self.weight += weight
+            self.left_sum += left * weight
+            self.right_sum += right * weight
+            self.batch.append(left - right)
+            if len(self.batch) >= self.batch_size:
+                self.batch_diffs.append(statistics.fmean(self.batch))
+                self.batch = []
+    
+    def left_mean(self):
+        return self.left_sum / self.weight if self.weight else 0
+    
+    def right_mean(self):
+        return self.right_sum / self.weight if self.weight else 0
+    
+    def interval(self):
+        with self.lock:
+            if not self.batch_diffs:
+                return None, None
+            return confidence_interval(self.batch_diffs, self.confidence)
+    
+    def verdict(self):
+        """The settled winner, or None while more data is needed"""
+        if len(self.batch_diffs) < self.min_batches:
+            return None
+        if self.total and self.weight / self.total < self.min_coverage:
+            return None
+        low, high = self.interval()
+        return interval_verdict(low, high, self.threshold)
+
+
+class SegmentedRowJob:
+    """A long row split into time segments that are scored as separate pool tasks
+    
+    Finished segments are appended to a checkpoint journal so a stopped or crashed
+    run can pick up where it left off.
+    """
+    
+    def __init__(self, row_idx, left_file, right_file, metric, options, segments, checkpoint_path):
+        self.row_idx = row_idx
+        self.left_file = left_file
+        self.right_file = right_file
+        self.metric = metric
+        self.options = options
+        self.segments = segments  # [(index, start, length)]
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_lock = Lock()
+        self.segment_results = {}  # index -> {"left", "right", "frames"}
+        self.audio_result = None
+        self.audio_done = False
+        self.failed = False
+    
+    def load_checkpoint(self):
+        """Load segments finished by an earlier run"""
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # A torn final line from a crash
+                    self.segment_results[record["index"]] = record
+        except OSError:
+            pass
+    
+    def record_segment(self, record):
+        """Append a finished segment to the checkpoint journal"""
+        with self.checkpoint_lock:
+            try:
+                os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+                with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError:
+                pass
+    
+    def pending_segments(self):
+        return [segment for segment in self.segments if segment[0] not in self.segment_results]
+    
+    def is_complete(self):
+        return self.audio_done and len(self.segment_results) == len(self.segments)
+    
+    def discard_checkpoint(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except OSError:
+            pass
+
+
+def file_fingerprint(path):
+    """Content identity of a file: its size plus a hash of chunks from the start, middle and end
+    
+    Unlike path and mtime, this survives copies and renames of the same master.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for offset in sorted({0, max(0, size // 2 - FINGERPRINT_CHUNK_BYTES // 2), max(0, size - FINGERPRINT_CHUNK_BYTES)}):
+            f.seek(offset)
+            digest.update(f.read(FINGERPRINT_CHUNK_BYTES))
+    return f"{size}:{digest.hexdigest()}"
+
+
+class PersistentCache:
+    """A small JSON key/value store that survives between runs
+    
+    Entries are loaded on first use and the file is replaced atomically on every update,
+    so a crash never leaves a half-written cache behind.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = Lock()
+        self.entries = None
+    
+    def load(self):
+        if self.entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+        return self.entries
+    
+    def get(self, key):
+        with self.lock:
+            return self.load().get(key)
+    
+    def set(self, key, value, save=True):
+        """Store an entry; pass save=False when batching several updates before one save()"""
+        with self.lock:
+            self.load()[key] = value
+            if save:
+                self.write()
+    
+    def save(self):
+        with self.lock:
+            self.load()
+            self.write()
+    
+    def write(self):
+        """Replace the cache file with the current entries (caller holds the lock)"""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
+
+
+class ResultCache:
+    """Row results stored as one JSON file per key
+    
+    Results can carry per-frame arrays, so each lives in its own file instead of one shared index.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+    
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+    
+    def get(self, key):
+        try:
+            with open(self.path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def set(self, key, value):
+        path = self.path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError):
+            pass
+
+
+class JobJournal:
+    """Append-only record of a batch: its files and settings, then each row's state transitions
+    
+    Every record is synced as it is written, so after a crash or reboot the journal replays
+    to the rows that finished and the ones still to do. A journal with no path records nothing.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = Lock()
+    
+    def begin(self, header, fresh=True):
+        """Start a batch; a fresh batch replaces the old journal, a resumed one appends to it"""
+        if fresh:
+            self.discard()
+        else:
+            self.trim_torn_tail()
+        self.record("batch", **header)
+    
+    def trim_torn_tail(self):
+        """Cut off a partial last record left by a crash so appended records start on their own line"""
+        if self.path is None:
+            return
+        with self.lock:
+            try:
+                with open(self.path, "rb+") as f:
+                    data = f.read()
+                    if data and not data.endswith(b"\n"):
+                        f.truncate(data.rfind(b"\n") + 1)
+            except OSError:
+                pass
+    
+    def record(self, event, **fields):
+        if self.path is None:
+            return
+        fields["event"] = event
+        fields["time"] = time.time()
+        with self.lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(fields) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except (OSError, TypeError, ValueError):
+                pass
+    
+    def replay(self):
+        """Read the journal back, or None if there is none
+        
+        Returns the latest batch header, the last state of every pair, the finished results,
+        and whether the latest batch ran to the end.
+        """
+        if self.path is None:
+            return None
+        header = None
+        states = {}  # (left, right, metric) -> "queued" / "running" / "done" / "failed" / "skipped"
+        results = {}
+        finished = False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # A torn final line from a crash
+                    event = record.get("event")
+                    if event == "batch":
+                        header = record
+                        finished = False
+                        for pair in record.get("queued", []):
+                            states[tuple(pair)] = "queued"
+                    elif "pair" in record:
+                        states[tuple(record["pair"])] = event
+                        if event == "done":
+                            results[tuple(record["pair"])] = record["result"]
+                    elif event == "finished":
+                        finished = True
+        except OSError:
+            return None
+        return {"header": header, "states": states, "results": results, "finished": finished}
+    
+    def discard(self):
+        if self.path is None:
+            return
+        with self.lock:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class JobStop:
+    """Stop flag for one job: set by cancelling the job, and also set while the engine-wide stop is"""
+    
+    def __init__(self, stop_event):
+        self.stop_event = stop_event
+        self.event = Event()
+    
+    def set(self):
+        self.event.set()
+    
+    def is_set(self):
+        return self.event.is_set() or self.stop_event.is_set()
+
+
+class ComparisonFailed(Exception):
+    """Raised by a job's future when its row failed ("failed") or was rejected by pre-flight ("skipped")"""
+    
+    def __init__(self, state, reason):
+        super().__init__(reason)
+        self.state = state
+        self.reason = reason
+
+
+class ComparisonJob:
+    """One submitted pair: a future for its row result and a cancel switch for this job alone
+    
+    The future resolves to the row result, raises ComparisonFailed if the row failed or was
+    skipped, and is cancelled once the engine has stopped a cancelled job.
+    """
+    
+    def __init__(self, row_idx, left_file, right_file, stop_event):
+        self.row_idx = row_idx
+        self.left_file = left_file
+        self.right_file = right_file
+        self.stop = JobStop(stop_event)
+        self.future = concurrent.futures.Future()
+        self.batch = None
+        self.settled = False
+    
+    def cancel(self):
+        """Stop this job; its FFmpeg processes are terminated and the future is cancelled"""
+        self.stop.set()
+    
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+    
+    def resolve(self, result=None, error=None):
+        """Settle the future with a result, a ComparisonFailed, or neither for a cancelled job"""
+        self.settled = True
+        try:
+            if result is not None:
+                self.future.set_result(result)
+            elif error is not None:
+                self.future.set_exception(error)
+            else:
+                self.future.cancel()
+        except concurrent.futures.InvalidStateError:
+            pass
+
+
+class ComparisonBatch:
+    """Jobs submitted together, with a stream of their progress and outcome events
+    
+    Events are dicts with the row and job they concern and a "type": "progress" (with "media"
+    and "value" in percent), "result" (with "result"), "failed" or "skipped" (with "error"),
+    or "cancelled". A final {"type": "finished"} event ends the stream. Iterate the batch to
+    read events synchronously, or use events() from asyncio code.
+    """
+    
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.event_queue = Queue()
+        self.finished = Event()
+        for job in jobs:
+            job.batch = self
+    
+    def futures(self):
+        return [job.future for job in self.jobs]
+    
+    def cancel(self):
+        for job in self.jobs:
+            job.cancel()
+    
+    def wait(self, timeout=None):
+        """Block until every job has settled; returns False on timeout"""
+        return self.finished.wait(timeout)
+    
+    def emit(self, event):
+        self.event_queue.put(event)
+    
+    def pending_events(self):
+        """Events queued so far, without waiting"""
+        events = []
+        while True:
+            try:
+                events.append(self.event_queue.get_nowait())
+            except Empty:
+                return events
+    
+    def __iter__(self):
+        while True:
+            try:
+                event = self.event_queue.get(timeout=0.5)  # a timeout keeps Ctrl+C responsive
+            except Empty:
+                continue
+            yield event
+            if event["type"] == "finished":
+                return
+    
+    async def events(self, poll_interval=0.05):
+        """Async generator over the batch's events, ending with the "finished" event"""
+        while True:
+            try:
+                event = self.event_queue.get_nowait()
+            except Empty:
+                await asyncio.sleep(poll_interval)
+                continue
+            yield event
+            if event["type"] == "finished":
+                return
+
+
+class Setting:
+    """A scoring option with the get/set interface of a Tk variable"""
+    
+    def __init__(self, value):
+        self.value = value
+    
+    def get(self):
+        return self.value
+    
+    def set(self, value):
+        self.value = value
+
+
+def metric_passes(metric):
+    """Comparison passes needed for a metric: both directions, or left_ref only if it is symmetric"""
+    if metric in SYMMETRIC_METRICS:
+        return [("left_ref", 0, 1)]
+    return [("left_ref", 0, 1), ("right_ref", 1, 0)]
+
+
+def expand_symmetric_scores(scores):
+    """Fill in right_ref from left_ref when only one direction was scored"""
+    if scores is not None and "right_ref" not in scores and "left_ref" in scores:
+        scores["right_ref"] = scores["left_ref"]
+    return scores
+
+
+def score_verdict(left, right, threshold):
+    """Winner for a pair of scores where higher is better; differences below the threshold tie"""
+    if abs(left - right) < threshold:
+        return "tie"
+    return "left" if left > right else "right"
+
+
+def failed_comparison(reason):
+    """Tie placeholder for a video or audio comparison that could not be scored; the row is failed on its error"""
+    return {"winner": "tie", "left_score": 0, "right_score": 0, "error": reason}
+
+
+def interval_verdict(low, high, threshold):
+    """Winner implied by an interval on (left - right), or None if it straddles a threshold
+    
+    Mirrors determine_video_winner: a difference below the threshold is a tie.
+    """
+    if low >= threshold:
+        return "left"
+    if high <= -threshold:
+        return "right"
+    if low > -threshold and high < threshold:
+        return "tie"
+    return None
+
+
+def read_into(stream, view):
+    """Fill a memoryview from a binary stream; returns the bytes read (short only at end of stream)"""
+    filled = 0
+    while filled < len(view):
+        count = stream.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    return filled
+
+
+def frame_metrics(reference, distorted):
+    """Per-frame luma SSIM and PSNR for two (frames, height, width) uint8 arrays
+    
+    SSIM follows the ffmpeg ssim filter: 4x4 block sums pooled over overlapping 8x8 windows, leaving
+    out edges beyond a multiple of 4. PSNR follows the psnr filter, over the whole plane.
+    """
+    frames, height, width = reference.shape
+    height, width = height - height % 4, width - width % 4
+    x = reference[:, :height, :width].astype(np.int32)
+    y = distorted[:, :height, :width].astype(np.int32)
+    
+    def window_sums(plane):
+        blocks = plane.reshape(frames, height // 4, 4, width // 4, 4).sum(axis=(2, 4), dtype=np.int64)
+        return (blocks[:, :-1, :-1] + blocks[:, 1:, :-1] + blocks[:, :-1, 1:] + blocks[:, 1:, 1:]).astype(np.float64)
+    
+    sum_x = window_sums(x)
+    sum_y = window_sums(y)
+    sum_squares = window_sums(x * x + y * y)
+    sum_xy = window_sums(x * y)
+    
+    c1 = (0.01 * 255) ** 2 * 64
+    c2 = (0.03 * 255) ** 2 * 64 * 63
+    variance = sum_squares * 64 - sum_x * sum_x - sum_y * sum_y
+    covariance = sum_xy * 64 - sum_x * sum_y
+    ssim = ((2 * sum_x * sum_y + c1) * (2 * covariance + c2)) / ((sum_x * sum_x + sum_y * sum_y + c1) * (variance + c2))
+    
+    error = x - y if (height, width) == reference.shape[1:] else reference.astype(np.int32) - distorted
+    mse = np.square(error).mean(axis=(1, 2), dtype=np.float64)
+    psnr = np.minimum(100.0, 10 * np.log10(255.0 ** 2 / np.maximum(mse, 1e-10)))
+    return ssim.mean(axis=(1, 2)), psnr
+
+
+def start_decoders(cmds):
+    """Start FFmpeg decoders writing raw samples to stdout, with stderr spooled to temporary files"""
+    processes, error_logs = [], []
+    started = False
+    try:
+        for cmd in cmds:
+            error_logs.append(tempfile.TemporaryFile())
+            processes.append(subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=error_logs[-1],
+                                              stdin=subprocess.DEVNULL))
+        started = True
+        return processes, error_logs
+    finally:
+        # A decoder that failed to start must not leave the ones before it running
+        if not started:
+            close_decoders(processes, error_logs)
+
+
+def decoder_error(processes, error_logs):
+    """Raise with the first failed decoder's stderr"""
+    for process, error_log in zip(processes, error_logs):
+        if process.wait() != 0:
+            error_log.seek(0)
+            raise RuntimeError(error_log.read().decode("utf-8", "replace").strip() or "FFmpeg decode failed")
+
+
+def close_decoders(processes, error_logs):
+    """Stop decoders that are still running and release their pipes and logs"""
+    for process in processes:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+    for error_log in error_logs:
+        error_log.close()
+
+
+def score_rawvideo_chunk(left_cmd, right_cmd, width, height, batch_frames, stop_event=None):
+    """Decode two gray rawvideo streams and score them frame by frame (runs in a worker process)
+    
+    Frames are read straight into preallocated batch buffers that NumPy views without copying.
+    Returns {"float_ssim": [...], "psnr_y": [...]} with one value per frame pair, or None if
+    stop_event was set (the decoders are killed rather than left to run to the end of the chunk).
+    """
+    frame_size = width * height
+    buffers = [bytearray(frame_size * batch_frames) for _ in range(2)]
+    views = [memoryview(buffer) for buffer in buffers]
+    planes = [np.frombuffer(buffer, dtype=np.uint8).reshape(batch_frames, height, width) for buffer in buffers]
+    
+    processes, error_logs = start_decoders([left_cmd, right_cmd])
+    scores = {"float_ssim": [], "psnr_y": []}
+    try:
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            
+            frames = min(read_into(process.stdout, view) // frame_size for process, view in zip(processes, views))
+            if frames:
+                ssim, psnr = frame_metrics(planes[0][:frames], planes[1][:frames])
+                scores["float_ssim"].extend(ssim.tolist())
+                scores["psnr_y"].extend(psnr.tolist())
+            if frames < batch_frames:
+                break
+        
+        if not scores["float_ssim"]:
+            decoder_error(processes, error_logs)
+        return scores
+    
+    finally:
+        close_decoders(processes, error_logs)
+
+
+def score_pcm_streams(left_cmd, right_cmd, channels, frame_samples, frames_per_chunk, stop_event=None,
+                      on_chunk=None):
+    """Decode two float PCM streams and score them per channel in constant memory
+    
+    Each chunk of whole analysis frames is read into the same preallocated buffers. Squared error
+    (for PSNR), segmental SNR in both directions (clamped to -10..35 dB per frame) and log-spectral
+    distance are accumulated per channel. on_chunk, if given, is called with the samples read so far.
+    Returns the per-channel scores, or None if stop_event was set.
+    """
+    chunk_samples = frame_samples * frames_per_chunk
+    buffers = [bytearray(chunk_samples * channels * 4) for _ in range(2)]
+    views = [memoryview(buffer) for buffer in buffers]
+    arrays = [np.frombuffer(buffer, dtype=np.float32).reshape(chunk_samples, channels) for buffer in buffers]
+    window = np.hanning(frame_samples)[None, :, None]
+    
+    squared_error = np.zeros(channels)
+    segmental_snr = {"left_ref": np.zeros(channels), "right_ref": np.zeros(channels)}
+    spectral_distance = np.zeros(channels)
+    samples = 0
+    frames = 0
+    
+    processes, error_logs = start_decoders([left_cmd, right_cmd])
+    try:
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            
+            filled = min(read_into(process.stdout, view) // (channels * 4) for process, view in zip(processes, views))
+            if filled:
+                left = arrays[0][:filled].astype(np.float64)
+                right = arrays[1][:filled].astype(np.float64)
+                error = left - right
+                squared_error += np.square(error).sum(axis=0)
+                samples += filled
+                
+                whole = filled - filled % frame_samples
+                if whole:
+                    shape = (whole // frame_samples, frame_samples, channels)
+                    framed = {"left_ref": left[:whole].reshape(shape), "right_ref": right[:whole].reshape(shape)}
+                    error_energy = np.square(error[:whole].reshape(shape)).sum(axis=1) + 1e-12
+                    for comparison_type, reference in framed.items():
+                        snr = 10 * np.log10(np.square(reference).sum(axis=1) / error_energy + 1e-12)
+                        segmental_snr[comparison_type] += np.clip(snr, -10.0, 35.0).sum(axis=0)
+                    
+                    # Power spectra floored 80 dB below the louder frame's peak so near-silent bins don't dominate
+                    spectra = [np.square(np.abs(np.fft.rfft(signal * window, axis=1))) for signal in framed.values()]
+                    floor = np.maximum(spectra[0].max(axis=1, keepdims=True), spectra[1].max(axis=1, keepdims=True)) * 1e-8 + 1e-20
+                    left_spectrum, right_spectrum = [10 * np.log10(np.maximum(spectrum, floor)) for spectrum in spectra]
+                    spectral_distance += np.sqrt(np.mean(np.square(left_spectrum - right_spectrum), axis=1)).sum(axis=0)
+                    frames += shape[0]
+                
+                if on_chunk is not None:
+                    on_chunk(samples)
+            if filled < chunk_samples:
+                break
+        
+        if not samples:
+            decoder_error(processes, error_logs)
+            raise RuntimeError("No audio samples decoded")
+        
+        mse = squared_error / samples
+        frames = max(1, frames)
+        return {
+            "channels": channels,
+            "samples": samples,
+            "psnr": np.minimum(100.0, 10 * np.log10(1.0 / np.maximum(mse, 1e-20))).tolist(),
+            "segmental_snr": {comparison_type: (total / frames).tolist() for comparison_type, total in segmental_snr.items()},
+            "lsd": (spectral_distance / frames).tolist()
+        }
+    
+    finally:
+        close_decoders(processes, error_logs)
+
+
+def decode_output(data):
+    """Text from a child's output bytes, with newlines normalized as text-mode pipes would"""
+    return data.decode("utf-8", errors="replace").replace("\r\n", "\n")
+
+
+async def read_lines(stream, chunk_size=1 << 16):
+    """Lines from an asyncio stream reader, of any length (readline() raises on lines over the buffer limit)"""
+    pending = bytearray()
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            if pending:
+                yield bytes(pending)
+            return
+        start = len(pending)
+        pending += chunk
+        if pending.find(b"\n", start) < 0:
+            continue
+        last = pending.rfind(b"\n")
+        for line in bytes(pending[:last]).split(b"\n"):
+            yield line + b"\n"
+        del pending[:last + 1]
+
+
+class ProcessReactor:
+    """One asyncio event loop, on its own thread, that runs the FFmpeg and ffprobe children
+    
+    Children are started with asyncio.create_subprocess_exec and their pipes are read by
+    stream coroutines, so a running child costs no thread of its own. Concurrency is a pair
+    of semaphore budgets: scoring and decoding processes share process_budget slots, and
+    short probe-style commands share command_budget slots.
+    """
+    
+    def __init__(self, process_budget, command_budget):
+        self.process_budget = process_budget
+        self.command_budget = command_budget
+        self.process_slots = None  # semaphores are created on the loop's thread
+        self.command_slots = None
+        self.loop = None
+        self.lock = Lock()
+    
+    def start(self):
+        """Start the loop thread on first use; returns the loop"""
+        with self.lock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop()
+                ready = Event()
+                
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+                
+                threading.Thread(target=run, daemon=True, name="process-reactor").start()
+                ready.wait()
+                self.loop = loop
+        return self.loop
+    
+    def call(self, coroutine):
+        """Run a coroutine on the reactor from another thread and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.start()).result()
+    
+    def acquire(self, heavy=True, stop_event=None):
+        """Take a slot from another thread for children the reactor doesn't run (the NumPy decoders)
+        
+        Returns False without a slot if stop_event is set first; pair a True return with release().
+        """
+        async def take():
+            slots = self.slots(heavy)
+            while stop_event is None or not stop_event.is_set():
+                try:
+                    await asyncio.wait_for(slots.acquire(), 0.5)
+                    return True
+                except asyncio.TimeoutError:
+                    continue
+            return False
+        
+        return self.call(take())
+    
+    def release(self, heavy=True):
+        self.start().call_soon_threadsafe(lambda: self.slots(heavy).release())
+    
+    def slots(self, heavy):
+        """The semaphore budget for a child (called on the loop's thread)"""
+        if self.process_slots is None:
+            self.process_slots = asyncio.Semaphore(self.process_budget)
+            self.command_slots = asyncio.Semaphore(self.command_budget)
+        return self.process_slots if heavy else self.command_slots
+    
+    async def run_command_async(self, cmd, timeout=None, heavy=False):
+        """Run a command to completion and capture its output as text, like subprocess.run
+        
+        heavy commands (ones that decode media) count against the process budget.
+        Raises subprocess.TimeoutExpired if it runs longer than timeout seconds.
+        """
+        async with self.slots(heavy):
+            process = await asyncio.create_subprocess_exec(*cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                                           stderr=subprocess.PIPE)
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise subprocess.TimeoutExpired(cmd, timeout)
+        return subprocess.CompletedProcess(cmd, process.returncode, decode_output(stdout), decode_output(stderr))
+    
+    def run_command(self, cmd, timeout=None, heavy=False):
+        """Blocking form of run_command_async for engine threads"""
+        return self.call(self.run_command_async(cmd, timeout, heavy))
+
+
+class ProcessRunner:
+    """Run an FFmpeg child on the process reactor and stream its stdout/stderr
+    
+    Output is consumed as soon as it is written, so the child never blocks on a full
+    pipe. Stderr is kept as a bounded ring buffer of recent lines, and the full log
+    is written to log_path when one is given. Line callbacks run on the reactor's thread.
+    """
+    
+    def __init__(self, cmd, stop_event, reactor, log_path=None, on_stdout_line=None, on_stderr_line=None,
+                 tail_lines=STDERR_TAIL_LINES, cancel_event=None):
+        self.cmd = cmd
+        self.stop_event = stop_event
+        self.reactor = reactor
+        self.cancel_event = cancel_event
+        self.cancelled = False
+        self.log_path = log_path
+        self.on_stdout_line = on_stdout_line
+        self.on_stderr_line = on_stderr_line
+        self.tail = deque(maxlen=tail_lines)
+        self.process = None
+    
+    def run(self, poll_interval=0.05):
+        """Run to completion; returns the exit code, or None if stopped"""
+        return self.reactor.call(self.run_async(poll_interval))
+    
+    async def run_async(self, poll_interval):
+        async with self.reactor.slots(heavy=True):
+            if self.stop_requested():
+                return None
+            self.process = await asyncio.create_subprocess_exec(
+                *self.cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            readers = asyncio.gather(self.drain_stdout(), self.drain_stderr())
+            try:
+                # Both pipes hit EOF when the process exits, so completion is picked up immediately;
+                # the timeout only bounds how long a stop request can go unnoticed.
+                while not (await asyncio.wait({readers}, timeout=poll_interval))[0]:
+                    if self.stop_requested():
+                        await self.terminate()
+                        return None
+                readers.result()
+                
+                if self.stop_requested():
+                    await self.terminate()
+                    return None
+                return await self.process.wait()
+            finally:
+                if not readers.done():
+                    readers.cancel()
+                await self.terminate()  # a no-op unless a line callback raised
+    
+    def stop_requested(self):
+        """True if the run was stopped globally or cancelled for this job only"""
+        if self.stop_event.is_set():
+            return True
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            self.cancelled = True
+            return True
+        return False
+    
+    async def terminate(self):
+        """Stop the child process, killing it if it doesn't exit promptly"""
+        if self.process is None or self.process.returncode is not None:
+            return
+        try:
+            self.process.terminate()
+            await asyncio.wait_for(self.process.wait(), 5)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        except ProcessLookupError:
+            pass
+    
+    async def drain_stdout(self):
+        async for line in read_lines(self.process.stdout):
+            if self.on_stdout_line:
+                self.on_stdout_line(decode_output(line))
+    
+    async def drain_stderr(self):
+        log_file = None
+        try:
+            if self.log_path:
+                try:
+                    os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+                    log_file = open(self.log_path, "w", encoding="utf-8")
+                    log_file.write(" ".join(self.cmd) + "\n\n")
+                except OSError:
+                    log_file = None
+                    self.log_path = None
+            
+            async for line in read_lines(self.process.stderr):
+                line = decode_output(line)
+                self.tail.append(line)
+                if log_file:
+                    log_file.write(line)
+                if self.on_stderr_line:
+                    self.on_stderr_line(line)
+        finally:
+            if log_file:
+                log_file.close()
+    
+    def stderr_tail(self):
+        """Recent stderr output, as one string"""
+        return "".join(self.tail)
+
+
+class ComparisonEngine:
+    """Scores rows of left/right file pairs with FFmpeg (or NumPy) without any GUI
+    
+    submit() queues pairs as a batch and returns a ComparisonBatch of per-pair futures and
+    progress/result events; each job can be cancelled on its own and stop_event stops them all.
+    Scoring options are Setting objects created through make_setting, which the GUI replaces
+    with Tk variables.
+    """
+    
+    def __init__(self):
+        # Video Win Threshold
+        self.vmaf_win_threshold = 2.0
+        self.ssim_win_threshold = 0.01
+        self.video_psnr_win_threshold = 0.5
+
+        # Audio Win Threshold (PSNR, and integrated loudness for the EBU R128 fallback)
+        self.psnr_win_threshold = 2.0
+        self.loudness_win_threshold = 1.0
+        
+        # Sampled mode: segments scored per row and the confidence needed to skip the full run
+        self.sample_segment_count = 6
+        self.sample_segment_seconds = 4.0
+        self.sample_confidence = 0.95
+        
+        # Early termination: confidence for the sequential test, minimum share of the file to score,
+        # SSIM frames pooled per test sample, and VMAF window length (libvmaf only reports at the end)
+        self.early_stop_confidence = 0.99
+        self.early_stop_min_coverage = 0.1
+        self.early_stop_batch_frames = 48
+        self.early_stop_window_seconds = 30.0
+        
+        # Segment parallelism: rows longer than two segments are split and scored across the pool
+        self.segment_seconds = 300.0
+        
+        # Pre-flight: concurrent ffprobe calls (the process reactor's command budget), and the duration
+        # gap (fraction of the longer file, but at least the given seconds) above which a pair is rejected
+        self.probe_workers = 8
+        self.max_duration_mismatch = 0.1
+        self.min_duration_mismatch_seconds = 2.0
+        
+        # NumPy metric backend: frames scored per vectorized batch, and chunk length handed to each worker process
+        self.numpy_batch_frames = 4
+        self.numpy_chunk_seconds = 60.0
+        
+        # NumPy audio backend: analysis frame length, frames read per chunk, and the fast mode's rate
+        self.audio_frame_samples = 2048
+        self.audio_frames_per_chunk = 64
+        self.audio_fast_sample_rate = 16000
+
+        # Data storage
+        self.left_files = []
+        self.right_files = []
+        self.results = {}  # (left path, right path, metric) -> raw row result
+        self.running = False
+        self.stop_event = Event()
+        self.current_metric = self.make_setting("VMAF")
+        self.review_metric = self.make_setting("VMAF")
+        self.single_pass_video = self.make_setting(True)
+        self.fused_row = self.make_setting(True)
+        self.frame_stride = self.make_setting("1")
+        self.scoring_mode = self.make_setting("Full")
+        self.sample_scene_cuts = self.make_setting(False)
+        self.early_stop = self.make_setting(False)
+        self.normalize_inputs = self.make_setting(True)
+        self.score_resolution = self.make_setting("Native")
+        self.split_long_files = self.make_setting(False)
+        self.metric_backend = self.make_setting("FFmpeg")
+        self.audio_backend = self.make_setting("FFmpeg")
+        
+        # Threading
+        self.log_queue = Queue()
+        self.metadata_cache = {}  # (path, size, mtime) -> {"frames", "duration", "frame_rate"}
+        self.metadata_lock = Lock()
+        self.row_throughput = {}  # row_id -> {"video": stats, "audio": stats, "fused": stats}
+        self.progress_lock = Lock()
+        self.metric_pool = None  # process pool for the NumPy backend, created on first use
+        self.metric_manager = None  # serves the stop events its workers poll, created on first use
+        self.reactor = None  # ProcessReactor running the FFmpeg/ffprobe children, created on first use
+        self.loudness_cache = PersistentCache(LOUDNESS_CACHE_PATH)  # fingerprint -> {"integrated", "true_peak"}
+        self.probe_cache = PersistentCache(PROBE_CACHE_PATH)  # "path|size|mtime" -> probe_video_metadata()
+        self.throughput_cache = PersistentCache(THROUGHPUT_CACHE_PATH)  # metric -> last measured row fps
+        self.capability_cache = PersistentCache(CAPABILITY_CACHE_PATH)  # "binary|size|mtime" -> capabilities
+        self.ffmpeg_capabilities = None  # filled in by the background detection thread
+        self.ffmpeg_identity = None  # "binary|size|mtime" of the detected FFmpeg
+        self.result_cache = ResultCache(RESULT_CACHE_DIR)  # result_cache_key() -> row result
+        self.fingerprints = {}  # (path, size, mtime) -> file_fingerprint()
+        self.journal = JobJournal(None)  # the GUI journals to JOURNAL_PATH
+        self.jobs = {}  # row_id -> ComparisonJob of a submitted batch
+        self.jobs_lock = Lock()
+        self.next_row = 0  # first row number handed out by submit() when the caller gives none
+        self.metric_pool_lock = Lock()
+        workers = os.cpu_count() or 5
+        self.max_workers = max(1, workers - 4)  # FFmpeg scoring/decoding processes at once (the process budget)
+    
+    def make_setting(self, value):
+        """Holder for a scoring option; the GUI substitutes Tk variables"""
+        return Setting(value)
+    
+    def log_message(self, level, message):
+        """Queue a log message for whoever displays them"""
+        self.log_queue.put((level, message))
+    
+    def update_progress(self, row_id, progress_type, value):
+        """Report a row's video or audio progress in percent on its batch's event stream"""
+        job = self.jobs.get(row_id)
+        if job is not None:
+            job.batch.emit({"type": "progress", "row": job.row_idx, "job": job, "media": progress_type,
+                            "value": value})
+    
+    def row_stop(self, row_idx):
+        """Stop flag for a row: its job's cancel switch, which also follows the engine-wide stop"""
+        job = self.jobs.get(f"row_{row_idx}")
+        return job.stop if job is not None else self.stop_event
+    
+    def on_ffmpeg_missing(self):
+        """Called when no usable FFmpeg was found"""
+        self.log_queue.put(("ERROR", "FFmpeg not found. Please install FFmpeg and ensure it's in your PATH."))
+    
+    def get_total_frames(self, video_path):
+        """Get the frame count of the first video stream, cached per file"""
+        metadata = self.get_video_metadata(video_path)
+        if metadata is None:
+            return None
+        
+        if metadata["frames"] is None and not metadata.get("decode_counted"):
+            # Container metadata had neither nb_frames nor duration x frame rate; decode as a last resort
+            frames = self.count_frames_by_decoding(video_path)
+            with self.metadata_lock:
+                metadata["frames"] = frames
+                metadata["decode_counted"] = True
+        return metadata["frames"]
+    
+    def get_media_duration(self, video_path):
+        """Get the duration of a file in seconds from its container metadata, cached per file"""
+        metadata = self.get_video_metadata(video_path)
+        return metadata["duration"] if metadata else None
+    
+    def get_video_metadata(self, video_path, save=True):
+        """Probe streams, frame count, duration and frame rate, cached by path, size and mtime
+        
+        Probes are kept in memory and in the on-disk probe cache, so reruns skip ffprobe entirely.
+        save=False defers writing the on-disk cache (the pre-flight stage saves once at the end).
+        """
+        cache_key, metadata = self.cached_video_metadata(video_path)
+        if cache_key is None or metadata is not None:
+            return metadata
+        return self.remember_video_metadata(cache_key, self.probe_video_metadata(video_path), save)
+    
+    async def get_video_metadata_async(self, video_path, save=True):
+        """get_video_metadata for coroutines on the process reactor, so many probes share its command budget"""
+        cache_key, metadata = self.cached_video_metadata(video_path)
+        if cache_key is None or metadata is not None:
+            return metadata
+        return self.remember_video_metadata(cache_key, await self.probe_video_metadata_async(video_path), save)
+    
+    def cached_video_metadata(self, video_path):
+        """Look a file up in the memory and on-disk probe caches
+        
+        Returns (cache_key, metadata); metadata is None on a miss, and cache_key is None if the file is unreadable.
+        """
+        try:
+            stat = os.stat(video_path)
+            cache_key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            return None, None
+        
+        with self.metadata_lock:
+            if cache_key in self.metadata_cache:
+                return cache_key, self.metadata_cache[cache_key]
+        
+        metadata = self.probe_cache.get("|".join(str(part) for part in cache_key))
+        if metadata is not None:
+            with self.metadata_lock:
+                self.metadata_cache[cache_key] = metadata
+        return cache_key, metadata
+    
+    def remember_video_metadata(self, cache_key, metadata, save):
+        """Store a fresh probe in both caches; returns it"""
+        if metadata is not None:
+            self.probe_cache.set("|".join(str(part) for part in cache_key), metadata, save=save)
+            with self.metadata_lock:
+                self.metadata_cache[cache_key] = metadata
+        return metadata
+    
+    def probe_video_metadata(self, video_path):
+        """Blocking form of probe_video_metadata_async"""
+        return self.get_reactor().call(self.probe_video_metadata_async(video_path))
+    
+    async def probe_video_metadata_async(self, video_path):
+        """Read stream layout, frame count (nb_frames, or duration x frame rate), duration and frame rate without decoding"""
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-show_entries", "stream=codec_type,nb_frames,avg_frame_rate,r_frame_rate,duration,width,height,pix_fmt,"
+                             "sample_rate,channels,channel_layout:format=duration",
+            "-of", "json",
+            video_path
+        ]
+        result = await self.get_reactor().run_command_async(cmd)
+        if result.returncode != 0:
+            return None
+        
+        try:
+            info = json.loads(result.stdout or "{}")
+        except ValueError:
+            return None
+        
+        streams = info.get("streams") or []
+        stream = next((s for s in streams if s.get("codec_type") == "video"), {})
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+        
+        duration = self.parse_float(stream.get("duration")) or self.parse_float(info.get("format", {}).get("duration"))
+        rate_text = stream.get("avg_frame_rate")
+        if not self.parse_frame_rate(rate_text):
+            rate_text = stream.get("r_frame_rate")
+        frame_rate = self.parse_frame_rate(rate_text)
+        
+        frames = None
+        nb_frames = str(stream.get("nb_frames", ""))
+        if nb_frames.isdigit() and int(nb_frames) > 0:
+            frames = int(nb_frames)
+        elif duration and frame_rate:
+            frames = max(1, int(round(duration * frame_rate)))
+        
+        return {
+            "frames": frames,
+            "duration": duration,
+            "frame_rate": frame_rate,
+            "frame_rate_text": rate_text if frame_rate else None,
+            "width": stream.get("width"),
+            "height": stream.get("height"),
+            "pix_fmt": stream.get("pix_fmt"),
+            "has_video": bool(stream),
+            "has_audio": bool(audio),
+            "audio_sample_rate": int(self.parse_float(audio.get("sample_rate")) or 0) or None,
+            "audio_channels": audio.get("channels"),
+            "audio_layout": audio.get("channel_layout")
+        }
+    
+    def count_frames_by_decoding(self, video_path):
+        """Count frames by decoding the whole video stream (slow)"""
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-count_frames",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=nb_read_frames",
+            "-of", "default=nokey=1:noprint_wrappers=1",
+            video_path
+        ]
+        result = self.run_command(cmd, heavy=True)
+        return int(result.stdout.strip()) if result.stdout.strip().isdigit() else None
+    
+    def parse_frame_rate(self, value):
+        """Parse an FFprobe rate such as '30000/1001' into frames per second"""
+        try:
+            if not value:
+                return None
+            if "/" in value:
+                num, den = value.split("/", 1)
+                return float(num) / float(den) if float(den) else None
+            return float(value) or None
+        except (ValueError, ZeroDivisionError):
+            return None
+    
+    def parse_float(self, value):
+        """Parse a numeric FFprobe field, returning None for missing or 'N/A' values"""
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    
+    def pair_key(self, left_file, right_file, metric):
+        """Identity a row result is stored under, independent of the row's position"""
+        return (os.path.abspath(left_file), os.path.abspath(right_file), metric)
+    
+    def evaluate_verdicts(self, result):
+        """Recompute a result's winners from its raw scores and the current win thresholds"""
+        metric = result.get("metric", self.current_metric.get())
+        result["video_winner"] = score_verdict(result.get("video_score_left", 0), result.get("video_score_right", 0),
+                                               self.win_threshold(metric))
+        
+        measure = result.get("audio_measure", "psnr")
+        if measure == "none":
+            result["audio_winner"] = "tie"
+        else:
+            threshold = self.loudness_win_threshold if measure == "loudness" else self.psnr_win_threshold
+            result["audio_winner"] = score_verdict(result.get("audio_score_left", 0), result.get("audio_score_right", 0),
+                                                   threshold)
+        return result
+    
+    def win_threshold(self, metric):
+        """Score difference below which the two videos tie on the given metric"""
+        if metric in ("SSIM", "MS-SSIM"):
+            return self.ssim_win_threshold
+        if metric == "PSNR":
+            return self.video_psnr_win_threshold
+        return self.vmaf_win_threshold
+    
+    def detect_ffmpeg_capabilities(self):
+        """Find the FFmpeg binary and what it supports, reusing the cached result for an unchanged binary"""
+        try:
+            ffmpeg_path = shutil.which("ffmpeg")
+            capabilities = None
+            if ffmpeg_path:
+                real_path = os.path.realpath(ffmpeg_path)
+                stat = os.stat(real_path)
+                cache_key = f"{real_path}|{stat.st_size}|{stat.st_mtime_ns}"
+                capabilities = self.capability_cache.get(cache_key)
+                if capabilities is None:
+                    capabilities = self.probe_ffmpeg_capabilities()
+                    if capabilities is not None:
+                        self.capability_cache.set(cache_key, capabilities)
+                self.ffmpeg_identity = cache_key
+        except OSError:
+            capabilities = None
+        
+        if capabilities is None:
+            self.on_ffmpeg_missing()
+            return
+        
+        self.ffmpeg_capabilities = capabilities
+        missing = [name for name in ("libvmaf", "ssim", "apsnr", "ebur128") if not self.has_filter(name)]
+        details = f", {len(capabilities['vmaf_models'])} VMAF models" if self.has_filter("libvmaf") else ""
+        self.log_queue.put(("INFO", f"FFmpeg {capabilities['version']} is available{details}"
+                                    f"{', missing: ' + ', '.join(missing) if missing else ''}"))
+    
+    def probe_ffmpeg_capabilities(self):
+        """Query the FFmpeg build for its version, filters, libvmaf options and usable VMAF models"""
+        def run(args, timeout=10):
+            return self.run_command(["ffmpeg", "-hide_banner"] + args, timeout=timeout)
+        
+        try:
+            result = run(["-version"])
+            if result.returncode != 0:
+                return None
+            version_match = re.search(r'ffmpeg version (\S+)', result.stdout)
+            
+            filters = []
+            for line in run(["-filters"]).stdout.splitlines():
+                match = re.match(r'\s*[A-Z.|]{2,4}\s+(\w+)\s+\S*->\S*', line)
+                if match and match.group(1) in ENGINE_FILTERS:
+                    filters.append(match.group(1))
+            
+            libvmaf_options = []
+            vmaf_models = []
+            if "libvmaf" in filters:
+                help_text = run(["-h", "filter=libvmaf"]).stdout
+                libvmaf_options = re.findall(r'^\s+(\w+)\s+<', help_text, re.MULTILINE)
+                if "model" in libvmaf_options:
+                    # Built-in models depend on how libvmaf was compiled; score a tiny clip with each
+                    source = "testsrc=size=176x144:rate=5:duration=1"
+                    for spec in MULTI_METRIC_MODELS:
+                        check = run(["-v", "error", "-f", "lavfi", "-i", source, "-f", "lavfi", "-i", source,
+                                     "-lavfi", f"[0:v][1:v]libvmaf=model={self.escape_filter_value(spec)}",
+                                     "-f", "null", "-"], timeout=30)
+                        if check.returncode == 0:
+                            vmaf_models.append(spec)
+            
+            return {
+                "version": version_match.group(1) if version_match else "unknown",
+                "filters": filters,
+                "libvmaf_options": libvmaf_options,
+                "vmaf_models": vmaf_models
+            }
+        
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+    
+    def has_filter(self, name):
+        """Whether the detected FFmpeg build has a filter (assumed present until detection finishes)"""
+        if self.ffmpeg_capabilities is None:
+            return True
+        return name in self.ffmpeg_capabilities["filters"]
+    
+    def resolve_backends(self):
+        """Switch settings the detected FFmpeg build cannot run to the best available alternative"""
+        capabilities = self.ffmpeg_capabilities
+        if capabilities is None:
+            return
+        
+        metric = self.current_metric.get()
+        if metric in LIBVMAF_METRICS and not self.has_filter("libvmaf"):
+            self.log_message("WARNING", f"This FFmpeg build has no libvmaf, scoring SSIM instead of {metric}")
+            self.current_metric.set("SSIM")
+        elif metric == "Multi" and not capabilities["vmaf_models"]:
+            self.log_message("WARNING", "This libvmaf cannot load built-in models by name, scoring VMAF instead of Multi")
+            self.current_metric.set("VMAF")
+        
+        if self.current_metric.get() == "SSIM" and not self.has_filter("ssim") and self.metric_backend.get() == "FFmpeg":
+            if np is not None:
+                self.log_message("WARNING", "This FFmpeg build has no ssim filter, using the NumPy SSIM backend")
+                self.metric_backend.set("NumPy")
+            else:
+                self.log_message("ERROR", "This FFmpeg build has no ssim filter and NumPy is not installed")
+        
+        if not self.has_filter("apsnr") and AUDIO_BACKENDS.get(self.audio_backend.get(), ("ffmpeg",))[0] == "ffmpeg":
+            if np is not None:
+                self.log_message("WARNING", "This FFmpeg build has no apsnr filter, using the NumPy audio backend")
+                self.audio_backend.set("NumPy")
+            else:
+                self.log_message("WARNING", "This FFmpeg build has no apsnr filter, audio will be compared by loudness")
+    
+    def submit(self, pairs, rows=None, resume=False, runner=None):
+        """Score (left_file, right_file) pairs as one batch on a background thread
+        
+        rows gives each pair's row number, used in logs and events; by default new numbers are
+        handed out. The journal header lists left_files/right_files, the caller's full row table;
+        resume appends to the current journal instead of starting a new one. runner replaces
+        run_batch as the thread that scores the batch (the distributed coordinator hands rows to workers).
+        Returns a ComparisonBatch with one ComparisonJob per pair, in order.
+        """
+        with self.jobs_lock:
+            if rows is None:
+                rows = list(range(self.next_row, self.next_row + len(pairs)))
+            self.next_row = max([self.next_row] + [row_idx + 1 for row_idx in rows])
+            if not self.jobs:
+                self.stop_event.clear()
+            jobs = [ComparisonJob(row_idx, left_file, right_file, self.stop_event)
+                    for row_idx, (left_file, right_file) in zip(rows, pairs)]
+            for job in jobs:
+                self.jobs[f"row_{job.row_idx}"] = job
+        
+        batch = ComparisonBatch(jobs)
+        self.running = True
+        threading.Thread(target=runner or self.run_batch, args=(batch, resume), daemon=True).start()
+        return batch
+    
+    def finish_job(self, job, result=None, error=None):
+        """Journal a job's outcome, settle its future and announce it on its batch's event stream
+        
+        Pass the row result, a ComparisonFailed, or neither for a job that was cancelled. The job is
+        passed rather than looked up by row, since a stopped batch may still be closing when a new
+        batch for the same rows has been submitted.
+        """
+        if job.settled:
+            return
+        
+        row_idx = job.row_idx
+        metric = result.get("metric") if result else self.current_metric.get()
+        pair = list(self.pair_key(job.left_file, job.right_file, metric))
+        if result is not None:
+            self.journal.record("done", pair=pair, row=row_idx, result=result)
+            event = {"type": "result", "result": result}
+        elif error is not None:
+            # A result left from an earlier run would hide the failure from Resume
+            self.results.pop(tuple(pair), None)
+            self.journal.record(error.state, pair=pair, row=row_idx, error=error.reason)
+            event = {"type": error.state, "error": error.reason}
+        else:
+            self.journal.record("cancelled", pair=pair, row=row_idx)
+            event = {"type": "cancelled"}
+        
+        job.resolve(result, error)
+        event.update(row=row_idx, job=job)
+        job.batch.emit(event)
+    
+    def run_batch(self, batch, resume=False):
+        """Score a batch's rows on a thread pool, journaling each row's progress and settling its future"""
+        completed = False
+        try:
+            metric = self.current_metric.get()
+            tasks = [(job.row_idx, job.left_file, job.right_file) for job in batch.jobs]
+            task_files = {row_idx: (left_file, right_file) for row_idx, left_file, right_file in tasks}
+            row_jobs = {job.row_idx: job for job in batch.jobs}
+            
+            self.begin_batch_journal(batch, resume)
+            tasks = self.preflight_rows(tasks, row_jobs)
+            
+            # Rows get more threads than process slots; the reactor's budget limits the FFmpeg children
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers * ROW_THREADS_PER_PROCESS) as executor:
+                # Submit all tasks; long rows become one task per segment plus one for audio
+                future_to_row = {}
+                segmented_rows = {}
+                for row_idx, left_file, right_file in tasks:
+                    if self.stop_event.is_set():
+                        break
+                    
+                    job = self.plan_segmented_row(row_idx, left_file, right_file)
+                    if job is not None:
+                        segmented_rows[row_idx] = job
+                        for segment in job.pending_segments():
+                            future = executor.submit(self.score_row_segment, job, segment)
+                            future_to_row[future] = (row_idx, "segment")
+                        future = executor.submit(self.run_audio_comparison, left_file, right_file, row_idx, job.options)
+                        future_to_row[future] = (row_idx, "audio")
+                        continue
+                    
+                    future = executor.submit(self.compare_row, row_idx, left_file, right_file)
+                    future_to_row[future] = (row_idx, "row")
+                
+                # Process completed tasks
+                for future in concurrent.futures.as_completed(future_to_row):
+                    if self.stop_event.is_set():
+                        break
+                    
+                    row_idx, task_type = future_to_row[future]
+                    left_file, right_file = task_files[row_idx]
+                    job = row_jobs[row_idx]
+                    try:
+                        result = future.result()
+                        if task_type != "row":
+                            result = self.collect_segmented_row(segmented_rows[row_idx], task_type, result)
+                        if result and "error" in result:
+                            self.finish_job(job, error=ComparisonFailed("failed", result["error"]))
+                        elif result:
+                            key = self.pair_key(left_file, right_file, result.get("metric", metric))
+                            self.results[key] = result
+                            self.evaluate_verdicts(result)
+                            # A fused row's one pass is its whole video time, audio included
+                            fps = result.get("video_fps", result.get("fused_fps"))
+                            if fps:
+                                self.throughput_cache.set(metric, fps)
+                            self.finish_job(job, result=result)
+                        elif task_type == "row" or segmented_rows[row_idx].failed:
+                            if job.stop.is_set():
+                                self.finish_job(job)
+                            else:
+                                self.finish_job(job, error=ComparisonFailed("failed", "comparison failed, see the log"))
+                    
+                    except Exception as e:
+                        self.log_queue.put(("ERROR", f"Row {row_idx + 1} comparison failed: {str(e)}"))
+                        self.finish_job(job, error=ComparisonFailed("failed", str(e)))
+            completed = not self.stop_event.is_set()
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Comparison process failed: {str(e)}"))
+        
+        finally:
+            self.close_batch(batch, completed)
+    
+    def begin_batch_journal(self, batch, resume=False):
+        """Write the journal header for a batch; a fresh batch starts a new journal, a resumed one carries on"""
+        metric = self.current_metric.get()
+        self.journal.begin({
+            "left_files": list(self.left_files),
+            "right_files": list(self.right_files),
+            "settings": self.session_settings(),
+            "queued": [list(self.pair_key(job.left_file, job.right_file, metric)) for job in batch.jobs]
+        }, fresh=not resume)
+    
+    def close_batch(self, batch, completed):
+        """Settle what is left of a batch, unregister its jobs and end its event stream"""
+        # Rows left unsettled were stopped; an unfinished journal is offered for restore on the next start
+        for job in batch.jobs:
+            self.finish_job(job)
+        with self.jobs_lock:
+            # A newer batch may have registered the same row numbers; leave its jobs in place
+            for job in batch.jobs:
+                if self.jobs.get(f"row_{job.row_idx}") is job:
+                    del self.jobs[f"row_{job.row_idx}"]
+            self.running = bool(self.jobs)
+        if completed:
+            self.journal.record("finished")
+        if self.stop_event.is_set():
+            self.journal.record("stopped")
+            self.log_queue.put(("INFO", "Comparison stopped, unfinished rows can be resumed"))
+        else:
+            self.log_queue.put(("INFO", "All comparisons completed"))
+        batch.finished.set()
+        batch.emit({"type": "finished"})
+    
+    def session_settings(self):
+        """Current options and win thresholds, as saved in session files and the batch journal"""
+        settings = {name: getattr(self, name).get() for name in SESSION_VARIABLES}
+        settings["thresholds"] = {attribute: getattr(self, attribute) for attribute in THRESHOLD_ATTRIBUTES}
+        return settings
+    
+    def apply_session_settings(self, settings):
+        """Restore options and win thresholds saved by session_settings"""
+        for name in SESSION_VARIABLES:
+            if name in settings:
+                getattr(self, name).set(settings[name])
+        for attribute, value in settings.get("thresholds", {}).items():
+            if attribute in THRESHOLD_ATTRIBUTES:
+                setattr(self, attribute, value)
+    
+    def preflight_rows(self, tasks, jobs):
+        """Probe every file concurrently and reject pairs that are bound to fail before any decoding
+        
+        Rows without a video stream or with a gross duration mismatch are dropped, settling their
+        jobs (jobs maps row index -> ComparisonJob). Rows missing audio are kept; their audio
+        comparison is skipped. Logs the work left and a time estimate. Returns the tasks that passed.
+        """
+        paths = sorted({path for _, left_file, right_file in tasks for path in (left_file, right_file)})
+        if not paths:
+            return tasks
+        
+        self.log_queue.put(("INFO", f"Pre-flight: probing {len(paths)} files..."))
+        
+        # Every probe is a coroutine on the process reactor, limited only by its command budget
+        async def probe_all():
+            return await asyncio.gather(*[self.get_video_metadata_async(path, save=False) for path in paths])
+        
+        probed = dict(zip(paths, self.get_reactor().call(probe_all())))
+        self.probe_cache.save()
+        
+        # Content fingerprints for the result cache are file reads, hashed on a small thread pool
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.probe_workers, len(paths))) as pool:
+            list(pool.map(self.get_file_fingerprint, paths))
+        
+        ready = []
+        total_frames = 0
+        total_seconds = 0.0
+        for row_idx, left_file, right_file in tasks:
+            if self.stop_event.is_set():
+                return []
+            
+            left, right = probed.get(left_file), probed.get(right_file)
+            problem = None
+            if left is None or right is None:
+                problem = "could not be probed"
+            elif not left.get("has_video") or not right.get("has_video"):
+                problem = "has no video stream"
+            elif left.get("duration") and right.get("duration"):
+                gap = abs(left["duration"] - right["duration"])
+                longer = max(left["duration"], right["duration"])
+                if gap > max(self.min_duration_mismatch_seconds, self.max_duration_mismatch * longer):
+                    problem = f"durations differ by {gap:.1f}s ({left['duration']:.1f}s vs {right['duration']:.1f}s)"
+            
+            if problem:
+                self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Skipped, pair {problem}"))
+                self.finish_job(jobs[row_idx], error=ComparisonFailed("skipped", f"pair {problem}"))
+                continue
+            if not left.get("has_audio") or not right.get("has_audio"):
+                self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Missing audio stream, audio will not be compared"))
+            
+            ready.append((row_idx, left_file, right_file))
+            total_frames += left.get("frames") or 0
+            total_seconds += min(left.get("duration") or 0, right.get("duration") or 0)
+        
+        estimate = ""
+        fps = self.throughput_cache.get(self.current_metric.get())
+        if fps and ready:
+            seconds = total_frames / fps / min(len(ready), self.max_workers)
+            estimate = f", roughly {seconds / 60:.1f} min at the last measured {fps:.0f} fps per row"
+        self.log_queue.put(("INFO", f"Pre-flight: {len(ready)} of {len(tasks)} rows ready, {total_frames} frames "
+                                    f"({total_seconds / 3600:.2f} h) to score{estimate}"))
+        return ready
+    
+    def compare_row(self, row_idx, left_file, right_file):
+        """Compare a single row (video and audio)"""
+        try:
+            if self.row_stop(row_idx).is_set():
+                return None
+            
+            row_id = f"row_{row_idx}"
+            self.log_queue.put(("INFO", f"Starting row {row_idx + 1}: {os.path.basename(left_file)} vs {os.path.basename(right_file)}"))
+            self.journal.record("running", pair=list(self.pair_key(left_file, right_file, self.current_metric.get())),
+                                row=row_idx)
+            
+            video_result = None
+            audio_result = None
+            options = self.get_scoring_options()
+            
+            cache_key = self.result_cache_key(left_file, right_file, self.current_metric.get(), options)
+            cached = self.result_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: Unchanged since an earlier run, using the cached result"))
+                self.update_progress(row_id, "video", 100)
+                self.update_progress(row_id, "audio", 100)
+                cached["cached"] = True
+                return self.evaluate_verdicts(cached)
+            
+            options["video_targets"] = self.plan_video_normalization(left_file, right_file, options, row_idx)
+            if options["stride"] > 1:
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: Scoring every {options['stride']} frames"))
+            
+            # Fused comparison: video metric and audio PSNR from one FFmpeg process
+            if (self.fused_row.get() and options["mode"] == "full" and not options["early_stop"]
+                    and not self.numpy_backend_active(self.current_metric.get(), options)
+                    and options["audio_backend"][0] == "ffmpeg" and self.has_filter("apsnr")):
+                self.update_progress(row_id, "video", 0)
+                self.update_progress(row_id, "audio", 0)
+                fused = self.run_fused_row_comparison(left_file, right_file, self.current_metric.get(), row_idx, options)
+                if self.row_stop(row_idx).is_set():
+                    return None
+                if fused is not None:
+                    video_result, audio_result = fused
+                    self.update_progress(row_id, "video", 100)
+                    self.update_progress(row_id, "audio", 100)
+                else:
+                    self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Fused comparison failed, running video and audio separately"))
+            
+            # Video comparison
+            if video_result is None:
+                self.update_progress(row_id, "video", 0)
+                if options["mode"] == "sampled":
+                    video_result = self.run_sampled_video_comparison(left_file, right_file, self.current_metric.get(), row_idx, options)
+                else:
+                    video_result = self.run_video_comparison(left_file, right_file, self.current_metric.get(), row_idx, options)
+                if self.row_stop(row_idx).is_set():
+                    return None
+                self.update_progress(row_id, "video", 100)
+            
+            # Audio comparison
+            if audio_result is None:
+                self.update_progress(row_id, "audio", 0)
+                audio_result = self.run_audio_comparison(left_file, right_file, row_idx, options)
+                if self.row_stop(row_idx).is_set():
+                    return None
+                self.update_progress(row_id, "audio", 100)
+            
+            self.log_queue.put(("INFO", f"Completed row {row_idx + 1}"))
+            
+            result = self.build_row_result(row_id, video_result, audio_result, options, self.current_metric.get())
+            self.store_cached_result(cache_key, result)
+            return result
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1} comparison error: {str(e)}"))
+            return None
+    
+    def build_row_result(self, row_id, video_result, audio_result, options, metric):
+        """Combine video and audio results into the stored row result
+        
+        The raw scores, metric and audio measure are kept so verdicts can be re-evaluated
+        for other thresholds (see evaluate_verdicts).
+        """
+        result = {
+            "video_winner": video_result.get("winner", "tie"),
+            "audio_winner": audio_result.get("winner", "tie"),
+            "video_score_left": video_result.get("left_score", 0),
+            "video_score_right": video_result.get("right_score", 0),
+            "audio_score_left": audio_result.get("left_score", 0),
+            "audio_score_right": audio_result.get("right_score", 0)
+        }
+        result["metric"] = metric
+        result["audio_measure"] = audio_result.get("measure", "psnr")
+        error = video_result.get("error") or audio_result.get("error")
+        if error:
+            result["error"] = error
+        result["video_stride"] = options["stride"]
+        if "stats" in video_result:
+            result["video_stats"] = video_result["stats"]
+        if "sampling" in video_result:
+            result["video_sampling"] = video_result["sampling"]
+        if "early_stop" in video_result:
+            result["video_early_stop"] = video_result["early_stop"]
+        if "segments" in video_result:
+            result["video_segments"] = video_result["segments"]
+        if "stats" in audio_result:
+            result["audio_stats"] = audio_result["stats"]
+        metrics = video_result.get("metrics") or self.multi_metric_scores(video_result.get("stats"))
+        if metrics:
+            result["video_metrics"] = metrics
+        result.update(self.summarize_throughput(row_id))
+        return result
+    
+    def plan_segmented_row(self, row_idx, left_file, right_file):
+        """Split a long row into time segments, resuming from its checkpoint if one exists
+        
+        Returns a SegmentedRowJob, or None if the row should be scored as a single task.
+        """
+        try:
+            options = self.get_scoring_options()
+            if not options["split_segments"] or options["mode"] != "full" or options["early_stop"]:
+                return None
+            
+            # A cached row is served by compare_row without splitting
+            cache_key = self.result_cache_key(left_file, right_file, self.current_metric.get(), options)
+            if cache_key and self.result_cache.get(cache_key) is not None:
+                return None
+            
+            durations = [self.get_media_duration(left_file), self.get_media_duration(right_file)]
+            if None in durations or min(durations) < 2 * self.segment_seconds:
+                return None
+            
+            duration = min(durations)
+            metric = self.current_metric.get()
+            options["video_targets"] = self.plan_video_normalization(left_file, right_file, options, row_idx)
+            
+            segments = []
+            start = 0.0
+            while start < duration:
+                length = min(self.segment_seconds, duration - start)
+                segments.append((len(segments), start, length))
+                start += length
+            
+            job = SegmentedRowJob(row_idx, left_file, right_file, metric, options, segments,
+                                  self.checkpoint_path(left_file, right_file, metric, options))
+            job.load_checkpoint()
+            self.journal.record("running", pair=list(self.pair_key(left_file, right_file, metric)), row=row_idx)
+            
+            done = len(segments) - len(job.pending_segments())
+            resumed = f", resuming with {done} already done" if done else ""
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Split into {len(segments)} segments of "
+                                        f"{self.segment_seconds:g}s{resumed}"))
+            self.update_progress(f"row_{row_idx}", "video", int(100 * done / len(segments)))
+            return job
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Could not split row into segments: {str(e)}"))
+            return None
+    
+    def checkpoint_path(self, left_file, right_file, metric, options):
+        """Checkpoint journal location for a pair, tied to file identity and scoring settings"""
+        identity = []
+        for path in (left_file, right_file):
+            stat = os.stat(path)
+            identity.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+        identity.append([metric, options.get("stride"), options.get("video_targets"), options.get("backend"),
+                         self.segment_seconds])
+        digest = hashlib.sha1(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+        return os.path.join(CHECKPOINT_DIR, f"{digest}.jsonl")
+    
+    def score_row_segment(self, job, segment):
+        """Score one time segment of a long row in both directions and journal the result"""
+        index, start, length = segment
+        if self.row_stop(job.row_idx).is_set() or job.failed:
+            return None
+        
+        details = {}
+        scores = self.run_bidirectional_video_comparison(
+            job.left_file, job.right_file, job.metric, job.row_idx, details, job.options, segment=(start, length)
+        )
+        if scores is None:
+            return None
+        
+        # Weight by frames scored; libvmaf reports them, otherwise estimate from the frame rate
+        frames = details.get("left_ref", {}).get("frames")
+        if not frames:
+            metadata = self.get_video_metadata(job.left_file) or {}
+            frames = length * (metadata.get("frame_rate") or 1.0)
+        
+        record = {"index": index, "start": start, "length": length,
+                  "left": scores["left_ref"], "right": scores["right_ref"], "frames": frames}
+        metrics = self.multi_metric_scores(details)
+        if metrics:
+            record["metrics"] = metrics
+        job.record_segment(record)
+        return record
+    
+    def collect_segmented_row(self, job, task_type, task_result):
+        """Fold a finished segment or audio task into its row; returns the row result once complete"""
+        row_id = f"row_{job.row_idx}"
+        if job.failed:
+            return None
+        
+        if task_type == "audio":
+            job.audio_result = task_result
+            job.audio_done = True
+            self.update_progress(row_id, "audio", 100)
+        elif task_result is None:
+            job.failed = True
+            if not self.row_stop(job.row_idx).is_set():
+                self.log_queue.put(("ERROR", f"Row {job.row_idx + 1}: Segment failed; finished segments are kept "
+                                             f"for the next run"))
+            return None
+        else:
+            job.segment_results[task_result["index"]] = task_result
+            self.update_progress(row_id, "video", int(100 * len(job.segment_results) / len(job.segments)))
+        
+        if not job.is_complete():
+            return None
+        
+        # Frame-weighted pooling across segments
+        records = list(job.segment_results.values())
+        total_frames = sum(record["frames"] for record in records)
+        left_score = sum(record["left"] * record["frames"] for record in records) / total_frames
+        right_score = sum(record["right"] * record["frames"] for record in records) / total_frames
+        
+        video_result = self.determine_video_winner(left_score, right_score, job.metric, job.row_idx)
+        video_result["segments"] = {"count": len(records), "segment_seconds": self.segment_seconds}
+        metrics = {}
+        for name in MULTI_METRIC_KEYS:
+            if all(name in record.get("metrics", {}) for record in records):
+                metrics[name] = {
+                    side: sum(record["metrics"][name][side] * record["frames"] for record in records) / total_frames
+                    for side in ("left", "right")
+                }
+        if metrics:
+            video_result["metrics"] = metrics
+        audio_result = job.audio_result or {"winner": "tie", "left_score": 0, "right_score": 0}
+        
+        job.discard_checkpoint()
+        self.log_queue.put(("INFO", f"Completed row {job.row_idx + 1}"))
+        result = self.build_row_result(row_id, video_result, audio_result, job.options, job.metric)
+        self.store_cached_result(self.result_cache_key(job.left_file, job.right_file, job.metric, job.options), result)
+        return result
+    
+    def get_file_fingerprint(self, path):
+        """Content fingerprint of a file, memoized by path, size and mtime; None if it can't be read"""
+        try:
+            stat = os.stat(path)
+            memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+            with self.metadata_lock:
+                if memo_key in self.fingerprints:
+                    return self.fingerprints[memo_key]
+            fingerprint = file_fingerprint(path)
+        except OSError:
+            return None
+        
+        with self.metadata_lock:
+            self.fingerprints[memo_key] = fingerprint
+        return fingerprint
+    
+    def result_cache_key(self, left_file, right_file, metric, options):
+        """Cache key for a row: both files' content, the metric and every setting that changes the result
+        
+        Returns None (no caching) until the FFmpeg build is known, since its version changes scores.
+        Win thresholds only count where they decide when scoring stops (sampled mode, early termination);
+        otherwise a cached result's verdicts are re-evaluated for the current thresholds.
+        """
+        if self.ffmpeg_capabilities is None:
+            return None
+        fingerprints = [self.get_file_fingerprint(path) for path in (left_file, right_file)]
+        if None in fingerprints:
+            return None
+        
+        identity = {
+            "files": fingerprints,
+            "metric": metric,
+            "options": {key: value for key, value in options.items() if key != "video_targets"},
+            "engine": [self.sample_segment_count, self.sample_segment_seconds, self.sample_confidence,
+                       self.early_stop_confidence, self.early_stop_min_coverage, self.early_stop_batch_frames,
+                       self.early_stop_window_seconds, self.segment_seconds],
+            "ffmpeg": [self.ffmpeg_capabilities["version"], self.ffmpeg_identity, self.ffmpeg_capabilities["vmaf_models"]]
+        }
+        if options.get("mode") == "sampled" or options.get("early_stop"):
+            identity["thresholds"] = [self.vmaf_win_threshold, self.ssim_win_threshold, self.video_psnr_win_threshold,
+                                      self.psnr_win_threshold]
+        return hashlib.sha1(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+    
+    def store_cached_result(self, cache_key, result):
+        """Save a finished row result, skipping stopped runs and rows whose scoring failed"""
+        if cache_key is None or self.stop_event.is_set() or "error" in result:
+            return
+        self.result_cache.set(cache_key, result)
+    
+    def run_video_comparison(self, left_file, right_file, metric, row_idx, options=None):
+        """Run video quality comparison using FFmpeg with bidirectional analysis"""
+        try:
+            if self.row_stop(row_idx).is_set():
+                return {"winner": "tie", "left_score": 0, "right_score": 0}
+            
+            if options and options.get("early_stop"):
+                result = self.run_early_stop_video_comparison(left_file, right_file, metric, row_idx, options)
+                if result is not None or self.row_stop(row_idx).is_set():
+                    return result or {"winner": "tie", "left_score": 0, "right_score": 0}
+                self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Early-termination run failed, scoring the whole file"))
+            
+            # Extended per-direction statistics (VMAF pooled metrics and per-frame arrays)
+            details = {}
+            
+            if self.single_pass_video.get():
+                # Both directions from one decode of each input (one direction for symmetric metrics)
+                if metric in SYMMETRIC_METRICS:
+                    self.log_queue.put(("INFO", f"Row {row_idx + 1}: Running {metric} once (symmetric metric, single pass)..."))
+                else:
+                    self.log_queue.put(("INFO", f"Row {row_idx + 1}: Running {metric} in both directions (single pass)..."))
+                self.update_progress(f"row_{row_idx}", "video", 10)
+                scores = self.run_bidirectional_video_comparison(left_file, right_file, metric, row_idx, details, options)
+                
+                if self.row_stop(row_idx).is_set():
+                    return {"winner": "tie", "left_score": 0, "right_score": 0}
+                
+                if scores is not None:
+                    self.update_progress(f"row_{row_idx}", "video", 100)
+                    result = self.determine_video_winner(scores["left_ref"], scores["right_ref"], metric, row_idx)
+                    if details:
+                        result["stats"] = details
+                    return result
+                
+                details.clear()
+                
+                self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Single-pass {metric} failed, falling back to two passes"))
+            
+            # First comparison: left as reference, right as distorted
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Running {metric} with left as reference..."))
+            self.update_progress(f"row_{row_idx}", "video", 10)
+            left_as_ref_score = self.run_single_video_comparison(left_file, right_file, metric, "left_ref", row_idx, details, options)
+            
+            if self.row_stop(row_idx).is_set():
+                return {"winner": "tie", "left_score": 0, "right_score": 0}
+            
+            # Update progress
+            self.update_progress(f"row_{row_idx}", "video", 55)
+            
+            if metric in SYMMETRIC_METRICS:
+                # Swapping reference and distorted gives the same score
+                right_as_ref_score = left_as_ref_score
+            else:
+                # Second comparison: right as reference, left as distorted
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: Running {metric} with right as reference..."))
+                right_as_ref_score = self.run_single_video_comparison(right_file, left_file, metric, "right_ref", row_idx, details, options)
+            
+            if self.row_stop(row_idx).is_set():
+                return {"winner": "tie", "left_score": 0, "right_score": 0}
+            
+            self.update_progress(f"row_{row_idx}", "video", 100)
+            
+            # Determine winner based on both scores
+            result = self.determine_video_winner(left_as_ref_score, right_as_ref_score, metric, row_idx)
+            if details:
+                result["stats"] = details
+            return result
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Video comparison error: {str(e)}"))
+            return failed_comparison(f"video comparison error: {str(e)}")
+    
+    def build_video_filter_graph(self, metric, passes, log_paths=None, options=None, per_frame_log=False):
+        """Build a filter graph that decodes each input once and feeds every requested metric pass
+        
+        passes is a list of (comparison_type, reference_input, distorted_input) tuples. Each
+        metric filter instance is named after its comparison_type so its log lines can be told apart.
+        log_paths maps comparison_type to the libvmaf JSON log file for that pass.
+        options are the row's scoring options (see get_scoring_options).
+        per_frame_log prints each frame's SSIM to the log via a metadata filter named after the pass.
+        Returns the graph and the output labels that must be mapped.
+        """
+        log_paths = log_paths or {}
+        options = options or {}
+        stride = options.get("stride", 1)
+        metric_filter = "libvmaf" if metric in LIBVMAF_METRICS else "ssim"
+        
+        prefilter = self.build_video_prefilter(metric, options)
+        chains, input_labels = self.build_input_splits(passes, "v", "split", prefilter)
+        
+        outputs = []
+        for pass_idx, (comparison_type, ref, dist) in enumerate(passes):
+            ref_label = input_labels[ref].pop(0)
+            dist_label = input_labels[dist].pop(0)
+            out_label = f"[vout{pass_idx}]"
+            
+            metric_args = ""
+            if metric in LIBVMAF_METRICS:
+                metric_args = "=log_fmt=json"
+                if metric == "Multi":
+                    metric_args += f":{self.build_multi_metric_args()}"
+                if stride > 1:
+                    metric_args += f":n_subsample={stride}"
+                if self.ffmpeg_capabilities and "n_threads" in self.ffmpeg_capabilities["libvmaf_options"]:
+                    # Rows already run in parallel, so each libvmaf instance gets a share of the cores
+                    metric_args += f":n_threads={max(1, (os.cpu_count() or 1) // self.max_workers)}"
+                if comparison_type in log_paths:
+                    metric_args += f":log_path={self.escape_filter_path(log_paths[comparison_type])}"
+            
+            frame_log = ""
+            if per_frame_log and metric not in LIBVMAF_METRICS:
+                frame_log = f",metadata@{comparison_type}=mode=print:key=lavfi.ssim.All"
+            
+            chains.append(f"{ref_label}{dist_label}{metric_filter}@{comparison_type}{metric_args}{frame_log}{out_label}")
+            outputs.append(out_label)
+        
+        return ";".join(chains), outputs
+    
+    def build_video_prefilter(self, metric, options):
+        """Per-input stages applied once before the split: frame rate, stride, size and format
+        
+        Frame dropping comes first so scaling and conversion only touch frames that get scored.
+        """
+        targets = options.get("video_targets") or {}
+        stride = options.get("stride", 1)
+        stages = []
+        
+        if targets.get("frame_rate"):
+            stages.append(f"fps={targets['frame_rate']}")
+        # libvmaf subsamples internally; SSIM gets every Nth frame from framestep
+        if stride > 1 and metric not in LIBVMAF_METRICS:
+            stages.append(f"framestep={stride}")
+        if targets.get("width") and targets.get("height"):
+            stages.append(f"scale={targets['width']}:{targets['height']}:flags=bicubic")
+        if targets.get("pix_fmt"):
+            stages.append(f"format={targets['pix_fmt']}")
+        if targets:
+            stages.append("setpts=PTS-STARTPTS")
+        
+        return ",".join(stages) or None
+    
+    def plan_video_normalization(self, left_file, right_file, options, row_idx):
+        """Work out the common size, frame rate and pixel format both inputs are converted to
+        
+        Returns a dict with width/height, frame_rate and pix_fmt entries for whatever has to change,
+        or None when the pair can be fed to the metric as is.
+        """
+        if not options.get("normalize") and not options.get("score_height"):
+            return None
+        
+        left = self.get_video_metadata(left_file)
+        right = self.get_video_metadata(right_file)
+        if not left or not right or not all((left.get("width"), left.get("height"), right.get("width"), right.get("height"))):
+            self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Could not probe video geometry, inputs are not normalized"))
+            return None
+        
+        targets = {}
+        notes = []
+        
+        # Common size: the larger input, optionally capped to the reduced scoring resolution
+        larger = max((left, right), key=lambda meta: meta["width"] * meta["height"])
+        width, height = larger["width"], larger["height"]
+        score_height = options.get("score_height")
+        if score_height and height > score_height:
+            width = max(2, int(round(width * score_height / height / 2)) * 2)
+            height = score_height
+            notes.append(f"scoring at {width}x{height}")
+        if (left["width"], left["height"]) != (width, height) or (right["width"], right["height"]) != (width, height):
+            targets["width"], targets["height"] = width, height
+            if not notes:
+                notes.append(f"scaling to {width}x{height}")
+        
+        if options.get("normalize"):
+            # Common frame rate: the lower one, so no frames are invented
+            left_rate, right_rate = left.get("frame_rate"), right.get("frame_rate")
+            if left_rate and right_rate and abs(left_rate - right_rate) > 0.01:
+                slower = left if left_rate < right_rate else right
+                targets["frame_rate"] = slower["frame_rate_text"]
+                notes.append(f"frame rate {slower['frame_rate_text']}")
+            
+            if left.get("pix_fmt") != right.get("pix_fmt") or targets.get("width"):
+                # Bit depth from the format's suffix (yuv420p10le), so yuv410p isn't taken for 10-bit
+                high_depth = all(fmt and re.search(r"p(1[0-6])(le|be)?$", fmt)
+                                 for fmt in (left.get("pix_fmt"), right.get("pix_fmt")))
+                targets["pix_fmt"] = "yuv420p10le" if high_depth else "yuv420p"
+                if left.get("pix_fmt") != right.get("pix_fmt"):
+                    notes.append(f"pixel format {targets['pix_fmt']}")
+        
+        if not targets:
+            return None
+        
+        self.log_queue.put(("INFO", f"Row {row_idx + 1}: Normalizing inputs ({', '.join(notes) or 'format'})"))
+        return targets
+    
+    def escape_filter_path(self, path):
+        """Escape a file path for use as a filter option inside a filter graph"""
+        return self.escape_filter_value(path.replace("\\", "/"))
+    
+    def escape_filter_value(self, value):
+        """Escape a filter option value for use inside a filter graph"""
+        # Option-level escaping, then graph-level escaping of the result
+        for char in ("'", ":"):
+            value = value.replace(char, "\\" + char)
+        value = value.replace("\\", "\\\\")
+        for char in ("'", "[", "]", ",", ";"):
+            value = value.replace(char, "\\" + char)
+        return value
+    
+    def build_multi_metric_args(self):
+        """libvmaf model and feature options that score every multi-metric entry in the same pass"""
+        models = MULTI_METRIC_MODELS
+        if self.ffmpeg_capabilities and self.ffmpeg_capabilities["vmaf_models"]:
+            # Only the models this libvmaf build could load
+            models = self.ffmpeg_capabilities["vmaf_models"]
+        models = "|".join(models)
+        features = "|".join(f"name={feature}" for feature in MULTI_METRIC_FEATURES)
+        return f"model={self.escape_filter_value(models)}:feature={self.escape_filter_value(features)}"
+    
+    def multi_metric_scores(self, stats):
+        """Left/right pooled scores for every multi-metric entry found in the per-direction stats"""
+        if not stats or "left_ref" not in stats:
+            return {}
+        left_pooled = stats["left_ref"].get("pooled", {})
+        right_pooled = stats.get("right_ref", stats["left_ref"]).get("pooled", {})
+        
+        metrics = {}
+        for name, key in MULTI_METRIC_KEYS.items():
+            if key in left_pooled and key in right_pooled:
+                metrics[name] = {"left": left_pooled[key], "right": right_pooled[key]}
+        return metrics
+    
+    def build_audio_filter_graph(self, passes):
+        """Build an apsnr filter graph for the given passes, mirroring build_video_filter_graph"""
+        chains, input_labels = self.build_input_splits(passes, "a", "asplit")
+        
+        outputs = []
+        for pass_idx, (comparison_type, ref, dist) in enumerate(passes):
+            ref_label = input_labels[ref].pop(0)
+            dist_label = input_labels[dist].pop(0)
+            out_label = f"[aout{pass_idx}]"
+            chains.append(f"{ref_label}{dist_label}apsnr@{comparison_type}{out_label}")
+            outputs.append(out_label)
+        
+        return ";".join(chains), outputs
+    
+    def build_input_splits(self, passes, stream_type, split_filter, prefilter=None):
+        """Split each input stream so every pass gets its own copy of the decoded frames
+        
+        prefilter, if given, is applied once per input before the split.
+        """
+        chains = []
+        input_labels = {}
+        for input_idx in sorted({idx for _, ref, dist in passes for idx in (ref, dist)}):
+            uses = sum((ref, dist).count(input_idx) for _, ref, dist in passes)
+            labels = [f"[{stream_type}in{input_idx}_{n}]" for n in range(uses)]
+            source = f"[{input_idx}:{stream_type}]"
+            if uses > 1:
+                stages = ([prefilter] if prefilter else []) + [f"{split_filter}={uses}"]
+                chains.append(f"{source}{','.join(stages)}{''.join(labels)}")
+            elif prefilter:
+                chains.append(f"{source}{prefilter}{labels[0]}")
+            else:
+                labels = [source]
+            input_labels[input_idx] = labels
+        return chains, input_labels
+    
+    def get_scoring_options(self):
+        """Snapshot the settings that change how a row is scored"""
+        try:
+            stride = max(1, int(self.frame_stride.get()))
+        except ValueError:
+            stride = 1
+        return {
+            "stride": stride,
+            "mode": self.scoring_mode.get().lower(),
+            "scene_cuts": bool(self.sample_scene_cuts.get()),
+            "early_stop": bool(self.early_stop.get()),
+            "normalize": bool(self.normalize_inputs.get()),
+            "score_height": SCORE_RESOLUTIONS.get(self.score_resolution.get()),
+            "split_segments": bool(self.split_long_files.get()),
+            "backend": self.metric_backend.get().lower(),
+            "audio_backend": AUDIO_BACKENDS.get(self.audio_backend.get(), ("ffmpeg", False))
+        }
+    
+    def get_progress_total_frames(self, video_path, metric, options=None):
+        """Number of frames the metric output will carry, for sizing progress"""
+        total_frames = self.get_total_frames(video_path) or 0
+        stride = (options or {}).get("stride", 1)
+        targets = (options or {}).get("video_targets") or {}
+        if targets.get("frame_rate"):
+            # fps conversion changes how many frames reach the metric
+            metadata = self.get_video_metadata(video_path) or {}
+            target_rate = self.parse_frame_rate(targets["frame_rate"])
+            if metadata.get("frame_rate") and target_rate:
+                total_frames = int(total_frames * target_rate / metadata["frame_rate"])
+        if metric not in LIBVMAF_METRICS and stride > 1:
+            # framestep drops frames before the metric; libvmaf passes them all through
+            total_frames = (total_frames + stride - 1) // stride
+        return max(1, total_frames)
+    
+    def has_audio_stream(self, file_path):
+        """Check whether a file has at least one audio stream"""
+        metadata = self.get_video_metadata(file_path)
+        if metadata is not None and "has_audio" in metadata:
+            return metadata["has_audio"]
+        
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-select_streams", "a",
+            "-show_entries", "stream=index",
+            "-of", "csv=p=0",
+            file_path
+        ]
+        result = self.run_command(cmd)
+        return result.returncode == 0 and bool(result.stdout.strip())
+    
+    def filter_log_lines(self, output, instance):
+        """Return only the log lines printed by the named filter instance"""
+        prefix = f"[{instance} @"
+        return "\n".join(line for line in output.split('\n') if prefix in line)
+    
+    def run_ffmpeg_process(self, cmd, row_idx, media_type, on_progress=None, on_stderr_line=None, cancel_event=None):
+        """Run an FFmpeg command until it exits, honouring the stop event
+        
+        Progress is read from FFmpeg's machine-readable -progress stream on stdout,
+        so stderr only carries warnings and the filter summaries we parse.
+        Returns (returncode, stderr_output), or None if the run was stopped. If cancel_event
+        ends the job early, returncode is None.
+        """
+        cmd = [cmd[0], "-hide_banner", "-nostats", "-progress", "pipe:1"] + cmd[1:]
+        started = time.monotonic()
+        
+        # Progress blocks are key=value lines terminated by a "progress=continue|end" line
+        block = {}
+        last_progress = {}
+        
+        def read_progress(line):
+            key, sep, value = line.strip().partition("=")
+            if not sep:
+                return
+            block[key] = value
+            if key == "progress":
+                progress = self.parse_progress_block(block)
+                last_progress.update(progress)
+                block.clear()
+                if on_progress:
+                    on_progress(progress)
+        
+        runner = ProcessRunner(
+            cmd,
+            self.row_stop(row_idx),
+            self.get_reactor(),
+            log_path=self.job_log_path(row_idx, media_type),
+            on_stdout_line=read_progress,
+            on_stderr_line=on_stderr_line,
+            cancel_event=cancel_event
+        )
+        returncode = runner.run()
+        if returncode:
+            self.prune_job_logs()
+        elif runner.log_path:
+            self.remove_temp_files([runner.log_path])
+        if returncode is None:
+            if runner.cancelled and not self.row_stop(row_idx).is_set():
+                self.record_throughput(row_idx, media_type, last_progress, time.monotonic() - started)
+                return None, runner.stderr_tail()
+            return None
+        
+        if returncode == 0:
+            self.record_throughput(row_idx, media_type, last_progress, time.monotonic() - started)
+        elif runner.log_path:
+            self.log_queue.put(("DEBUG", f"Row {row_idx + 1}: Full FFmpeg log: {runner.log_path}"))
+        
+        return returncode, runner.stderr_tail()
+    
+    def job_log_path(self, row_idx, media_type):
+        """Path of the on-disk log for one FFmpeg job"""
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        return os.path.join(JOB_LOG_DIR, f"row{row_idx + 1}_{media_type}_{stamp}.log")
+    
+    def prune_job_logs(self):
+        """Delete all but the newest JOB_LOG_KEEP job logs"""
+        try:
+            paths = [os.path.join(JOB_LOG_DIR, name) for name in os.listdir(JOB_LOG_DIR) if name.endswith(".log")]
+            paths.sort(key=os.path.getmtime)
+        except OSError:
+            return
+        self.remove_temp_files(paths[:-JOB_LOG_KEEP])
+    
+    def parse_progress_block(self, block):
+        """Convert one FFmpeg -progress block into frames, out_time (seconds) and speed"""
+        frames = block.get("frame", "")
+        out_time_us = block.get("out_time_us", "")
+        speed = block.get("speed", "").rstrip("x").strip()
+        
+        out_time = None
+        if out_time_us.lstrip("-").isdigit():
+            out_time = max(0, int(out_time_us)) / 1000000.0
+        
+        return {
+            "frames": int(frames) if frames.isdigit() else None,
+            "out_time": out_time,
+            "speed": self.parse_float(speed),
+            "finished": block.get("progress") == "end"
+        }
+    
+    def record_throughput(self, row_idx, media_type, progress, wall_time):
+        """Accumulate per-row throughput figures from a finished FFmpeg process"""
+        row_id = f"row_{row_idx}"
+        with self.progress_lock:
+            stats = self.row_throughput.setdefault(row_id, {}).setdefault(
+                media_type, {"frames": 0, "out_time": 0.0, "wall_time": 0.0}
+            )
+            stats["frames"] += progress.get("frames") or 0
+            stats["out_time"] += progress.get("out_time") or 0.0
+            stats["wall_time"] += wall_time
+        
+        if wall_time > 0:
+            fps = (progress.get("frames") or 0) / wall_time
+            realtime = (progress.get("out_time") or 0.0) / wall_time
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: {media_type} pass took {wall_time:.1f}s "
+                                        f"({fps:.1f} fps, {realtime:.2f}x realtime)"))
+    
+    def summarize_throughput(self, row_id):
+        """Collapse a row's accumulated throughput into fps and x-realtime figures"""
+        with self.progress_lock:
+            row_stats = self.row_throughput.pop(row_id, {})
+        
+        summary = {}
+        for media_type, stats in row_stats.items():
+            if stats["wall_time"] <= 0:
+                continue
+            summary[f"{media_type}_fps"] = stats["frames"] / stats["wall_time"]
+            summary[f"{media_type}_realtime"] = stats["out_time"] / stats["wall_time"]
+            summary[f"{media_type}_seconds"] = stats["wall_time"]
+        return summary
+    
+    def run_bidirectional_video_comparison(self, left_file, right_file, metric, row_idx, details=None, options=None,
+                                           segment=None):
+        """Run both reference directions in one FFmpeg process, decoding each input once
+        
+        segment, if given, is a (start, duration) pair in seconds limiting the run to part of the pair.
+        Returns {"left_ref": score, "right_ref": score}, or None if the run failed or was stopped.
+        """
+        log_paths = {}
+        try:
+            if self.row_stop(row_idx).is_set():
+                return None
+            
+            if self.numpy_backend_active(metric, options):
+                scores = self.run_numpy_video_comparison(left_file, right_file, row_idx, details, options, segment)
+                if scores is not None or self.row_stop(row_idx).is_set():
+                    return scores
+                self.log_queue.put(("WARNING", f"Row {row_idx + 1}: NumPy backend failed, using the FFmpeg ssim filter"))
+            
+            passes = metric_passes(metric)
+            log_paths = self.create_vmaf_log_paths(metric, passes)
+            graph, outputs = self.build_video_filter_graph(metric, passes, log_paths, options)
+            cmd = ["ffmpeg"] + self.input_args(left_file, segment) + self.input_args(right_file, segment) + ["-lavfi", graph]
+            for label in outputs:
+                cmd += ["-map", label]
+            cmd += ["-f", "null", "-"]
+            
+            on_progress = None
+            if segment is None:
+                # Segment callers report their own progress
+                total_frames = self.get_progress_total_frames(left_file, metric, options)
+                on_progress = lambda progress: self.extract_ffmpeg_progress(progress, row_idx, "video", "bidirectional", total_frames)
+            
+            completed = self.run_ffmpeg_process(cmd, row_idx, "video", on_progress=on_progress)
+            if completed is None:
+                return None
+            
+            returncode, stderr_output = completed
+            if returncode != 0:
+                error_msg = stderr_output.strip() if stderr_output else "Unknown FFmpeg error"
+                self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Single-pass video comparison failed: {error_msg}"))
+                return None
+            
+            scores = self.collect_video_scores(stderr_output, metric, passes, log_paths, row_idx, details)
+            return expand_symmetric_scores(scores)
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Single-pass video comparison error: {str(e)}"))
+            return None
+        
+        finally:
+            self.remove_temp_files(log_paths.values())
+    
+    def run_early_stop_video_comparison(self, left_file, right_file, metric, row_idx, options):
+        """Score the pair progressively and stop as soon as a sequential test settles the verdict
+        
+        Returns the usual video result plus an early_stop record of how much of the file was
+        scored, or None if the streaming run failed.
+        """
+        threshold = self.win_threshold(metric)
+        if metric in LIBVMAF_METRICS:
+            return self.run_windowed_early_stop(left_file, right_file, metric, row_idx, options, threshold)
+        return self.run_streaming_early_stop(left_file, right_file, metric, row_idx, options, threshold)
+    
+    def run_streaming_early_stop(self, left_file, right_file, metric, row_idx, options, threshold):
+        """Stream per-frame SSIM for both directions and stop FFmpeg once the verdict is decided"""
+        try:
+            total_frames = self.get_progress_total_frames(left_file, metric, options)
+            monitor = SequentialVerdict(
+                threshold, self.early_stop_confidence,
+                batch_size=self.early_stop_batch_frames,
+                min_coverage=self.early_stop_min_coverage,
+                total=total_frames
+            )
+            decided = Event()
+            
+            passes = metric_passes(metric)
+            graph, outputs = self.build_video_filter_graph(metric, passes, None, options, per_frame_log=True)
+            cmd = ["ffmpeg", "-i", left_file, "-i", right_file, "-lavfi", graph]
+            for label in outputs:
+                cmd += ["-map", label]
+            cmd += ["-f", "null", "-"]
+            
+            # metadata=print logs "frame:N ..." followed by "lavfi.ssim.All=x" for each frame
+            current_frame = {}
+            pending = {}
+            frame_pattern = re.compile(r'\[metadata@(\w+) @ [^\]]*\]\s*(?:frame:(\d+)|lavfi\.ssim\.All=([0-9.]+))')
+            
+            def on_stderr_line(line):
+                match = frame_pattern.search(line)
+                if not match or decided.is_set():
+                    return
+                comparison_type, frame, value = match.groups()
+                if frame is not None:
+                    current_frame[comparison_type] = int(frame)
+                    return
+                frame_scores = pending.setdefault(current_frame.get(comparison_type, -1), {})
+                frame_scores[comparison_type] = float(value)
+                if len(frame_scores) == len(passes):
+                    pending.pop(current_frame.get(comparison_type, -1), None)
+                    monitor.add(frame_scores["left_ref"], frame_scores.get("right_ref", frame_scores["left_ref"]))
+                    if monitor.verdict() is not None:
+                        decided.set()
+            
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Streaming {metric} with early termination "
+                                        f"({self.early_stop_confidence:.0%} confidence)..."))
+            completed = self.run_ffmpeg_process(
+                cmd, row_idx, "video",
+                on_progress=lambda progress: self.extract_ffmpeg_progress(progress, row_idx, "video", "bidirectional", total_frames),
+                on_stderr_line=on_stderr_line,
+                cancel_event=decided
+            )
+            if completed is None:
+                return None
+            
+            returncode, stderr_output = completed
+            if returncode not in (0, None) or monitor.units == 0:
+                error_msg = stderr_output.strip() if stderr_output else "No per-frame scores"
+                self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Streaming {metric} failed: {error_msg}"))
+                return None
+            
+            return self.finish_early_stop(monitor, metric, row_idx, stopped=returncode is None, scored=monitor.units,
+                                          total=total_frames)
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Streaming {metric} error: {str(e)}"))
+            return None
+    
+    def run_windowed_early_stop(self, left_file, right_file, metric, row_idx, options, threshold):
+        """Score consecutive time windows and stop once the verdict is decided
+        
+        libvmaf only reports scores when it finishes, so VMAF is streamed one window at a time.
+        """
+        try:
+            row_id = f"row_{row_idx}"
+            duration = self.get_media_duration(left_file)
+            if not duration:
+                return None
+            
+            window = self.early_stop_window_seconds
+            monitor = SequentialVerdict(
+                threshold, self.early_stop_confidence,
+                min_coverage=self.early_stop_min_coverage,
+                total=duration
+            )
+            
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Scoring {metric} in {window:g}s windows with early termination "
+                                        f"({self.early_stop_confidence:.0%} confidence)..."))
+            covered = 0.0
+            while covered < duration:
+                length = min(window, duration - covered)
+                scores = self.run_bidirectional_video_comparison(
+                    left_file, right_file, metric, row_idx, None, options, segment=(covered, length)
+                )
+                if self.row_stop(row_idx).is_set():
+                    return None
+                if scores is None:
+                    return None
+                
+                covered += length
+                monitor.add(scores["left_ref"], scores["right_ref"], weight=length)
+                self.update_progress(row_id, "video", 10 + int(90 * min(1.0, covered / duration)))
+                if monitor.verdict() is not None:
+                    break
+            
+            return self.finish_early_stop(monitor, metric, row_idx, stopped=covered < duration, scored=covered,
+                                          total=duration)
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Windowed {metric} error: {str(e)}"))
+            return None
+    
+    def finish_early_stop(self, monitor, metric, row_idx, stopped, scored, total):
+        """Turn a sequential monitor into a video result with its coverage record"""
+        coverage = min(1.0, scored / total) if total else 1.0
+        if stopped:
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: {metric} verdict settled after {coverage:.0%} of the file"))
+        
+        result = self.determine_video_winner(monitor.left_mean(), monitor.right_mean(), metric, row_idx)
+        low, high = monitor.interval()
+        result["early_stop"] = {
+            "stopped_early": stopped,
+            "coverage": coverage,
+            "confidence": monitor.confidence,
+            "diff_interval": [low, high]
+        }
+        return result
+    
+    def input_args(self, file_path, segment=None):
+        """FFmpeg input arguments for a file, seeking to a (start, duration) segment if given"""
+        if segment is None:
+            return ["-i", file_path]
+        start, duration = segment
+        return ["-ss", f"{start:.3f}", "-t", f"{duration:.3f}", "-i", file_path]
+    
+    def run_sampled_video_comparison(self, left_file, right_file, metric, row_idx, options):
+        """Score short segments spread across the pair, escalating to a full run if the verdict is uncertain
+        
+        A confidence interval is built on the per-segment (left - right) difference. If it clears the
+        win threshold (or sits inside it) the sampled means decide the row; otherwise the full
+        comparison runs.
+        """
+        try:
+            if self.row_stop(row_idx).is_set():
+                return {"winner": "tie", "left_score": 0, "right_score": 0}
+            
+            row_id = f"row_{row_idx}"
+            threshold = self.win_threshold(metric)
+            segment_count = max(2, self.sample_segment_count)
+            segment_seconds = self.sample_segment_seconds
+            
+            durations = [self.get_media_duration(left_file), self.get_media_duration(right_file)]
+            if None in durations or min(durations) < segment_count * segment_seconds * 2:
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: Too short (or unknown duration) to sample, running full {metric}"))
+                return self.run_video_comparison(left_file, right_file, metric, row_idx, options)
+            
+            starts = self.choose_sample_starts(left_file, min(durations), segment_count, segment_seconds, options, row_idx)
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Sampling {len(starts)} x {segment_seconds:g}s segments for {metric}..."))
+            
+            left_scores = []
+            right_scores = []
+            for k, start in enumerate(starts):
+                self.update_progress(row_id, "video", 10 + int(40 * k / len(starts)))
+                scores = self.run_bidirectional_video_comparison(
+                    left_file, right_file, metric, row_idx, None, options, segment=(start, segment_seconds)
+                )
+                if self.row_stop(row_idx).is_set():
+                    return {"winner": "tie", "left_score": 0, "right_score": 0}
+                if scores is None:
+                    self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Sample at {start:.1f}s failed, running full {metric}"))
+                    return self.run_video_comparison(left_file, right_file, metric, row_idx, options)
+                left_scores.append(scores["left_ref"])
+                right_scores.append(scores["right_ref"])
+            
+            diffs = [left - right for left, right in zip(left_scores, right_scores)]
+            low, high = confidence_interval(diffs, self.sample_confidence)
+            sampling = {
+                "segments": len(starts),
+                "segment_seconds": segment_seconds,
+                "confidence": self.sample_confidence,
+                "diff_mean": statistics.fmean(diffs),
+                "diff_interval": [low, high]
+            }
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Sampled {metric} difference (L-R) {sampling['diff_mean']:+.3f}, "
+                                        f"{self.sample_confidence:.0%} CI [{low:+.3f}, {high:+.3f}]"))
+            
+            if interval_verdict(low, high, threshold) is None:
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: Interval overlaps the +/-{threshold:g} win threshold, "
+                                            f"running full {metric}"))
+                self.update_progress(row_id, "video", 50)
+                result = self.run_video_comparison(left_file, right_file, metric, row_idx, options)
+                sampling["mode"] = "escalated"
+                result["sampling"] = sampling
+                return result
+            
+            self.update_progress(row_id, "video", 100)
+            result = self.determine_video_winner(statistics.fmean(left_scores), statistics.fmean(right_scores), metric, row_idx)
+            sampling["mode"] = "sampled"
+            result["sampling"] = sampling
+            return result
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Sampled video comparison error: {str(e)}"))
+            return failed_comparison(f"sampled video comparison error: {str(e)}")
+    
+    def choose_sample_starts(self, video_path, duration, segment_count, segment_seconds, options, row_idx):
+        """Spread segment start times evenly, snapping each to a nearby scene cut if requested"""
+        span = duration / segment_count
+        latest = max(0.0, duration - segment_seconds)
+        cuts = self.find_scene_cuts(video_path, row_idx) if options.get("scene_cuts") else []
+        
+        starts = []
+        for k in range(segment_count):
+            start = (k + 0.5) * span - segment_seconds / 2
+            nearby = [cut for cut in cuts if start <= cut < start + span / 2]
+            if nearby:
+                start = nearby[0]
+            starts.append(min(max(0.0, start), latest))
+        return starts
+    
+    def find_scene_cuts(self, video_path, row_idx):
+        """Find scene cut times cheaply by decoding only keyframes at low resolution"""
+        cmd = [
+            "ffmpeg", "-skip_frame", "nokey", "-i", video_path, "-an",
+            "-vf", f"scale=160:-2,select='gt(scene,{SCENE_CUT_THRESHOLD})',showinfo",
+            "-f", "null", "-"
+        ]
+        cuts = []
+        
+        def collect_cut(line):
+            if "showinfo" in line:
+                match = re.search(r'pts_time:\s*([0-9.]+)', line)
+                if match:
+                    cuts.append(float(match.group(1)))
+        
+        completed = self.run_ffmpeg_process(cmd, row_idx, "scenes", on_stderr_line=collect_cut)
+        if completed is None or completed[0] != 0:
+            self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Scene detection failed, sampling evenly"))
+            return []
+        return sorted(cuts)
+    
+    def run_fused_row_comparison(self, left_file, right_file, metric, row_idx, options=None):
+        """Run the video metric and audio PSNR, both directions, in one FFmpeg process
+        
+        Each file is opened and demuxed once. Returns (video_result, audio_result) or None on failure.
+        """
+        log_paths = {}
+        try:
+            if self.row_stop(row_idx).is_set():
+                return None
+            
+            passes = metric_passes(metric)
+            audio_passes = metric_passes("APSNR")
+            log_paths = self.create_vmaf_log_paths(metric, passes)
+            graph, outputs = self.build_video_filter_graph(metric, passes, log_paths, options)
+            
+            # Audio is only added when both files have it, so a silent file doesn't fail the video metric
+            include_audio = self.has_audio_stream(left_file) and self.has_audio_stream(right_file)
+            if include_audio:
+                audio_graph, audio_outputs = self.build_audio_filter_graph(audio_passes)
+                graph = f"{graph};{audio_graph}"
+                outputs += audio_outputs
+            else:
+                self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Missing audio stream, fused pass will score video only "
+                                               f"and audio is skipped"))
+            
+            cmd = ["ffmpeg", "-i", left_file, "-i", right_file, "-lavfi", graph]
+            for label in outputs:
+                cmd += ["-map", label]
+            cmd += ["-f", "null", "-"]
+            
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Running fused {metric} + audio PSNR pass..."))
+            self.update_progress(f"row_{row_idx}", "video", 10)
+            total_frames = self.get_progress_total_frames(left_file, metric, options)
+            
+            # Throughput goes under "fused": the pass decodes audio too, so it isn't a video-only figure
+            completed = self.run_ffmpeg_process(
+                cmd, row_idx, "fused",
+                on_progress=lambda progress: self.extract_ffmpeg_progress(progress, row_idx, "video", "bidirectional", total_frames)
+            )
+            if completed is None:
+                return None
+            
+            returncode, stderr_output = completed
+            if returncode != 0:
+                error_msg = stderr_output.strip() if stderr_output else "Unknown FFmpeg error"
+                self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Fused comparison failed: {error_msg}"))
+                return None
+            
+            details = {}
+            video_scores = expand_symmetric_scores(
+                self.collect_video_scores(stderr_output, metric, passes, log_paths, row_idx, details)
+            )
+            if video_scores is None:
+                return None
+            
+            audio_scores = {"left_ref": None, "right_ref": None}
+            if include_audio:
+                for comparison_type, _, _ in audio_passes:
+                    instance_output = self.filter_log_lines(stderr_output, f"apsnr@{comparison_type}")
+                    audio_scores[comparison_type] = self.parse_single_audio_output(instance_output, comparison_type, row_idx)
+                audio_scores["right_ref"] = audio_scores["left_ref"]
+            
+            video_result = self.determine_video_winner(video_scores["left_ref"], video_scores["right_ref"], metric, row_idx)
+            if details:
+                video_result["stats"] = details
+            if not include_audio:
+                return video_result, {"winner": "tie", "left_score": 0, "right_score": 0}
+            # A missing audio score falls through to the loudness fallback, as in the separate audio pass
+            audio_result = self.determine_audio_winner(audio_scores["left_ref"], audio_scores["right_ref"],
+                                                       left_file, right_file, row_idx)
+            return video_result, audio_result
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Fused comparison error: {str(e)}"))
+            return None
+        
+        finally:
+            self.remove_temp_files(log_paths.values())
+    
+    def run_single_video_comparison(self, reference_file, distorted_file, metric, comparison_type, row_idx, details=None, options=None):
+        """Run a single video comparison with specified reference"""
+        log_paths = {}
+        try:
+            if self.row_stop(row_idx).is_set():
+                return None
+            
+            if self.numpy_backend_active(metric, options):
+                scores = self.run_numpy_video_comparison(reference_file, distorted_file, row_idx, details, options)
+                if scores is not None or self.row_stop(row_idx).is_set():
+                    return scores[comparison_type] if scores else None
+                self.log_queue.put(("WARNING", f"Row {row_idx + 1}: NumPy backend failed, using the FFmpeg ssim filter"))
+            
+            passes = [(comparison_type, 0, 1)]
+            log_paths = self.create_vmaf_log_paths(metric, passes)
+            graph, outputs = self.build_video_filter_graph(metric, passes, log_paths, options)
+            cmd = [
+                "ffmpeg", "-i", reference_file, "-i", distorted_file,
+                "-lavfi", graph,
+                "-map", outputs[0],
+                "-f", "null", "-"
+            ]
+            
+            total_frames = self.get_progress_total_frames(reference_file, metric, options)
+
+            # Run process with progress monitoring
+            completed = self.run_ffmpeg_process(
+                cmd, row_idx, "video",
+                on_progress=lambda progress: self.extract_ffmpeg_progress(progress, row_idx, "video", comparison_type, total_frames)
+            )
+            if completed is None:
+                return None
+            
+            returncode, stderr_output = completed
+            if returncode != 0:
+                error_msg = stderr_output.strip() if stderr_output else "Unknown FFmpeg error"
+                self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Video comparison failed ({comparison_type}): {error_msg}"))
+                return None
+            
+            scores = self.collect_video_scores(stderr_output, metric, passes, log_paths, row_idx, details)
+            return scores[comparison_type] if scores else None
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Single video comparison error ({comparison_type}): {str(e)}"))
+            return None
+        
+        finally:
+            self.remove_temp_files(log_paths.values())
+    
+    def numpy_backend_active(self, metric, options):
+        """Whether SSIM should be computed in-process by the NumPy backend"""
+        if metric != "SSIM" or (options or {}).get("backend") != "numpy":
+            return False
+        if np is None:
+            self.log_queue.put(("WARNING", "NumPy is not installed, using the FFmpeg ssim filter"))
+            return False
+        return True
+    
+    def get_reactor(self):
+        """Process reactor shared by every FFmpeg/ffprobe child; budgets come from max_workers and probe_workers"""
+        with self.metric_pool_lock:
+            if self.reactor is None:
+                self.reactor = ProcessReactor(self.max_workers, self.probe_workers)
+            return self.reactor
+    
+    def run_command(self, cmd, timeout=None, heavy=False):
+        """Run a short FFmpeg/ffprobe command on the process reactor; returns a subprocess.CompletedProcess"""
+        return self.get_reactor().run_command(cmd, timeout, heavy)
+    
+    def get_metric_pool(self):
+        """Process pool shared by every row scored with the NumPy backend"""
+        with self.metric_pool_lock:
+            if self.metric_pool is None:
+                self.metric_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self.metric_pool
+    
+    def make_metric_stop_event(self):
+        """Event that NumPy backend worker processes can poll, to abandon a stopped row's chunks"""
+        with self.metric_pool_lock:
+            if self.metric_manager is None:
+                self.metric_manager = multiprocessing.get_context("spawn").Manager()
+            return self.metric_manager.Event()
+    
+    def run_numpy_video_comparison(self, left_file, right_file, row_idx, details=None, options=None, segment=None):
+        """Score luma SSIM and PSNR in worker processes from rawvideo pipes
+        
+        FFmpeg only decodes (and normalizes) each input to gray rawvideo; the pair is split into
+        time chunks that are decoded and scored in parallel. SSIM is symmetric, so one decode
+        gives both directions. Per-frame SSIM and PSNR are stored in details like libvmaf stats.
+        Returns {"left_ref": score, "right_ref": score}, or None if the run failed or was stopped.
+        """
+        futures = []
+        chunk_stop = None
+        try:
+            options = dict(options or {})
+            targets = dict(options.get("video_targets") or {})
+            # Metrics are computed on the luma plane, so the pixel format target is replaced by gray
+            targets.pop("pix_fmt", None)
+            options["video_targets"] = targets
+            
+            sizes = []
+            for path in (left_file, right_file):
+                metadata = self.get_video_metadata(path) or {}
+                sizes.append((targets.get("width") or metadata.get("width"), targets.get("height") or metadata.get("height")))
+            if None in sizes[0] or sizes[0] != sizes[1]:
+                self.log_queue.put(("ERROR", f"Row {row_idx + 1}: NumPy backend needs matching frame sizes, got "
+                                             f"{sizes[0]} and {sizes[1]} (enable normalization)"))
+                return None
+            width, height = sizes[0]
+            
+            if segment is not None:
+                start, duration = segment
+            else:
+                durations = [self.get_media_duration(left_file), self.get_media_duration(right_file)]
+                if None in durations:
+                    return None
+                start, duration = 0.0, min(durations)
+            
+            prefilter = self.build_video_prefilter("SSIM", options)
+            video_filter = f"{prefilter},format=gray" if prefilter else "format=gray"
+            chunk_count = max(1, math.ceil(duration / self.numpy_chunk_seconds))
+            chunk_length = duration / chunk_count
+            
+            # Each chunk's decoder pair holds a process slot until the chunk is done; chunks already
+            # running can't be cancelled, so they poll chunk_stop and kill their decoders when it is set
+            pool = self.get_metric_pool()
+            reactor = self.get_reactor()
+            chunk_stop = self.make_metric_stop_event()
+            for chunk_idx in range(chunk_count):
+                if not reactor.acquire(True, self.row_stop(row_idx)):
+                    return None
+                chunk = (start + chunk_idx * chunk_length, chunk_length)
+                left_cmd, right_cmd = [
+                    ["ffmpeg", "-v", "error"] + self.input_args(path, chunk) +
+                    ["-vf", video_filter, "-f", "rawvideo", "-pix_fmt", "gray", "-"]
+                    for path in (left_file, right_file)
+                ]
+                future = pool.submit(score_rawvideo_chunk, left_cmd, right_cmd, width, height,
+                                     self.numpy_batch_frames, chunk_stop)
+                future.add_done_callback(lambda future: reactor.release())
+                futures.append(future)
+            
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Scoring SSIM with the NumPy backend "
+                                        f"({chunk_count} chunk{'s' if chunk_count != 1 else ''})..."))
+            pending = set(futures)
+            while pending:
+                if self.row_stop(row_idx).is_set():
+                    return None
+                done, pending = concurrent.futures.wait(pending, timeout=0.5)
+                if segment is None and done:
+                    self.update_progress(f"row_{row_idx}", "video", 10 + int(90 * (len(futures) - len(pending)) / len(futures)))
+            
+            per_frame = {"float_ssim": [], "psnr_y": []}
+            for future in futures:
+                chunk_scores = future.result()
+                for name in per_frame:
+                    per_frame[name].extend(chunk_scores[name])
+            
+            ssim_frames = per_frame["float_ssim"]
+            if not ssim_frames:
+                self.log_queue.put(("ERROR", f"Row {row_idx + 1}: NumPy backend decoded no frames"))
+                return None
+            
+            ordered = sorted(ssim_frames)
+            mean = sum(ssim_frames) / len(ssim_frames)
+            stats = {
+                "mean": mean,
+                "min": ordered[0],
+                "max": ordered[-1],
+                "p1": ordered[min(len(ordered) - 1, int(0.01 * len(ordered)))],
+                "p5": ordered[min(len(ordered) - 1, int(0.05 * len(ordered)))],
+                "p50": ordered[len(ordered) // 2],
+                "frames": len(ssim_frames),
+                "pooled": {name: sum(values) / len(values) for name, values in per_frame.items()},
+                "per_frame": per_frame
+            }
+            if details is not None:
+                details["left_ref"] = stats
+                details["right_ref"] = stats
+            
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: SSIM score (luma, NumPy): {mean:.4f}, "
+                                        f"PSNR {stats['pooled']['psnr_y']:.2f} dB over {len(ssim_frames)} frames"))
+            return {"left_ref": mean, "right_ref": mean}
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: NumPy backend error: {str(e)}"))
+            return None
+        
+        finally:
+            for future in futures:
+                future.cancel()
+            if chunk_stop is not None:
+                chunk_stop.set()
+    
+    def create_vmaf_log_paths(self, metric, passes):
+        """Create one temporary libvmaf JSON log file per pass"""
+        if metric not in LIBVMAF_METRICS:
+            return {}
+        
+        log_paths = {}
+        for comparison_type, _, _ in passes:
+            fd, path = tempfile.mkstemp(prefix=f"vmaf_{comparison_type}_", suffix=".json")
+            os.close(fd)
+            log_paths[comparison_type] = path
+        return log_paths
+    
+    def remove_temp_files(self, paths):
+        """Delete temporary files, ignoring ones that are already gone"""
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def collect_video_scores(self, stderr_output, metric, passes, log_paths, row_idx, details=None):
+        """Collect per-pass scores from libvmaf JSON logs, or from the filter log lines
+        
+        Extended VMAF statistics are stored in details[comparison_type] when a dict is passed.
+        Returns {comparison_type: score}, or None if any pass has no score.
+        """
+        metric_filter = "libvmaf" if metric in LIBVMAF_METRICS else "ssim"
+        scores = {}
+        for comparison_type, _, _ in passes:
+            stats = self.load_vmaf_log(log_paths[comparison_type], row_idx) if comparison_type in log_paths else None
+            if stats is not None:
+                scores[comparison_type] = stats["mean"]
+                if details is not None:
+                    details[comparison_type] = stats
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: VMAF score ({comparison_type}): {stats['mean']:.2f} "
+                                            f"(harmonic {stats['harmonic_mean']:.2f}, min {stats['min']:.2f}, "
+                                            f"1% low {stats['p1']:.2f})"))
+                continue
+            
+            instance_output = self.filter_log_lines(stderr_output, f"{metric_filter}@{comparison_type}")
+            scores[comparison_type] = self.parse_single_video_output(instance_output, metric, comparison_type, row_idx)
+            if scores[comparison_type] is None:
+                return None
+        
+        return scores
+    
+    def extract_ffmpeg_progress(self, progress, row_idx, media_type, comparison_type, total_frames):
+        """Update the row progress bar from an FFmpeg -progress block"""
+        try:
+            curr_frame = progress.get("frames") or 0
+            if curr_frame > 0:
+                if comparison_type == "bidirectional":
+                    base_progress, span = 10, 90
+                else:
+                    base_progress, span = (10 if comparison_type == "left_ref" else 55), 45
+                additional_progress = int(min(1, (curr_frame/total_frames))*span)
+                
+                if media_type == "video":
+                    self.update_progress(f"row_{row_idx}", "video", base_progress + additional_progress)
+        
+        except:
+            pass  # Ignore malformed progress blocks
+    
+    def run_audio_comparison(self, left_file, right_file, row_idx, options=None):
+        """Run audio quality comparison using FFmpeg PSNR analysis
+        
+        PSNR is symmetric, so a single pass with left as reference scores both directions.
+        """
+        try:
+            if self.row_stop(row_idx).is_set():
+                return {"winner": "tie", "left_score": 0, "right_score": 0}
+            
+            # Known from the pre-flight probe; neither PSNR nor the loudness fallback can work without audio
+            if not (self.has_audio_stream(left_file) and self.has_audio_stream(right_file)):
+                self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Missing audio stream, skipping audio comparison"))
+                return {"winner": "tie", "left_score": 0, "right_score": 0, "measure": "none"}
+            
+            backend, fast = (options or {}).get("audio_backend", ("ffmpeg", False))
+            if backend == "numpy":
+                if np is None:
+                    self.log_queue.put(("WARNING", "NumPy is not installed, using the FFmpeg apsnr filter"))
+                else:
+                    result = self.run_numpy_audio_comparison(left_file, right_file, row_idx, fast)
+                    if result is not None or self.row_stop(row_idx).is_set():
+                        return result or {"winner": "tie", "left_score": 0, "right_score": 0}
+                    self.log_queue.put(("WARNING", f"Row {row_idx + 1}: NumPy audio backend failed, using the FFmpeg apsnr filter"))
+            
+            if not self.has_filter("apsnr"):
+                return self.run_audio_analysis_fallback(left_file, right_file, row_idx)
+            
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Running audio PSNR (symmetric, single pass)..."))
+            self.update_progress(f"row_{row_idx}", "audio", 25)
+            left_as_ref_score = self.run_single_audio_comparison(left_file, right_file, "left_ref", row_idx)
+            if self.row_stop(row_idx).is_set():
+                return {"winner": "tie", "left_score": 0, "right_score": 0}
+            
+            self.update_progress(f"row_{row_idx}", "audio", 75)
+            
+            # Determine winner based on both scores
+            return self.determine_audio_winner(left_as_ref_score, left_as_ref_score, left_file, right_file, row_idx)
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Audio comparison error: {str(e)}"))
+            return failed_comparison(f"audio comparison error: {str(e)}")
+    
+    def run_numpy_audio_comparison(self, left_file, right_file, row_idx, fast=False):
+        """Score audio from one PCM decode per file with per-channel PSNR, segmental SNR and LSD
+        
+        Both files are decoded to float PCM at a common rate and channel count; fast mode downmixes
+        to mono and decimates first. The verdict uses the channel-averaged PSNR like the FFmpeg
+        backend, and the full per-channel scores are kept in the result's stats.
+        Returns a winner dict, or None if the run failed or was stopped.
+        """
+        try:
+            formats = [self.probe_audio_format(path) for path in (left_file, right_file)]
+            if None in formats:
+                self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Missing audio stream, skipping NumPy audio backend"))
+                return None
+            
+            if fast:
+                sample_rate, channels = min(self.audio_fast_sample_rate, *(f["sample_rate"] for f in formats)), 1
+            else:
+                sample_rate = min(f["sample_rate"] for f in formats)
+                channels = min(f["channels"] for f in formats)
+            
+            left_cmd, right_cmd = [
+                ["ffmpeg", "-v", "error", "-i", path, "-map", "0:a:0", "-ac", str(channels), "-ar", str(sample_rate),
+                 "-f", "f32le", "-acodec", "pcm_f32le", "-"]
+                for path in (left_file, right_file)
+            ]
+            
+            duration = min(self.get_media_duration(left_file) or 0, self.get_media_duration(right_file) or 0)
+            total_samples = max(1, int(duration * sample_rate))
+            on_chunk = lambda samples: self.update_progress(f"row_{row_idx}", "audio", 10 + int(min(1, samples / total_samples) * 80))
+            
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Scoring audio with the NumPy backend "
+                                        f"({channels} ch @ {sample_rate} Hz{', fast' if fast else ''})..."))
+            reactor = self.get_reactor()
+            if not reactor.acquire(True, self.row_stop(row_idx)):
+                return None
+            try:
+                scores = score_pcm_streams(left_cmd, right_cmd, channels, self.audio_frame_samples,
+                                           self.audio_frames_per_chunk, self.row_stop(row_idx), on_chunk)
+            finally:
+                reactor.release()
+            if scores is None:
+                return None
+            
+            psnr = sum(scores["psnr"]) / len(scores["psnr"])
+            channel_text = ", ".join(f"ch{idx}: {value:.2f}" for idx, value in enumerate(scores["psnr"]))
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Audio PSNR per channel (dB): {channel_text}"))
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Segmental SNR left/right as reference: "
+                                        f"{statistics.mean(scores['segmental_snr']['left_ref']):.2f} / "
+                                        f"{statistics.mean(scores['segmental_snr']['right_ref']):.2f} dB, "
+                                        f"LSD {statistics.mean(scores['lsd']):.2f} dB"))
+            
+            result = self.determine_audio_winner(psnr, psnr, left_file, right_file, row_idx)
+            scores["sample_rate"] = sample_rate
+            result["stats"] = scores
+            return result
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: NumPy audio backend error: {str(e)}"))
+            return None
+    
+    def probe_audio_format(self, file_path):
+        """Sample rate and channel count of the first audio stream, or None if there is none"""
+        metadata = self.get_video_metadata(file_path)
+        if metadata is not None and "has_audio" in metadata:
+            if not metadata["has_audio"] or not metadata["audio_sample_rate"] or not metadata["audio_channels"]:
+                return None
+            return {"sample_rate": metadata["audio_sample_rate"], "channels": metadata["audio_channels"]}
+        
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-select_streams", "a:0",
+            "-show_entries", "stream=sample_rate,channels",
+            "-of", "json",
+            file_path
+        ]
+        result = self.run_command(cmd)
+        if result.returncode != 0:
+            return None
+        
+        try:
+            streams = json.loads(result.stdout or "{}").get("streams") or []
+        except ValueError:
+            return None
+        if not streams:
+            return None
+        
+        sample_rate = int(self.parse_float(streams[0].get("sample_rate")) or 0)
+        channels = int(streams[0].get("channels") or 0)
+        if sample_rate <= 0 or channels <= 0:
+            return None
+        return {"sample_rate": sample_rate, "channels": channels}
+    
+    def run_single_audio_comparison(self, reference_file, distorted_file, comparison_type, row_idx):
+        """Run a single audio PSNR comparison with specified reference"""
+        try:
+            if self.row_stop(row_idx).is_set():
+                return None
+            
+            cmd = [
+                "ffmpeg", "-i", reference_file, "-i", distorted_file,
+                "-lavfi", "[0:a][1:a]apsnr",
+                "-f", "null", "-"
+            ]
+            
+            # Run process with progress monitoring
+            completed = self.run_ffmpeg_process(cmd, row_idx, "audio")
+            if completed is None:
+                return None
+            
+            returncode, stderr_output = completed
+            if returncode != 0:
+                error_msg = stderr_output.strip() if stderr_output else "Unknown FFmpeg error"
+                self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Audio PSNR failed ({comparison_type}): {error_msg}"))
+                return None
+            
+            return self.parse_single_audio_output(stderr_output, comparison_type, row_idx)
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Single audio comparison error ({comparison_type}): {str(e)}"))
+            return None
+    
+    def determine_video_winner(self, left_as_ref_score, right_as_ref_score, metric, row_idx):
+        """Determine video quality winner based on bidirectional comparison"""
+        try:
+            if left_as_ref_score is None or right_as_ref_score is None:
+                return failed_comparison("video scoring failed, see the log")
+            
+            if metric in LIBVMAF_METRICS:
+                # For VMAF (the primary verdict in multi-metric mode), higher score means better quality
+                # left_as_ref_score: how good right looks compared to left
+                # right_as_ref_score: how good left looks compared to right
+                
+                # If right scores high when left is reference, right is close to left quality
+                # If left scores high when right is reference, left is close to right quality
+                # The one with higher "when used as distorted" score is likely better
+                
+                left_quality = left_as_ref_score
+                right_quality = right_as_ref_score
+                
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: VMAF results - Left quality: {left_quality:.2f}, Right quality: {right_quality:.2f}"))
+                
+                if abs(left_quality - right_quality) < self.vmaf_win_threshold:  # Very close scores
+                    winner = "tie"
+                elif left_quality > right_quality:
+                    winner = "left"
+                else:
+                    winner = "right"
+                
+                return {
+                    "winner": winner,
+                    "left_score": left_quality,
+                    "right_score": right_quality
+                }
+            
+            else:  # SSIM
+                # For SSIM, higher score (closer to 1.0) means better similarity/quality
+                left_quality = left_as_ref_score
+                right_quality = right_as_ref_score
+                
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: SSIM results - Left quality: {left_quality:.4f}, Right quality: {right_quality:.4f}"))
+                
+                if abs(left_quality - right_quality) < self.ssim_win_threshold:  # Very close scores
+                    winner = "tie"
+                elif left_quality > right_quality:
+                    winner = "left"
+                else:
+                    winner = "right"
+                
+                return {
+                    "winner": winner,
+                    "left_score": left_quality,
+                    "right_score": right_quality
+                }
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Error determining video winner: {str(e)}"))
+            return failed_comparison(f"video scoring error: {str(e)}")
+    
+    def determine_audio_winner(self, left_as_ref_score, right_as_ref_score, left_file, right_file, row_idx):
+        """Determine audio quality winner based on bidirectional PSNR comparison
+        
+        If PSNR failed, the pair's files are compared by loudness instead (see run_audio_analysis_fallback).
+        """
+        try:
+            if left_as_ref_score is None or right_as_ref_score is None:
+                # Fallback to individual audio analysis if PSNR fails
+                return self.run_audio_analysis_fallback(left_file, right_file, row_idx)
+            
+            # For PSNR, higher score means better quality
+            # left_as_ref_score: how good right sounds compared to left
+            # right_as_ref_score: how good left sounds compared to right
+            
+            left_quality = left_as_ref_score
+            right_quality = right_as_ref_score
+            
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Audio PSNR results - Left quality: {left_quality:.2f} dB, Right quality: {right_quality:.2f} dB"))
+            
+            if abs(left_quality - right_quality) < self.psnr_win_threshold:
+                winner = "tie"
+            elif left_quality > right_quality:
+                winner = "left"
+            else:
+                winner = "right"
+            
+            return {
+                "winner": winner,
+                "left_score": left_quality,
+                "right_score": right_quality
+            }
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Error determining audio winner: {str(e)}"))
+            return failed_comparison(f"audio scoring error: {str(e)}")
+    
+    def run_audio_analysis_fallback(self, left_file, right_file, row_idx):
+        """Fallback audio analysis using EBU R128"""
+        try:
+            if self.row_stop(row_idx).is_set():
+                return {"winner": "tie", "left_score": 0, "right_score": 0}
+            
+            # Both files measured together (or served from the cache)
+            left_measure, right_measure = self.get_audio_loudness_pair(left_file, right_file, row_idx)
+            if self.row_stop(row_idx).is_set():
+                return {"winner": "tie", "left_score": 0, "right_score": 0}
+            
+            if left_measure is None or right_measure is None:
+                return failed_comparison("audio loudness measurement failed, see the log")
+            left_loudness = left_measure["integrated"]
+            right_loudness = right_measure["integrated"]
+            
+            # Higher (less negative) loudness is generally better for most content
+            winner = score_verdict(left_loudness, right_loudness, self.loudness_win_threshold)
+            
+            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Audio loudness - Left: {left_loudness:.1f} LUFS, Right: {right_loudness:.1f} LUFS"))
+            if left_measure.get("true_peak") is not None and right_measure.get("true_peak") is not None:
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: True peak - Left: {left_measure['true_peak']:.1f} dBTP, "
+                                            f"Right: {right_measure['true_peak']:.1f} dBTP"))
+            
+            return {
+                "winner": winner,
+                "left_score": left_loudness,
+                "right_score": right_loudness,
+                "measure": "loudness"
+            }
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Audio analysis fallback error: {str(e)}"))
+            return failed_comparison(f"audio loudness error: {str(e)}")
+    
+    def get_audio_loudness(self, file_path, row_idx):
+        """Get integrated audio loudness using EBU R128"""
+        measure = self.get_audio_loudness_pair(file_path, None, row_idx)[0]
+        return measure["integrated"] if measure else None
+    
+    def get_audio_loudness_pair(self, left_file, right_file, row_idx):
+        """EBU R128 integrated loudness and true peak for up to two files
+        
+        Cached measurements are keyed by content fingerprint, so a master shared by many rows
+        is measured once. Files still missing are measured in one FFmpeg run with an ebur128
+        chain per input. right_file may be None. Returns [left_measure, right_measure], where
+        each is {"integrated", "true_peak"} or None.
+        """
+        files = [left_file, right_file]
+        measures = [None, None]
+        keys = [None, None]
+        missing = []
+        for idx, path in enumerate(files):
+            if path is None:
+                continue
+            keys[idx] = self.get_file_fingerprint(path)
+            if keys[idx] is None:
+                continue
+            measures[idx] = self.loudness_cache.get(keys[idx])
+            if measures[idx] is None:
+                missing.append(idx)
+        
+        if missing and not self.row_stop(row_idx).is_set():
+            measured = self.measure_loudness([files[idx] for idx in missing], row_idx)
+            for idx, measure in zip(missing, measured):
+                if measure is not None:
+                    measures[idx] = measure
+                    self.loudness_cache.set(keys[idx], measure)
+        
+        return measures
+    
+    def measure_loudness(self, file_paths, row_idx):
+        """Run EBU R128 on every file in one FFmpeg process; returns a measure (or None) per file"""
+        try:
+            cmd = ["ffmpeg"]
+            chains = []
+            for idx, path in enumerate(file_paths):
+                cmd += ["-i", path]
+                # Per-frame lines go to the verbose level so only the summaries reach the log
+                chains.append(f"[{idx}:a:0]ebur128@in{idx}=peak=true:framelog=verbose[aout{idx}]")
+            cmd += ["-filter_complex", ";".join(chains)]
+            for idx in range(len(file_paths)):
+                cmd += ["-map", f"[aout{idx}]"]
+            cmd += ["-f", "null", "-"]
+            
+            completed = self.run_ffmpeg_process(cmd, row_idx, "loudness")
+            if completed is None:
+                return [None] * len(file_paths)
+            
+            returncode, stderr_output = completed
+            if returncode != 0:
+                error_msg = stderr_output.strip() if stderr_output else "Unknown FFmpeg error"
+                self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Loudness measurement failed: {error_msg}"))
+                return [None] * len(file_paths)
+            
+            return [self.parse_loudness_summary(stderr_output, f"ebur128@in{idx}") for idx in range(len(file_paths))]
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Loudness measurement error: {str(e)}"))
+            return [None] * len(file_paths)
+    
+    def parse_loudness_summary(self, output, instance):
+        """Parse the multi-line ebur128 summary printed by the named filter instance
+        
+        Only the "Summary:" line carries the instance prefix; the values follow on unprefixed lines.
+        """
+        lines = output.splitlines()
+        for start, line in enumerate(lines):
+            if instance in line and "Summary:" in line:
+                break
+        else:
+            return None
+        
+        block = []
+        for line in lines[start + 1:]:
+            if line.startswith("["):
+                break
+            block.append(line)
+        block = "\n".join(block)
+        
+        integrated = re.search(r'Integrated loudness:\s*I:\s*(-?[0-9.]+|-inf)\s*LUFS', block)
+        if not integrated or integrated.group(1) == "-inf":
+            return None
+        true_peak = re.search(r'True peak:\s*Peak:\s*(-?[0-9.]+|-inf)\s*dBFS', block)
+        return {
+            "integrated": float(integrated.group(1)),
+            "true_peak": float(true_peak.group(1)) if true_peak and true_peak.group(1) != "-inf" else None
+        }
+    
+    def parse_single_video_output(self, output, metric, comparison_type, row_idx):
+        """Parse single video comparison output"""
+        try:
+            if metric in LIBVMAF_METRICS:
+                return self.parse_single_vmaf_output(output, comparison_type, row_idx)
+            else:  # SSIM
+                return self.parse_single_ssim_output(output, comparison_type, row_idx)
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Failed to parse {metric} output ({comparison_type}): {str(e)}"))
+            return None
+    
+    def load_vmaf_log(self, log_path, row_idx):
+        """Load pooled and per-frame VMAF metrics from a libvmaf JSON log in a single pass
+        
+        Returns a dict with mean, harmonic_mean, min, max, p1, p5, p50, frame count, the pooled
+        mean and per-frame array of every metric in the log, or None if the log is missing or empty.
+        """
+        try:
+            if not os.path.exists(log_path) or os.path.getsize(log_path) == 0:
+                return None
+            with open(log_path, "r", encoding="utf-8") as f:
+                log = json.load(f)
+        except (OSError, ValueError) as e:
+            self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Could not read VMAF log {log_path}: {str(e)}"))
+            return None
+        
+        per_frame = {}
+        for frame in log.get("frames", []):
+            for name, value in frame.get("metrics", {}).items():
+                per_frame.setdefault(name, []).append(value)
+        
+        vmaf_frames = per_frame.get("vmaf", [])
+        pooled = log.get("pooled_metrics", {}).get("vmaf", {})
+        mean = pooled.get("mean")
+        if mean is None:
+            # libvmaf 1.x logs
+            mean = log.get("VMAF score", log.get("aggregate", {}).get("VMAF_score"))
+        if mean is None and vmaf_frames:
+            mean = sum(vmaf_frames) / len(vmaf_frames)
+        if mean is None:
+            return None
+        
+        ordered = sorted(vmaf_frames)
+        
+        def percentile(fraction):
+            if not ordered:
+                return mean
+            return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+        
+        # Pooled means of every model and feature (multi-metric runs log several)
+        pooled_means = {name: float(sum(values) / len(values)) for name, values in per_frame.items() if values}
+        for name, values in log.get("pooled_metrics", {}).items():
+            if isinstance(values, dict) and values.get("mean") is not None:
+                pooled_means[name] = float(values["mean"])
+        
+        harmonic_mean = pooled.get("harmonic_mean")
+        if harmonic_mean is None and vmaf_frames:
+            harmonic_mean = len(vmaf_frames) / sum(1.0 / (value + 1.0) for value in vmaf_frames) - 1.0
+        
+        return {
+            "mean": float(mean),
+            "harmonic_mean": float(harmonic_mean if harmonic_mean is not None else mean),
+            "min": float(pooled.get("min", ordered[0] if ordered else mean)),
+            "max": float(pooled.get("max", ordered[-1] if ordered else mean)),
+            "p1": float(percentile(0.01)),
+            "p5": float(percentile(0.05)),
+            "p50": float(percentile(0.50)),
+            "frames": len(vmaf_frames),
+            "pooled": pooled_means,
+            "per_frame": per_frame
+        }
+    
+    def parse_single_vmaf_output(self, output, comparison_type, row_idx):
+        """Parse the VMAF score printed by libvmaf (used when no JSON log is available)"""
+        try:
+            # Look for VMAF score in the output
+            vmaf_match = re.search(r'VMAF score:\s*([0-9.]+)', output)
+            if vmaf_match:
+                score = float(vmaf_match.group(1))
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: VMAF score ({comparison_type}): {score:.2f}"))
+                return score
+            
+            self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Could not parse VMAF score from output ({comparison_type})"))
+            return None
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Error parsing VMAF output ({comparison_type}): {str(e)}"))
+            return None
+    
+    def parse_single_ssim_output(self, output, comparison_type, row_idx):
+        """Parse single SSIM output"""
+        try:
+            # Look for SSIM mean/average values in the stats output
+            # SSIM stats typically show: n:1 Y:0.123456 U:0.234567 V:0.345678 All:0.456789 (12.345678)
+            ssim_match = re.search(r'All:([0-9.]+)', output)
+            if ssim_match:
+                score = float(ssim_match.group(1))
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: SSIM score ({comparison_type}): {score:.4f}"))
+                return score
+            
+            # Alternative parsing - look for SSIM values in different formats
+            # Sometimes appears as "SSIM Y:x.xxx U:x.xxx V:x.xxx All:x.xxx"
+            ssim_all_match = re.search(r'SSIM.*?All:([0-9.]+)', output)
+            if ssim_all_match:
+                score = float(ssim_all_match.group(1))
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: SSIM score ({comparison_type}): {score:.4f}"))
+                return score
+            
+            # Look for the last line that contains SSIM stats
+            lines = output.strip().split('\n')
+            for line in reversed(lines):
+                if 'All:' in line and ('Y:' in line or 'SSIM' in line):
+                    all_match = re.search(r'All:([0-9.]+)', line)
+                    if all_match:
+                        score = float(all_match.group(1))
+                        self.log_queue.put(("INFO", f"Row {row_idx + 1}: SSIM score ({comparison_type}): {score:.4f}"))
+                        return score
+            
+            # If no "All:" found, try to get Y channel value as fallback
+            y_match = re.search(r'Y:([0-9.]+)', output)
+            if y_match:
+                score = float(y_match.group(1))
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: SSIM Y-channel score ({comparison_type}): {score:.4f}"))
+                return score
+            
+            self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Could not parse SSIM score from output ({comparison_type})"))
+            self.log_queue.put(("DEBUG", f"Row {row_idx + 1}: SSIM output sample: {output[-200:]}"))  # Log last 200 chars for debugging
+            return None
+        
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Error parsing SSIM output ({comparison_type}): {str(e)}"))
+            return None
+    
+    def parse_single_audio_output(self, output, comparison_type, row_idx):
+        try:
+            # apsnr reports every channel; average them instead of scoring the first one only
+            channel_matches = re.findall(r'PSNR\s+ch\d+:\s*([0-9.]+|inf)', output)
+            if channel_matches:
+                values = [100.0 if value == "inf" else float(value) for value in channel_matches]
+                score = sum(values) / len(values)
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: Audio PSNR score ({comparison_type}): {score:.2f} dB "
+                                            f"(mean of {len(values)} channel{'s' if len(values) != 1 else ''})"))
+                return score
+
+            psnr_matches = re.findall(r'([0-9.]+)\s*dB', output)
+            if psnr_matches:
+                score = float(psnr_matches[-1])
+                self.log_queue.put(("INFO", f"Row {row_idx + 1}: Audio PSNR score ({comparison_type}): {score:.2f} dB"))
+                return score
+
+            self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Could not parse audio PSNR score from output ({comparison_type})"))
+            return None
+
+        except Exception as e:
+            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Error parsing audio PSNR output ({comparison_type}): {str(e)}"))
+            return None
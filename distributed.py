@@ -0,0 +1,572 @@
+"""
+Distributed Batch Comparison
+A coordinator holds a batch's row queue and results and leases rows over TCP to worker processes
+on any host; each worker scores its rows with a local comparison engine and pushes the results back.
+Leases lapse when a worker's heartbeats stop, and rows running far longer than usual are re-run
+on an idle worker, keeping whichever copy finishes first.
+"""
+
+import hmac
+import ipaddress
+import json
+import socket
+import socketserver
+import statistics
+import threading
+import time
+import uuid
+from collections import deque
+from threading import Lock, Event
+
+from comparison_engine import ComparisonFailed
+
+# Seconds between worker heartbeats, and without one before a worker's leases lapse
+HEARTBEAT_INTERVAL = 5.0
+LEASE_SECONDS = 30.0
+
+# A row is copied to an idle worker once it has run this many times the median row time (after
+# enough rows have finished to know it), with at most this many copies in flight
+STRAGGLER_FACTOR = 2.0
+STRAGGLER_MIN_SAMPLES = 3
+MAX_ROW_COPIES = 2
+
+# Rows whose leases lapse this many times (their workers keep dying) are failed rather than requeued
+MAX_LEASE_EXPIRIES = 3
+
+# Seconds an idle worker waits before asking for a row again
+IDLE_POLL_SECONDS = 1.0
+
+# Engine settings every worker must score with as the coordinator set them; resolve_backends() would
+# otherwise swap them for what the worker's FFmpeg supports and mix metrics within one batch
+SCORED_SETTINGS = ("current_metric", "metric_backend", "audio_backend")
+
+
+def parse_address(address, default_host):
+    """(host, port) from "host:port" or a bare port"""
+    host, sep, port = address.rpartition(":")
+    return (host if sep and host else default_host), int(port)
+
+
+def is_loopback(host):
+    """True for a host name or address that only accepts connections from this machine"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class CoordinatorError(Exception):
+    """Raised on a worker when the coordinator rejects it (a wrong token, or a request it doesn't know)"""
+
+
+class Lease:
+    """One worker's claim on a row; it lapses unless the worker's heartbeats keep renewing it"""
+    
+    def __init__(self, row_idx, worker, lease_seconds):
+        self.lease_id = uuid.uuid4().hex
+        self.row_idx = row_idx
+        self.worker = worker
+        self.started = time.monotonic()
+        self.expires = self.started + lease_seconds
+        self.revoked = False  # the row settled elsewhere or was cancelled; the worker is told to stop
+
+
+class CoordinatorServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class CoordinatorHandler(socketserver.StreamRequestHandler):
+    """One worker connection: newline-delimited JSON requests, each answered by one JSON line"""
+    
+    timeout = LEASE_SECONDS * 2  # a worker that vanished without closing the socket
+    
+    def handle(self):
+        coordinator = self.server.coordinator
+        worker = None
+        try:
+            for line in self.rfile:
+                try:
+                    reply, worker = coordinator.handle_request(worker, json.loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    reply = {"error": f"bad request: {e}"}
+                self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+                self.wfile.flush()
+        except OSError:
+            pass  # Its leases lapse unless it reconnects
+
+
+class Coordinator:
+    """Leases a batch's rows to remote workers and settles the engine's jobs with their results
+    
+    submit() returns the same ComparisonBatch as ComparisonEngine.submit, so callers read futures
+    and events the same way, and outcomes are journaled by the engine. Workers receive the engine's
+    scoring settings when they connect and must see the files at the same paths (shared storage).
+    """
+    
+    def __init__(self, engine, address, token=None):
+        self.engine = engine
+        self.token = token
+        self.heartbeat_interval = HEARTBEAT_INTERVAL
+        self.lease_seconds = LEASE_SECONDS
+        self.straggler_factor = STRAGGLER_FACTOR
+        self.lock = Lock()
+        self.batch = None
+        self.jobs = {}  # row index -> ComparisonJob of the current batch
+        self.pending = deque()  # row indexes waiting for a worker
+        self.leases = {}  # lease id -> Lease
+        self.expiries = {}  # row index -> leases lost to expiry
+        self.row_times = []  # seconds taken by finished rows, for spotting stragglers
+        self.workers = {}  # worker id -> host
+        self.dismissed = set()  # workers told the batch is done
+        
+        self.server = CoordinatorServer(address, CoordinatorHandler)
+        self.server.coordinator = self
+        self.address = self.server.server_address
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="coordinator").start()
+    
+    def submit(self, pairs, rows=None, resume=False):
+        """Queue pairs for the workers; returns the batch, as ComparisonEngine.submit does"""
+        with self.lock:
+            if self.batch is not None and not self.batch.finished.is_set():
+                raise RuntimeError("The coordinator is already running a batch")
+            self.batch = self.engine.submit(pairs, rows, resume, runner=self.run_batch)
+            return self.batch
+    
+    def close(self, grace=None):
+        """Stop serving, after giving connected workers up to grace seconds to hear that the batch is done"""
+        deadline = time.monotonic() + (self.heartbeat_interval * 2 if grace is None else grace)
+        while time.monotonic() < deadline:
+            with self.lock:
+                if set(self.workers) <= self.dismissed:
+                    break
+            time.sleep(0.1)
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def log(self, level, message):
+        self.engine.log_queue.put((level, message))
+    
+    def run_batch(self, batch, resume=False):
+        """Runner thread for the engine: keeps leases fresh until every job has settled or the batch is stopped"""
+        completed = False
+        try:
+            self.engine.begin_batch_journal(batch, resume)
+            with self.lock:
+                self.jobs = {job.row_idx: job for job in batch.jobs}
+                self.pending = deque(self.jobs)
+                self.leases.clear()
+                self.expiries.clear()
+                self.row_times.clear()
+                self.dismissed.clear()
+            host, port = self.address[:2]
+            self.log("INFO", f"Coordinator: {len(batch.jobs)} rows queued for workers on {host}:{port}")
+            
+            while not self.engine.stop_event.wait(0.5):
+                with self.lock:
+                    self.expire_leases()
+                    self.revoke_cancelled()
+                    if all(job.settled for job in batch.jobs):
+                        break
+            completed = not self.engine.stop_event.is_set()
+        
+        except Exception as e:
+            self.log("ERROR", f"Coordinator failed: {str(e)}")
+        
+        finally:
+            # Workers still holding leases are told to stop at their next heartbeat
+            with self.lock:
+                for lease in self.leases.values():
+                    lease.revoked = True
+                self.pending.clear()
+            self.engine.close_batch(batch, completed)
+    
+    def handle_request(self, worker, request):
+        """Answer one worker request; returns the reply and the connection's worker id"""
+        op = request["op"]
+        if op == "hello":
+            token = str(request.get("token") or "").encode("utf-8")
+            if self.token and not hmac.compare_digest(token, self.token.encode("utf-8")):
+                return {"error": "The coordinator rejected this worker's token"}, None
+            host = str(request.get("host", "?"))
+            worker = request.get("worker") or f"{host}-{uuid.uuid4().hex[:6]}"
+            with self.lock:
+                rejoined = worker in self.workers
+                self.workers[worker] = host
+                self.dismissed.discard(worker)
+            if not rejoined:
+                self.log("INFO", f"Coordinator: worker {worker} joined with {request.get('slots', 1)} slots")
+            return {"worker": worker, "settings": self.engine.session_settings(),
+                    "heartbeat_interval": self.heartbeat_interval}, worker
+        if worker is None:
+            return {"error": "Say hello before any other request"}, None
+        
+        with self.lock:
+            if op == "lease":
+                return self.lease_reply(worker), worker
+            if op == "heartbeat":
+                return {"cancel": self.renew(worker, request["leases"])}, worker
+            if op == "result":
+                rejected = self.complete(request["lease"], result=request["result"], settings=request.get("settings"))
+                if rejected:
+                    return {"error": f"The coordinator rejected this worker's result: {rejected}"}, worker
+            elif op == "failed":
+                state = request.get("state") if request.get("state") in ("failed", "skipped") else "failed"
+                self.complete(request["lease"], error=ComparisonFailed(state, str(request.get("error", ""))))
+            elif op == "release":
+                self.release(request["lease"])
+            else:
+                return {"error": f"Unknown request {op!r}"}, worker
+        return {"ok": True}, worker
+    
+    def lease_reply(self, worker):
+        """Reply to a worker asking for a row (called with the lock held)"""
+        if self.batch is None:
+            return {"wait": IDLE_POLL_SECONDS}
+        if self.batch.finished.is_set():
+            self.dismissed.add(worker)
+            return {"done": True}
+        lease = self.lease_row(worker)
+        if lease is None:
+            return {"wait": IDLE_POLL_SECONDS}
+        job = self.jobs[lease.row_idx]
+        return {"lease": lease.lease_id, "row": lease.row_idx, "left": job.left_file, "right": job.right_file}
+    
+    def lease_row(self, worker):
+        """Lease the next queued row to a worker, or a copy of a straggler once the queue is empty"""
+        while self.pending:
+            row_idx = self.pending.popleft()
+            if not self.jobs[row_idx].settled:
+                self.log("DEBUG", f"Row {row_idx + 1}: Leased to {worker}")
+                return self.grant(row_idx, worker)
+        
+        row_idx = self.find_straggler(worker)
+        if row_idx is None:
+            return None
+        self.log("INFO", f"Row {row_idx + 1}: Running long, starting a speculative copy on {worker}")
+        return self.grant(row_idx, worker)
+    
+    def grant(self, row_idx, worker):
+        lease = Lease(row_idx, worker, self.lease_seconds)
+        self.leases[lease.lease_id] = lease
+        return lease
+    
+    def live_leases(self, row_idx):
+        return [lease for lease in self.leases.values() if lease.row_idx == row_idx and not lease.revoked]
+    
+    def find_straggler(self, worker):
+        """The longest-running row worth copying to this worker, or None
+        
+        A row qualifies once it has run straggler_factor times the median row time, has fewer than
+        MAX_ROW_COPIES copies in flight, and none of them is on this worker.
+        """
+        if len(self.row_times) < STRAGGLER_MIN_SAMPLES:
+            return None
+        cutoff = statistics.median(self.row_times) * self.straggler_factor
+        now = time.monotonic()
+        
+        copies = {}  # row index -> live leases
+        for lease in self.leases.values():
+            if not lease.revoked:
+                copies.setdefault(lease.row_idx, []).append(lease)
+        candidates = [(min(lease.started for lease in leases), row_idx) for row_idx, leases in copies.items()
+                      if len(leases) < MAX_ROW_COPIES and all(lease.worker != worker for lease in leases)]
+        if not candidates:
+            return None
+        started, row_idx = min(candidates)
+        return row_idx if now - started > cutoff else None
+    
+    def renew(self, worker, lease_ids):
+        """Extend a worker's leases; returns the ones it should stop working on (called with the lock held)"""
+        cancel = []
+        expires = time.monotonic() + self.lease_seconds
+        for lease_id in lease_ids:
+            lease = self.leases.get(lease_id)
+            if lease is None or lease.revoked or lease.worker != worker:
+                cancel.append(lease_id)
+            else:
+                lease.expires = expires
+        return cancel
+    
+    def complete(self, lease_id, result=None, error=None, settings=None):
+        """Settle a row with a worker's outcome; the first copy to finish wins (called with the lock held)
+        
+        A result scored with other settings than the batch's is not used: the row is requeued for
+        another worker and the reason is returned.
+        """
+        lease = self.leases.pop(lease_id, None)
+        if lease is None or lease.revoked:
+            return None
+        job = self.jobs[lease.row_idx]
+        if job.settled:
+            return None
+        
+        others = self.live_leases(lease.row_idx)
+        mismatch = self.settings_mismatch(result, settings or {}) if result is not None else None
+        if mismatch:
+            self.log("WARNING", f"Row {lease.row_idx + 1}: {lease.worker} scored it {mismatch}, requeued")
+            if not others:
+                self.pending.appendleft(lease.row_idx)
+            return f"scored {mismatch}"
+        if result is not None:
+            self.row_times.append(time.monotonic() - lease.started)
+            metric = result.get("metric", self.engine.current_metric.get())
+            self.engine.results[self.engine.pair_key(job.left_file, job.right_file, metric)] = result
+            self.engine.evaluate_verdicts(result)
+            self.engine.finish_job(job, result=result)
+        elif others:
+            # Another copy may still succeed (this worker might not see the files, say)
+            self.log("WARNING", f"Row {lease.row_idx + 1}: Failed on {lease.worker}: {error.reason}")
+            return None
+        else:
+            self.engine.finish_job(job, error=error)
+        
+        for other in others:
+            other.revoked = True
+            self.log("DEBUG", f"Row {lease.row_idx + 1}: Copy on {other.worker} is no longer needed")
+        return None
+    
+    def settings_mismatch(self, result, settings):
+        """How a worker's result strays from the batch's scoring settings ("with SSIM instead of VMAF"), or None"""
+        scored = {name: settings.get(name, getattr(self.engine, name).get()) for name in SCORED_SETTINGS}
+        scored["current_metric"] = result.get("metric", scored["current_metric"])
+        changed = [f"{scored[name]} instead of {getattr(self.engine, name).get()}" for name in SCORED_SETTINGS
+                   if scored[name] != getattr(self.engine, name).get()]
+        return f"with {', '.join(changed)}" if changed else None
+    
+    def release(self, lease_id):
+        """A worker gave a row back unfinished; requeue it unless another copy is running (called with the lock held)"""
+        lease = self.leases.pop(lease_id, None)
+        if lease is None or lease.revoked or self.jobs[lease.row_idx].settled:
+            return
+        if not self.live_leases(lease.row_idx):
+            self.pending.appendleft(lease.row_idx)
+    
+    def expire_leases(self):
+        """Drop leases whose worker stopped sending heartbeats and requeue their rows (called with the lock held)"""
+        now = time.monotonic()
+        for lease in list(self.leases.values()):
+            if now < lease.expires:
+                continue
+            del self.leases[lease.lease_id]
+            if lease.revoked or self.jobs[lease.row_idx].settled or self.live_leases(lease.row_idx):
+                continue
+            
+            row_idx = lease.row_idx
+            self.expiries[row_idx] = self.expiries.get(row_idx, 0) + 1
+            if self.expiries[row_idx] >= MAX_LEASE_EXPIRIES:
+                self.log("ERROR", f"Row {row_idx + 1}: Lost by {self.expiries[row_idx]} workers, giving up")
+                self.engine.finish_job(self.jobs[row_idx], error=ComparisonFailed(
+                    "failed", f"lost by {self.expiries[row_idx]} workers"))
+            else:
+                self.log("WARNING", f"Row {row_idx + 1}: {lease.worker} stopped sending heartbeats, requeued")
+                self.pending.appendleft(row_idx)
+    
+    def revoke_cancelled(self):
+        """Settle jobs cancelled by the caller and revoke the leases of settled rows (called with the lock held)"""
+        for job in self.jobs.values():
+            if not job.settled and job.stop.is_set():
+                self.engine.finish_job(job)
+        for lease in self.leases.values():
+            if not lease.revoked and self.jobs[lease.row_idx].settled:
+                lease.revoked = True
+
+
+class Worker:
+    """Leases rows from a coordinator and scores them on a local engine, up to slots rows at a time
+    
+    A background thread sends heartbeats for the rows in progress and cancels the ones the coordinator
+    no longer needs. Outcomes are pushed back as they finish; a cancelled row is released for requeueing.
+    """
+    
+    def __init__(self, engine, address, slots, token=None, retry_seconds=LEASE_SECONDS):
+        self.engine = engine
+        self.address = address
+        self.slots = slots
+        self.token = token
+        self.retry_seconds = retry_seconds
+        self.worker_id = None
+        self.heartbeat_interval = HEARTBEAT_INTERVAL
+        self.connection = None  # (socket, reader, writer)
+        self.connection_lock = Lock()
+        self.active = {}  # lease id -> ComparisonJob
+        self.active_lock = Lock()
+        self.stop_event = Event()  # no more rows: the batch is done, or the worker is shutting down
+        self.finished = Event()  # every slot has reported its last row
+        self.dismissed = False  # the coordinator said the batch is done
+        self.lost = False  # the coordinator went away mid-batch
+        self.slots_running = 0
+        self.rows_scored = 0
+    
+    def log(self, level, message):
+        self.engine.log_queue.put((level, message))
+    
+    def request(self, message):
+        """Send one request and return its reply, reconnecting for up to retry_seconds if the link drops"""
+        with self.connection_lock:
+            deadline = time.monotonic() + self.retry_seconds
+            while True:
+                try:
+                    if self.connection is None:
+                        self.connect()
+                    reply = self.exchange(message)
+                    if "error" in reply:
+                        raise CoordinatorError(reply["error"])
+                    return reply
+                except OSError as e:
+                    self.disconnect()
+                    if self.dismissed or time.monotonic() >= deadline:
+                        raise
+                    self.log("WARNING", f"Worker: lost the coordinator ({e}), reconnecting...")
+                    time.sleep(1.0)
+    
+    def exchange(self, message):
+        _, reader, writer = self.connection
+        writer.write(json.dumps(message) + "\n")
+        writer.flush()
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("the coordinator closed the connection")
+        return json.loads(line)
+    
+    def connect(self):
+        """Open the connection and say hello; the reply carries the batch's scoring settings"""
+        sock = socket.create_connection(self.address, timeout=LEASE_SECONDS)
+        self.connection = (sock, sock.makefile("r", encoding="utf-8"), sock.makefile("w", encoding="utf-8"))
+        reply = self.exchange({"op": "hello", "worker": self.worker_id, "token": self.token,
+                               "host": socket.gethostname(), "slots": self.slots})
+        if "error" in reply:
+            self.disconnect()
+            raise CoordinatorError(reply["error"])
+        
+        if self.worker_id is None:
+            self.log("INFO", f"Worker: joined {self.address[0]}:{self.address[1]} as {reply['worker']}")
+        self.worker_id = reply["worker"]
+        self.heartbeat_interval = reply.get("heartbeat_interval", HEARTBEAT_INTERVAL)
+        self.engine.apply_session_settings(reply["settings"])
+        self.engine.resolve_backends()
+        
+        # Scoring with whatever this FFmpeg supports instead would mix metrics or backends in the batch
+        changed = [f"{reply['settings'][name]} (can only score {getattr(self.engine, name).get()})"
+                   for name in SCORED_SETTINGS
+                   if name in reply["settings"] and getattr(self.engine, name).get() != reply["settings"][name]]
+        if changed:
+            self.disconnect()
+            raise CoordinatorError(f"this host cannot score the batch's {', '.join(changed)}")
+    
+    def disconnect(self):
+        if self.connection is None:
+            return
+        for part in self.connection:
+            try:
+                part.close()
+            except OSError:
+                pass
+        self.connection = None
+    
+    def run(self):
+        """Score rows until the coordinator reports the batch done; returns the number of rows scored
+        
+        Raises CoordinatorError if the coordinator rejects this worker, and OSError if it can't be reached.
+        """
+        self.request({"op": "heartbeat", "leases": []})  # connects and says hello
+        self.slots_running = self.slots
+        for slot in range(self.slots):
+            threading.Thread(target=self.serve_slot, daemon=True, name=f"worker-slot-{slot}").start()
+        threading.Thread(target=self.send_heartbeats, daemon=True, name="worker-heartbeat").start()
+        
+        # Waiting on an event rather than joining the threads: a join interrupted by Ctrl+C can
+        # leave a thread looking finished, and stop() has to wait for the slots' last reports
+        while not self.finished.wait(0.5):
+            pass
+        with self.connection_lock:
+            self.disconnect()
+        return self.rows_scored
+    
+    def stop(self, timeout=10.0):
+        """Cancel the rows in progress and give their leases back to the coordinator"""
+        self.stop_event.set()
+        self.engine.stop_event.set()
+        self.finished.wait(timeout)
+    
+    def abandon(self, reason):
+        """Give up on the coordinator: stop every row in progress"""
+        if not self.stop_event.is_set():
+            self.log("ERROR", f"Worker: {reason}")
+            self.lost = True
+        self.stop_event.set()
+        with self.active_lock:
+            for job in self.active.values():
+                job.cancel()
+    
+    def serve_slot(self):
+        """One slot: lease a row, score it, report it, repeat"""
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    reply = self.request({"op": "lease"})
+                    if reply.get("done"):
+                        self.dismissed = True
+                        self.stop_event.set()
+                    elif "lease" in reply:
+                        self.score_lease(reply)
+                    else:
+                        self.stop_event.wait(reply.get("wait", IDLE_POLL_SECONDS))
+                except (OSError, ValueError, CoordinatorError) as e:
+                    self.abandon(f"Coordinator unavailable: {e}")
+        finally:
+            with self.active_lock:
+                self.slots_running -= 1
+                if self.slots_running == 0:
+                    self.finished.set()
+    
+    def score_lease(self, lease):
+        """Score a leased row on the local engine and report its outcome"""
+        lease_id, row_idx = lease["lease"], lease["row"]
+        if self.stop_event.is_set():
+            self.request({"op": "release", "lease": lease_id})  # shutting down; submitting would clear the engine's stop
+            return
+        with self.engine.jobs_lock:
+            # Keep the coordinator's row number in logs unless this engine is still busy with that row
+            rows = None if f"row_{row_idx}" in self.engine.jobs else [row_idx]
+        batch = self.engine.submit([(lease["left"], lease["right"])], rows=rows)
+        job = batch.jobs[0]
+        with self.active_lock:
+            self.active[lease_id] = job
+        try:
+            batch.wait()
+        finally:
+            with self.active_lock:
+                self.active.pop(lease_id, None)
+        
+        if job.future.cancelled():
+            message = {"op": "release", "lease": lease_id}
+        elif job.future.exception() is not None:
+            error = job.future.exception()
+            message = {"op": "failed", "lease": lease_id, "state": getattr(error, "state", "failed"),
+                       "error": str(error)}
+        else:
+            message = {"op": "result", "lease": lease_id, "result": job.future.result(),
+                       "settings": {name: getattr(self.engine, name).get() for name in SCORED_SETTINGS}}
+            with self.active_lock:
+                self.rows_scored += 1
+        self.request(message)
+    
+    def send_heartbeats(self):
+        """Renew the leases in progress and cancel the rows the coordinator has revoked"""
+        while not self.finished.wait(self.heartbeat_interval):
+            with self.active_lock:
+                lease_ids = list(self.active)
+            try:
+                reply = self.request({"op": "heartbeat", "leases": lease_ids})
+            except (OSError, ValueError, CoordinatorError) as e:
+                self.abandon(f"Coordinator unavailable: {e}")
+                return
+            with self.active_lock:
+                for lease_id in reply.get("cancel", []):
+                    job = self.active.get(lease_id)
+                    if job is not None:
+                        self.log("INFO", f"Row {job.row_idx + 1}: No longer needed by the coordinator, stopping")
+                        job.cancel()
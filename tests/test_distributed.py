@@ -0,0 +1,209 @@
+"""
+Distributed mode: lease lapse and requeue, straggler copies, giving up on rows that keep losing
+their workers, and token checks. The coordinator is driven through handle_request() as a worker
+connection would; only the token tests go over a socket.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import distributed
+from comparison_engine import ComparisonEngine, ComparisonFailed
+
+
+RESULT = {"metric": "SSIM", "video_score_left": 0.9, "video_score_right": 0.8, "audio_measure": "none"}
+
+
+class PsnrFailingEngine(ComparisonEngine):
+    """Worker engine whose audio PSNR pass fails; loudness is measured without FFmpeg"""
+    
+    def resolve_backends(self):
+        pass
+    
+    def preflight_rows(self, tasks, jobs):
+        return tasks
+    
+    def plan_segmented_row(self, row_idx, left_file, right_file):
+        return None
+    
+    def has_filter(self, name):
+        return True
+    
+    def has_audio_stream(self, file_path):
+        return True
+    
+    def run_single_audio_comparison(self, reference_file, distorted_file, comparison_type, row_idx):
+        return None
+    
+    def get_audio_loudness_pair(self, left_file, right_file, row_idx):
+        return {"integrated": -14.0}, {"integrated": -23.0}
+    
+    def compare_row(self, row_idx, left_file, right_file):
+        options = self.get_scoring_options()
+        video_result = {"winner": "left", "left_score": RESULT["video_score_left"],
+                        "right_score": RESULT["video_score_right"]}
+        audio_result = self.run_audio_comparison(left_file, right_file, row_idx, options)
+        return self.build_row_result(f"row_{row_idx}", video_result, audio_result, options, self.current_metric.get())
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class CoordinatorTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.engine = ComparisonEngine()
+        self.engine.current_metric.set(RESULT["metric"])
+        self.coordinator = distributed.Coordinator(self.engine, ("127.0.0.1", 0), token="s3cret")
+        self.addCleanup(self.close)
+    
+    def close(self):
+        self.engine.stop_event.set()
+        if self.coordinator.batch is not None:
+            self.coordinator.batch.finished.wait(5)
+        self.coordinator.close(grace=0)
+    
+    def submit(self, rows):
+        batch = self.coordinator.submit([(f"/media/left{i}.mp4", f"/media/right{i}.mp4") for i in range(rows)])
+        # The runner thread queues the rows; until then workers are told to wait
+        self.assertTrue(wait_until(lambda: len(self.coordinator.pending) == rows))
+        return batch
+    
+    def hello(self, name):
+        reply, worker = self.coordinator.handle_request(None, {"op": "hello", "worker": name, "token": "s3cret"})
+        self.assertEqual(worker, name)
+        return worker
+    
+    def lease(self, worker):
+        reply, _ = self.coordinator.handle_request(worker, {"op": "lease"})
+        self.assertIn("lease", reply)
+        return reply
+    
+    def finish(self, worker, lease):
+        self.coordinator.handle_request(worker, {"op": "result", "lease": lease["lease"], "result": dict(RESULT)})
+    
+    def lapse(self, lease):
+        """Make a lease look like its worker stopped sending heartbeats"""
+        with self.coordinator.lock:
+            self.coordinator.leases[lease["lease"]].expires = 0
+    
+    def test_lapsed_lease_is_requeued(self):
+        batch = self.submit(1)
+        first = self.lease(self.hello("w1"))
+        self.lapse(first)
+        self.assertTrue(wait_until(lambda: list(self.coordinator.pending) == [0]))
+        
+        second = self.lease(self.hello("w2"))
+        self.assertEqual(second["row"], 0)
+        self.assertNotEqual(second["lease"], first["lease"])
+        reply, _ = self.coordinator.handle_request("w1", {"op": "heartbeat", "leases": [first["lease"]]})
+        self.assertEqual(reply["cancel"], [first["lease"]])
+        
+        self.finish("w2", second)
+        self.assertEqual(batch.jobs[0].future.result(timeout=5)["video_winner"], "left")
+        self.assertTrue(batch.finished.wait(5))
+    
+    def test_straggler_is_copied_and_the_slower_copy_cancelled(self):
+        batch = self.submit(distributed.STRAGGLER_MIN_SAMPLES + 1)
+        fast = self.hello("fast")
+        for _ in range(distributed.STRAGGLER_MIN_SAMPLES):
+            self.finish(fast, self.lease(fast))
+        
+        slow = self.hello("slow")
+        original = self.lease(slow)
+        with self.coordinator.lock:
+            self.coordinator.leases[original["lease"]].started -= 60
+        copy = self.lease(fast)
+        self.assertEqual(copy["row"], original["row"])
+        
+        # No third copy while two are in flight
+        reply, _ = self.coordinator.handle_request(self.hello("idle"), {"op": "lease"})
+        self.assertIn("wait", reply)
+        
+        self.finish(fast, copy)
+        reply, _ = self.coordinator.handle_request(slow, {"op": "heartbeat", "leases": [original["lease"]]})
+        self.assertEqual(reply["cancel"], [original["lease"]])
+        self.finish(slow, original)  # too late: the first copy to finish won
+        self.assertTrue(batch.finished.wait(5))
+        self.assertTrue(all(job.future.result(timeout=0) for job in batch.jobs))
+    
+    def test_row_fails_after_max_lease_expiries(self):
+        batch = self.submit(1)
+        for attempt in range(distributed.MAX_LEASE_EXPIRIES):
+            lease = self.lease(self.hello(f"w{attempt}"))
+            self.lapse(lease)
+            if attempt + 1 < distributed.MAX_LEASE_EXPIRIES:
+                self.assertTrue(wait_until(lambda: list(self.coordinator.pending) == [0]))
+        
+        error = batch.jobs[0].future.exception(timeout=5)
+        self.assertIsInstance(error, ComparisonFailed)
+        self.assertEqual(error.state, "failed")
+        self.assertTrue(batch.finished.wait(5))
+    
+    def test_result_scored_with_other_settings_is_requeued(self):
+        batch = self.submit(1)
+        lease = self.lease(self.hello("w1"))
+        reply, _ = self.coordinator.handle_request("w1", {"op": "result", "lease": lease["lease"],
+                                                          "result": dict(RESULT, metric="VMAF")})
+        self.assertIn("error", reply)
+        self.assertEqual(list(self.coordinator.pending), [0])
+        
+        lease = self.lease(self.hello("w2"))
+        reply, _ = self.coordinator.handle_request("w2", {"op": "result", "lease": lease["lease"], "result": dict(RESULT),
+                                                          "settings": {"metric_backend": "NumPy"}})
+        self.assertIn("error", reply)
+        self.assertFalse(batch.jobs[0].settled)
+        
+        self.finish("w2", self.lease("w2"))
+        self.assertEqual(batch.jobs[0].future.result(timeout=5)["metric"], RESULT["metric"])
+    
+    def test_worker_refuses_settings_its_ffmpeg_cannot_run(self):
+        engine = ComparisonEngine()
+        # As resolve_backends() does on a host whose FFmpeg has no ssim filter
+        engine.resolve_backends = lambda: engine.metric_backend.set("NumPy")
+        worker = distributed.Worker(engine, self.coordinator.address, 1, token="s3cret", retry_seconds=0)
+        with self.assertRaisesRegex(distributed.CoordinatorError, "cannot score"):
+            worker.run()
+    
+    def test_worker_falls_back_to_loudness_when_psnr_fails(self):
+        # The worker's engine has no row tables of its own: the fallback must use the leased row's files
+        batch = self.submit(3)
+        worker = distributed.Worker(PsnrFailingEngine(), self.coordinator.address, 2, token="s3cret", retry_seconds=0)
+        threading.Thread(target=worker.run, daemon=True).start()
+        self.assertTrue(batch.wait(10))
+        
+        for job in batch.jobs:
+            result = job.future.result(timeout=0)
+            self.assertEqual(result["audio_measure"], "loudness")
+            self.assertEqual(result["audio_winner"], "left")
+            self.assertNotIn("error", result)
+        self.assertEqual(worker.rows_scored, 3)
+    
+    def test_wrong_token_is_rejected(self):
+        for token in (None, "nope", "s3crët"):
+            reply, worker = self.coordinator.handle_request(None, {"op": "hello", "token": token})
+            self.assertIn("error", reply)
+            self.assertIsNone(worker)
+        reply, _ = self.coordinator.handle_request(None, {"op": "lease"})
+        self.assertIn("error", reply)
+    
+    def test_worker_with_wrong_token_stops(self):
+        worker = distributed.Worker(ComparisonEngine(), self.coordinator.address, 1, token="nope", retry_seconds=0)
+        with self.assertRaises(distributed.CoordinatorError):
+            worker.run()
+        self.assertEqual(self.coordinator.workers, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
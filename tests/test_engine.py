@@ -0,0 +1,78 @@
+"""
+Batch bookkeeping in ComparisonEngine, with compare_row stubbed out so no FFmpeg is needed.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comparison_engine import ComparisonEngine
+
+
+RESULT = {"metric": "SSIM", "video_score_left": 0.9, "video_score_right": 0.8, "audio_measure": "none"}
+
+
+class StubEngine(ComparisonEngine):
+    """Rows wait for release (or their stop flag) and then return RESULT"""
+    
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+    
+    def preflight_rows(self, tasks, jobs):
+        return tasks
+    
+    def plan_segmented_row(self, row_idx, left_file, right_file):
+        return None
+    
+    def compare_row(self, row_idx, left_file, right_file):
+        while not self.release.wait(0.05):
+            if self.row_stop(row_idx).is_set():
+                time.sleep(0.3)  # still shutting down its FFmpeg processes
+                return None
+        return dict(RESULT)
+
+
+class BatchTest(unittest.TestCase):
+    
+    def test_stopped_batch_closing_late_leaves_the_new_batch_alone(self):
+        engine = StubEngine()
+        old = engine.submit([("/media/left.mp4", "/media/right.mp4")], rows=[0])
+        time.sleep(0.2)
+        
+        # Cancel, then submit the same row again while the old batch is still closing
+        old.cancel()
+        time.sleep(0.1)
+        new = engine.submit([("/media/left.mp4", "/media/right.mp4")], rows=[0])
+        self.assertTrue(old.wait(5))
+        
+        self.assertTrue(old.jobs[0].future.cancelled())
+        self.assertIs(engine.jobs["row_0"], new.jobs[0])
+        engine.release.set()
+        self.assertTrue(new.wait(5))
+        self.assertEqual(new.jobs[0].future.result(timeout=0)["video_winner"], "left")
+        self.assertEqual([event["type"] for event in new.pending_events() if event["type"] != "progress"],
+                         ["result", "finished"])
+        self.assertEqual(engine.jobs, {})
+
+
+class AudioFallbackTest(unittest.TestCase):
+    
+    def test_failed_psnr_falls_back_to_loudness_on_the_rows_own_files(self):
+        engine = ComparisonEngine()  # no GUI row tables: left_files is empty
+        calls = []
+        engine.run_audio_analysis_fallback = lambda left_file, right_file, row_idx: calls.append(
+            (left_file, right_file, row_idx)) or {"winner": "left", "left_score": -14.0, "right_score": -20.0,
+                                                  "measure": "loudness"}
+        result = engine.determine_audio_winner(None, None, "/media/left.mp4", "/media/right.mp4", 7)
+        self.assertEqual(calls, [("/media/left.mp4", "/media/right.mp4", 7)])
+        self.assertEqual(result["measure"], "loudness")
+        self.assertNotIn("error", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
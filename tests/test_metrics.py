@@ -0,0 +1,69 @@
+"""
+The NumPy backend's frame_metrics against the ffmpeg ssim and psnr filter formulas, written out
+here one window at a time.
+"""
+
+import math
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comparison_engine import frame_metrics, np
+
+
+def reference_ssim(x, y):
+    """ffmpeg's ssim filter on one luma plane: sums over 8x8 windows stepping by 4, averaged"""
+    height, width = len(x) - len(x) % 4, len(x[0]) - len(x[0]) % 4
+    c1 = (0.01 * 255) ** 2 * 64
+    c2 = (0.03 * 255) ** 2 * 64 * 63
+    values = []
+    for top in range(0, height - 4, 4):
+        for left in range(0, width - 4, 4):
+            pixels = [(x[row][col], y[row][col]) for row in range(top, top + 8) for col in range(left, left + 8)]
+            s1 = sum(a for a, _ in pixels)
+            s2 = sum(b for _, b in pixels)
+            ss = sum(a * a + b * b for a, b in pixels)
+            s12 = sum(a * b for a, b in pixels)
+            variance = ss * 64 - s1 * s1 - s2 * s2
+            covariance = s12 * 64 - s1 * s2
+            values.append((2 * s1 * s2 + c1) * (2 * covariance + c2) / ((s1 * s1 + s2 * s2 + c1) * (variance + c2)))
+    return sum(values) / len(values)
+
+
+def reference_psnr(x, y):
+    """ffmpeg's psnr filter on one 8-bit plane, capped at 100 dB like frame_metrics"""
+    errors = [(a - b) ** 2 for row_x, row_y in zip(x, y) for a, b in zip(row_x, row_y)]
+    mse = sum(errors) / len(errors)
+    return 100.0 if mse == 0 else min(100.0, 10 * math.log10(255 ** 2 / mse))
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class FrameMetricsTest(unittest.TestCase):
+    
+    def test_identical_frames(self):
+        frames = np.random.default_rng(1).integers(0, 256, size=(2, 16, 24), dtype=np.uint8)
+        ssim, psnr = frame_metrics(frames, frames.copy())
+        np.testing.assert_allclose(ssim, 1.0)
+        np.testing.assert_allclose(psnr, 100.0)
+    
+    def test_constant_offset_psnr(self):
+        reference = np.full((1, 8, 8), 100, dtype=np.uint8)
+        _, psnr = frame_metrics(reference, reference + 1)
+        self.assertAlmostEqual(psnr[0], 10 * math.log10(255 ** 2), places=9)  # MSE of 1
+    
+    def test_noisy_frames_match_the_filter_formulas(self):
+        rng = random.Random(7)
+        # 18x22 also checks that the edges beyond a multiple of 4 are left out, as ffmpeg does
+        x = [[rng.randrange(256) for _ in range(22)] for _ in range(18)]
+        y = [[min(255, max(0, value + rng.randint(-20, 20))) for value in row] for row in x]
+        ssim, psnr = frame_metrics(np.array([x], dtype=np.uint8), np.array([y], dtype=np.uint8))
+        self.assertAlmostEqual(ssim[0], reference_ssim(x, y), places=12)
+        self.assertAlmostEqual(psnr[0], reference_psnr(x, y), places=9)
+        self.assertLess(ssim[0], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Early-termination and sampled-mode decisions: t critical values, interval verdicts and
+SequentialVerdict's stopping rules.
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comparison_engine import SequentialVerdict, interval_verdict, t_critical
+
+
+class TCriticalTest(unittest.TestCase):
+    
+    def test_matches_the_t_table(self):
+        # (confidence, degrees of freedom) -> two-sided critical value from the standard t table
+        table = {(0.95, 1): 12.706, (0.95, 2): 4.303, (0.95, 3): 3.182, (0.95, 4): 2.776, (0.95, 10): 2.228,
+                 (0.95, 30): 2.042, (0.95, 60): 2.000, (0.99, 4): 4.604, (0.99, 5): 4.032, (0.99, 20): 2.845,
+                 (0.99, 120): 2.617}
+        for (confidence, dof), expected in table.items():
+            with self.subTest(confidence=confidence, dof=dof):
+                self.assertAlmostEqual(t_critical(confidence, dof), expected, delta=1e-3)
+
+
+class IntervalVerdictTest(unittest.TestCase):
+    
+    def test_verdicts(self):
+        self.assertEqual(interval_verdict(0.02, 0.05, 0.01), "left")
+        self.assertEqual(interval_verdict(-0.05, -0.02, 0.01), "right")
+        self.assertEqual(interval_verdict(-0.005, 0.005, 0.01), "tie")
+        self.assertIsNone(interval_verdict(0.0, 0.02, 0.01))  # straddles the threshold
+
+
+class SequentialVerdictTest(unittest.TestCase):
+    
+    def feed(self, verdict, units, difference, noise, seed=3):
+        rng = random.Random(seed)
+        for _ in range(units):
+            left = 0.9 + rng.uniform(-noise, noise)
+            verdict.add(left, left - difference + rng.uniform(-noise, noise))
+    
+    def test_clear_winner_stops_after_min_batches(self):
+        verdict = SequentialVerdict(0.01, 0.99, batch_size=4, min_batches=5)
+        self.feed(verdict, 19, 0.05, 0.005)
+        self.assertIsNone(verdict.verdict())  # only 4 full batches
+        self.feed(verdict, 1, 0.05, 0.005)
+        self.assertEqual(verdict.verdict(), "left")
+        self.assertAlmostEqual(verdict.left_mean() - verdict.right_mean(), 0.05, delta=0.005)
+    
+    def test_tie(self):
+        verdict = SequentialVerdict(0.01, 0.99, batch_size=4, min_batches=5)
+        self.feed(verdict, 40, 0.0, 0.002)
+        self.assertEqual(verdict.verdict(), "tie")
+    
+    def test_close_call_needs_more_data(self):
+        verdict = SequentialVerdict(0.01, 0.99, batch_size=1, min_batches=5)
+        self.feed(verdict, 5, 0.012, 0.01)
+        self.assertIsNone(verdict.verdict())
+    
+    def test_min_coverage_holds_back_a_settled_verdict(self):
+        verdict = SequentialVerdict(0.01, 0.99, batch_size=4, min_batches=5, min_coverage=0.1, total=1000)
+        self.feed(verdict, 40, 0.05, 0.005)
+        self.assertEqual(interval_verdict(*verdict.interval(), 0.01), "left")
+        self.assertIsNone(verdict.verdict())  # 4% of the file
+        self.feed(verdict, 60, 0.05, 0.005)
+        self.assertEqual(verdict.verdict(), "left")
+
+
+if __name__ == "__main__":
+    unittest.main()
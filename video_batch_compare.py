@@ -6,51 +6,45 @@ A GUI application for comparing video and audio quality between two sets of file
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import subprocess
 import threading
 import json
-import re
 import os
 from datetime import datetime
-from queue import Queue
 import sys
-import concurrent.futures
-from threading import Lock, Event
-import time
 
+from comparison_engine import (ComparisonEngine, JobJournal, AUDIO_BACKENDS, JOURNAL_PATH, MULTI_METRIC_KEYS,
+                               SCORE_RESOLUTIONS, THRESHOLD_ATTRIBUTES)
 
-class VideoComparator:
+# Session files: a header line with file lists and settings, then one line per row result
+SESSION_VERSION = 1
+SESSION_BATCH_ROWS = 1000  # results merged into the GUI per step while a session loads
+
+# Row widgets are built this many at a time: the first rows at once, the rest as the list scrolls to them
+ROW_WIDGET_CHUNK = 100
+
+
+class VideoComparator(ComparisonEngine):
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Video Quality Comparison Tool")
         self.root.geometry("1600x850")
         
-        # Video Win Threshold
-        self.vmaf_win_threshold = 2.0
-        self.ssim_win_threshold = 0.01
-
-        # Audio Win Threshold
-        self.psnr_win_threshold = 2.0
-
-        # Data storage
-        self.left_files = []
-        self.right_files = []
-        self.results = {}
-        self.running = False
-        self.stop_event = Event()
-        self.current_metric = tk.StringVar(value="VMAF")
+        # Scoring state and options; make_setting turns the options into Tk variables
+        super().__init__()
+        self.threshold_vars = {
+            attribute: tk.StringVar(value=f"{getattr(self, attribute):g}") for attribute in THRESHOLD_ATTRIBUTES
+        }
         
         # Threading
-        self.log_queue = Queue()
-        self.progress_queue = Queue()
-        self.worker_thread = None
-        self.progress_lock = Lock()
-        workers = os.cpu_count() or 5
-        self.max_workers = max(1, workers - 4)
+        self.batch = None  # ComparisonBatch being scored; its events drive the rows
+        self.journal = JobJournal(JOURNAL_PATH)
+        self.session_loader = None  # thread reading a loaded session's results
         
         # Progress tracking
         self.progress_bars = {}  # row_id -> {"video": progressbar, "audio": progressbar}
         self.score_labels = {}   # row_id -> {"vidleft": label, "vidright": label, "viddiff": label, "audioleft": label, "audioright": label, "audiodiff": label} 
+        self.row_progress = {}   # row_id -> {"video": percent, "audio": percent}, also for rows not built yet
+        self.row_widgets_pending = False  # the next chunk of row widgets is scheduled
 
         # Drag and drop state
         self.drag_data = {"active": False, "panel": None, "start_index": None}
@@ -61,7 +55,10 @@ class VideoComparator:
         
         # Start queue processing
         self.process_log_queue()
-        self.process_progress_queue()
+        self.process_batch_events()
+        
+        # Offer to restore a batch interrupted by a crash or reboot once the window is up
+        self.root.after(200, self.recover_journal)
         
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -135,7 +132,7 @@ class VideoComparator:
         
         # Progress canvas with scrollbar
         self.progress_canvas = tk.Canvas(progress_frame)
-        progress_scrollbar = ttk.Scrollbar(progress_frame, orient=tk.VERTICAL, command=self.progress_canvas.yview)
+        self.progress_scrollbar = ttk.Scrollbar(progress_frame, orient=tk.VERTICAL, command=self.progress_canvas.yview)
         self.progress_scrollable_frame = ttk.Frame(self.progress_canvas)
         
         self.progress_scrollable_frame.bind(
@@ -144,10 +141,10 @@ class VideoComparator:
         )
         
         self.progress_canvas.create_window((0, 0), window=self.progress_scrollable_frame, anchor="nw")
-        self.progress_canvas.configure(yscrollcommand=progress_scrollbar.set)
+        self.progress_canvas.configure(yscrollcommand=self.on_progress_scroll)
         
         self.progress_canvas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        progress_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.progress_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
         # Control panel
         control_frame = ttk.Frame(main_frame)
@@ -157,8 +154,9 @@ class VideoComparator:
         # Metric selector
         ttk.Label(control_frame, text="Video Metric:").grid(row=0, column=0, padx=(0, 5))
         metric_combo = ttk.Combobox(control_frame, textvariable=self.current_metric, 
-                                   values=["VMAF", "SSIM"], state="readonly", width=10)
+                                   values=["VMAF", "SSIM", "Multi"], state="readonly", width=10)
         metric_combo.grid(row=0, column=1, padx=(0, 20))
+        metric_combo.bind("<<ComboboxSelected>>", lambda e: self.project_results())
         
         # Clear all button
         self.clear_all_btn = ttk.Button(control_frame, text="Clear All", command=self.clear_all_files)
@@ -172,9 +170,78 @@ class VideoComparator:
         self.stop_btn = ttk.Button(control_frame, text="Stop", command=self.stop_comparison, state="disabled")
         self.stop_btn.grid(row=0, column=4, padx=(0, 10))
         
+        # Resume button: scores only the rows without a result
+        self.resume_btn = ttk.Button(control_frame, text="Resume", command=self.resume_comparison)
+        self.resume_btn.grid(row=0, column=5, padx=(0, 10))
+        
+        # Session buttons
+        self.save_session_btn = ttk.Button(control_frame, text="Save Session", command=self.save_session)
+        self.save_session_btn.grid(row=0, column=6, padx=(0, 10))
+        self.load_session_btn = ttk.Button(control_frame, text="Load Session", command=self.load_session)
+        self.load_session_btn.grid(row=0, column=7, padx=(0, 10))
+        
         # Exit button
         self.exit_btn = ttk.Button(control_frame, text="Exit", command=self.on_closing)
-        self.exit_btn.grid(row=0, column=5, sticky=tk.E)
+        self.exit_btn.grid(row=0, column=8, sticky=tk.E)
+        
+        # Engine options
+        options_frame = ttk.Frame(control_frame)
+        options_frame.grid(row=1, column=0, columnspan=9, pady=(8, 0), sticky=tk.W)
+        
+        ttk.Checkbutton(options_frame, text="Single-pass video (decode once)",
+                        variable=self.single_pass_video).grid(row=0, column=0, padx=(0, 20))
+        ttk.Checkbutton(options_frame, text="Fused video + audio pass",
+                        variable=self.fused_row).grid(row=0, column=1, padx=(0, 20))
+        
+        ttk.Label(options_frame, text="Score every Nth frame:").grid(row=0, column=2, padx=(0, 5))
+        ttk.Spinbox(options_frame, from_=1, to=60, textvariable=self.frame_stride,
+                    width=4).grid(row=0, column=3, padx=(0, 20))
+        
+        ttk.Label(options_frame, text="Mode:").grid(row=0, column=4, padx=(0, 5))
+        ttk.Combobox(options_frame, textvariable=self.scoring_mode, values=["Full", "Sampled"],
+                     state="readonly", width=9).grid(row=0, column=5, padx=(0, 10))
+        ttk.Checkbutton(options_frame, text="Sample at scene cuts",
+                        variable=self.sample_scene_cuts).grid(row=0, column=6, padx=(0, 20))
+        ttk.Checkbutton(options_frame, text="Stop early when decided",
+                        variable=self.early_stop).grid(row=0, column=7, padx=(0, 20))
+        
+        ttk.Checkbutton(options_frame, text="Normalize size/fps/format",
+                        variable=self.normalize_inputs).grid(row=1, column=0, padx=(0, 20), pady=(5, 0), sticky=tk.W)
+        ttk.Label(options_frame, text="Score at:").grid(row=1, column=2, padx=(0, 5), pady=(5, 0))
+        ttk.Combobox(options_frame, textvariable=self.score_resolution, values=list(SCORE_RESOLUTIONS),
+                     state="readonly", width=7).grid(row=1, column=3, padx=(0, 20), pady=(5, 0))
+        ttk.Checkbutton(options_frame, text="Split long files across workers (resumable)",
+                        variable=self.split_long_files).grid(row=1, column=4, columnspan=3, padx=(0, 20),
+                                                             pady=(5, 0), sticky=tk.W)
+        
+        # Multi-metric rows keep every score, so any of them can be shown without rescoring
+        review_frame = ttk.Frame(options_frame)
+        review_frame.grid(row=1, column=7, pady=(5, 0), sticky=tk.W)
+        ttk.Label(review_frame, text="Show metric:").grid(row=0, column=0, padx=(0, 5))
+        review_combo = ttk.Combobox(review_frame, textvariable=self.review_metric, values=list(MULTI_METRIC_KEYS),
+                                    state="readonly", width=10)
+        review_combo.grid(row=0, column=1)
+        review_combo.bind("<<ComboboxSelected>>", lambda e: self.review_results())
+        
+        ttk.Label(options_frame, text="SSIM backend:").grid(row=2, column=2, padx=(0, 5), pady=(5, 0))
+        ttk.Combobox(options_frame, textvariable=self.metric_backend, values=["FFmpeg", "NumPy"],
+                     state="readonly", width=7).grid(row=2, column=3, padx=(0, 20), pady=(5, 0))
+        # Verdicts are recomputed from stored scores as soon as a threshold changes
+        threshold_frame = ttk.Frame(options_frame)
+        threshold_frame.grid(row=3, column=0, columnspan=8, pady=(5, 0), sticky=tk.W)
+        ttk.Label(threshold_frame, text="Win thresholds:").grid(row=0, column=0, padx=(0, 10))
+        threshold_labels = {"vmaf_win_threshold": "VMAF", "ssim_win_threshold": "SSIM",
+                            "video_psnr_win_threshold": "Video PSNR", "psnr_win_threshold": "Audio PSNR",
+                            "loudness_win_threshold": "Loudness"}
+        for column, (attribute, text) in enumerate(threshold_labels.items()):
+            ttk.Label(threshold_frame, text=f"{text}:").grid(row=0, column=1 + 2 * column, padx=(0, 5))
+            ttk.Entry(threshold_frame, textvariable=self.threshold_vars[attribute],
+                      width=6).grid(row=0, column=2 + 2 * column, padx=(0, 15))
+            self.threshold_vars[attribute].trace_add("write", lambda *args: self.apply_thresholds())
+        
+        ttk.Label(options_frame, text="Audio backend:").grid(row=2, column=4, padx=(0, 5), pady=(5, 0), sticky=tk.E)
+        ttk.Combobox(options_frame, textvariable=self.audio_backend, values=list(AUDIO_BACKENDS),
+                     state="readonly", width=18).grid(row=2, column=5, columnspan=2, padx=(0, 20), pady=(5, 0), sticky=tk.W)
         
         # Console
         console_frame = ttk.LabelFrame(main_frame, text="Console", padding="5")
@@ -268,14 +335,14 @@ class VideoComparator:
             item = file_list.pop(old_index)
             file_list.insert(new_index, item)
             
-            # Clear results and progress bars since order changed
-            self.results.clear()
+            # Results follow their file pairs, so rebuild the rows and project them back on
             self.clear_progress_bars()
             
             # Refresh display
             self.refresh_file_display("left")
             self.refresh_file_display("right")
             self.setup_progress_bars()
+            self.project_results()
             
             # Select the moved item
             listbox = self.left_listbox if panel == "left" else self.right_listbox
@@ -318,12 +385,12 @@ class VideoComparator:
             if 0 <= index < len(file_list):
                 removed_file = file_list.pop(index)
                 
-                # Clear results and progress bars since files changed
-                self.results.clear()
+                # Results follow their file pairs, so rebuild the rows and project them back on
                 self.clear_progress_bars()
                 
                 self.refresh_file_display(panel)
                 self.setup_progress_bars()
+                self.project_results()
                 self.log_message("INFO", f"Removed file: {os.path.basename(removed_file)}")
     
     def clear_all_files(self):
@@ -336,25 +403,13 @@ class VideoComparator:
             self.left_files.clear()
             self.right_files.clear()
             self.results.clear()
+            self.row_progress.clear()
             self.clear_progress_bars()
             
             self.refresh_file_display("left")
             self.refresh_file_display("right")
             self.log_message("INFO", "All files cleared from both panels")
     
-    def get_total_frames(self, video_path):
-        cmd = [
-            "ffprobe",
-            "-v", "error",
-            "-count_frames",
-            "-select_streams", "v:0",
-            "-show_entries", "stream=nb_read_frames",
-            "-of", "default=nokey=1:noprint_wrappers=1",
-            video_path
-        ]
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        return int(result.stdout.strip()) if result.stdout.strip().isdigit() else None
-
     def show_file_menu(self, event, panel):
         """Show context menu for file operations"""
         listbox = self.left_listbox if panel == "left" else self.right_listbox
@@ -371,39 +426,62 @@ class VideoComparator:
         """Show console context menu"""
         self.console_menu.post(event.x_root, event.y_root)
     
-    def refresh_file_display(self, panel):
-        """Refresh the file display for specified panel"""
+    def refresh_file_display(self, panel, rows=None):
+        """Refresh the file display for specified panel (every entry, or only the given rows)"""
         listbox = self.left_listbox if panel == "left" else self.right_listbox
         file_list = self.left_files if panel == "left" else self.right_files
         
-        listbox.delete(0, tk.END)
-        for i, file_path in enumerate(file_list):
-            display_name = os.path.basename(file_path)
+        if rows is None:
+            listbox.delete(0, tk.END)
+            for i in range(len(file_list)):
+                listbox.insert(tk.END, self.file_display_name(panel, i))
+            return
+        for i in rows:
+            if i < len(file_list):
+                listbox.delete(i)
+                listbox.insert(i, self.file_display_name(panel, i))
+    
+    def file_display_name(self, panel, i):
+        """Listbox entry for a file: its name, with winner indicators once its row has a result"""
+        file_list = self.left_files if panel == "left" else self.right_files
+        display_name = os.path.basename(file_list[i])
+        
+        # Add result indicators if available - using text instead of emoji
+        result = self.row_result(i)
+        if result is not None:
+            video_indicator = ""
+            audio_indicator = ""
             
-            # Add result indicators if available - using text instead of emoji
-            if f"row_{i}" in self.results:
-                result = self.results[f"row_{i}"]
-                video_indicator = ""
-                audio_indicator = ""
-                
-                if result.get("video_winner") == panel:
-                    video_indicator = "[V] "  # Video winner
-                if result.get("audio_winner") == panel:
-                    audio_indicator = "[A] "  # Audio winner
-                
-                display_name = f"{video_indicator}{audio_indicator}{display_name}"
+            if result.get("video_winner") == panel:
+                video_indicator = "[V] "  # Video winner
+            if result.get("audio_winner") == panel:
+                audio_indicator = "[A] "  # Audio winner
             
-            listbox.insert(tk.END, display_name)
+            display_name = f"{video_indicator}{audio_indicator}{display_name}"
+        return display_name
     
     def setup_progress_bars(self):
-        """Setup progress bars and score displays for each row"""
+        """Setup progress bars and score displays; the first rows are built now, the rest as they scroll into view"""
         self.clear_progress_bars()
-        
+        self.add_row_widgets()
+    
+    def on_progress_scroll(self, first, last):
+        """Scrollbar update for the row list; schedules the next rows' widgets as the view nears its end"""
+        self.progress_scrollbar.set(first, last)
+        if (float(last) > 0.9 and not self.row_widgets_pending
+                and len(self.progress_bars) < min(len(self.left_files), len(self.right_files))):
+            self.row_widgets_pending = True
+            self.root.after_idle(self.add_row_widgets)
+    
+    def add_row_widgets(self, count=ROW_WIDGET_CHUNK):
+        """Build widgets for the next rows that have none and show what is already known about them"""
+        self.row_widgets_pending = False
         min_count = min(len(self.left_files), len(self.right_files))
-        if min_count == 0:
+        start = len(self.progress_bars)
+        if start >= min_count:
             return
         
-        for i in range(min_count):
+        for i in range(start, min(start + count, min_count)):
             row_frame = ttk.Frame(self.progress_scrollable_frame)
             row_frame.grid(row=i, column=0, sticky=(tk.W, tk.E), padx=5, pady=4)
             row_frame.columnconfigure(1, weight=1)
@@ -452,6 +530,10 @@ class VideoComparator:
             audio_right_score_label = ttk.Label(score_frame, text="Audio Score (R): --", foreground="gray", font=("TkDefaultFont", 8))
             audio_right_score_label.grid(row=1, column=2, padx=(10, 0), sticky=tk.E)
             
+            # Throughput label
+            throughput_label = ttk.Label(score_frame, text="", foreground="gray", font=("TkDefaultFont", 8))
+            throughput_label.grid(row=2, column=0, columnspan=3, sticky=tk.W)
+            
 
             self.progress_bars[f"row_{i}"] = {
                 "video": video_progress,
@@ -465,13 +547,25 @@ class VideoComparator:
                 "viddiff": vid_diff_label,
                 "audioleft": audio_left_score_label,
                 "audioright": audio_right_score_label,
-                "audiodiff": audio_diff_label
+                "audiodiff": audio_diff_label,
+                "throughput": throughput_label
             }
+            self.show_row_state(i)
         
         # Update canvas scroll region
         self.progress_scrollable_frame.update_idletasks()
         self.progress_canvas.configure(scrollregion=self.progress_canvas.bbox("all"))
     
+    def show_row_state(self, row_idx):
+        """Show a freshly built row's progress and stored result"""
+        row_id = f"row_{row_idx}"
+        for media, value in self.row_progress.get(row_id, {}).items():
+            self.progress_bars[row_id][media].configure(value=value)
+        result = self.row_result(row_idx)
+        if result is not None:
+            self.show_row_result(row_id, result)
+            self.update_throughput_display(row_id, result)
+    
     def clear_progress_bars(self):
         """Clear all progress bars and score labels"""
         for row_id, bars in self.progress_bars.items():
@@ -479,28 +573,42 @@ class VideoComparator:
         self.progress_bars.clear()
         self.score_labels.clear()
     
-    def update_progress(self, row_id, progress_type, value):
-        """Update progress bar value"""
-        self.progress_queue.put((row_id, progress_type, value))
-    
-    def process_progress_queue(self):
-        """Process progress updates from queue"""
+    def process_batch_events(self):
+        """Apply progress, result and completion events from the running batch"""
+        batch = self.batch
         try:
-            while not self.progress_queue.empty():
-                row_id, progress_type, value = self.progress_queue.get_nowait()
-                with self.progress_lock:
-                    if row_id in self.progress_bars and progress_type in self.progress_bars[row_id]:
-                        self.progress_bars[row_id][progress_type].configure(value=value)
+            for event in batch.pending_events() if batch is not None else []:
+                row_id = f"row_{event.get('row')}"
+                if event["type"] == "progress":
+                    self.row_progress.setdefault(row_id, {})[event["media"]] = event["value"]
+                    if row_id in self.progress_bars and event["media"] in self.progress_bars[row_id]:
+                        self.progress_bars[row_id][event["media"]].configure(value=event["value"])
+                elif event["type"] == "result":
+                    self.refresh_file_display("left", [event["row"]])
+                    self.refresh_file_display("right", [event["row"]])
+                    self.show_row_result(row_id, event["result"])
+                    self.update_throughput_display(row_id, event["result"])
+                elif event["type"] in ("failed", "skipped"):
+                    self.refresh_file_display("left", [event["row"]])
+                    self.refresh_file_display("right", [event["row"]])
+                    self.show_row_failure(row_id, event["type"], event["error"])
+                elif event["type"] == "finished":
+                    self.batch = None
+                    self.start_btn.configure(text="Start Comparison", state="normal")
+                    self.resume_btn.configure(state="normal")
+                    self.stop_btn.configure(state="disabled")
         except:
             pass
         
         # Schedule next check
-        self.root.after(50, self.process_progress_queue)
+        self.root.after(50, self.process_batch_events)
     
-    def update_score_display(self, row_id, vid_left_score, vid_right_score, audio_left_score, audio_right_score, metric):
-        """Update score display for a row"""
+    def update_score_display(self, row_id, vid_left_score, vid_right_score, audio_left_score, audio_right_score, metric,
+                             audio_measure="psnr"):
+        """Update score display for a row; audio ties use the same threshold as evaluate_verdicts for the measure"""
         if row_id not in self.score_labels:
             return
+        audio_threshold = self.loudness_win_threshold if audio_measure == "loudness" else self.psnr_win_threshold
         
         def update_labels():
             try:
@@ -516,7 +624,7 @@ class VideoComparator:
                 diff = abs(vid_left_score - vid_right_score)
                 winner = "Left" if vid_left_score > vid_right_score else "Right" if vid_right_score > vid_left_score else "Tie"
                 
-                if diff < (self.vmaf_win_threshold if metric == "VMAF" else self.ssim_win_threshold):
+                if diff < self.win_threshold(metric):
                     diff_text = "≈ Tie"
                     diff_color = "gray"
                 else:
@@ -526,10 +634,10 @@ class VideoComparator:
                 labels["viddiff"].configure(text=diff_text, foreground=diff_color)
                 
                 # Update colors based on winner
-                if vid_left_score > vid_right_score and diff >= (self.vmaf_win_threshold if metric == "VMAF" else self.ssim_win_threshold):
+                if vid_left_score > vid_right_score and diff >= self.win_threshold(metric):
                     labels["vidleft"].configure(foreground="green")
                     labels["vidright"].configure(foreground="gray")
-                elif vid_right_score > vid_left_score and diff >= (self.vmaf_win_threshold if metric == "VMAF" else self.ssim_win_threshold):
+                elif vid_right_score > vid_left_score and diff >= self.win_threshold(metric):
                     labels["vidleft"].configure(foreground="gray")
                     labels["vidright"].configure(foreground="red")
                 else:
@@ -546,7 +654,7 @@ class VideoComparator:
                 diff = abs(audio_left_score - audio_right_score)
                 winner = "Left" if audio_left_score > audio_right_score else "Right" if audio_right_score > audio_left_score else "Tie"
                 
-                if diff < (self.psnr_win_threshold):
+                if diff < audio_threshold:
                     diff_text = "≈ Tie"
                     diff_color = "gray"
                 else:
@@ -556,10 +664,10 @@ class VideoComparator:
                 labels["audiodiff"].configure(text=diff_text, foreground=diff_color)
                 
                 # Update colors based on winner
-                if audio_left_score > audio_right_score and diff >= self.psnr_win_threshold:
+                if audio_left_score > audio_right_score and diff >= audio_threshold:
                     labels["audioleft"].configure(foreground="green")
                     labels["audioright"].configure(foreground="gray")
-                elif audio_right_score > audio_left_score and diff >= self.psnr_win_threshold:
+                elif audio_right_score > audio_left_score and diff >= audio_threshold:
                     labels["audioleft"].configure(foreground="gray")
                     labels["audioright"].configure(foreground="red")
                 else:
@@ -571,55 +679,159 @@ class VideoComparator:
         
         self.root.after(0, update_labels)
     
-    def check_ffmpeg_availability(self):
-        """Check if FFmpeg is available"""
-        try:
-            result = subprocess.run(
-                ["ffmpeg", "-version"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                encoding='utf-8',
-                errors='replace'
-            )
-            if result.returncode == 0:
-                self.log_message("INFO", "FFmpeg is available")
-                return True
-        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
-            pass
+    def show_row_result(self, row_id, result):
+        """Update a row's score display, using the reviewed metric when the row has all of them"""
+        metric = self.current_metric.get()
+        left_score = result.get("video_score_left", 0)
+        right_score = result.get("video_score_right", 0)
+        scores = result.get("video_metrics", {}).get(self.review_metric.get())
+        if scores:
+            metric = self.review_metric.get()
+            left_score, right_score = scores["left"], scores["right"]
+        
+        self.update_score_display(
+            row_id,
+            left_score,
+            right_score,
+            result.get("audio_score_left", 0),
+            result.get("audio_score_right", 0),
+            metric,
+            result.get("audio_measure", "psnr")
+        )
+    
+    def show_row_failure(self, row_id, state, reason):
+        """Mark a row that failed or was skipped; Resume queues it again"""
+        if row_id not in self.score_labels:
+            return
+        labels = self.score_labels[row_id]
+        labels["viddiff"].configure(text="", foreground="purple")
+        labels["audiodiff"].configure(text="", foreground="purple")
+        labels["throughput"].configure(text=f"{state.capitalize()}: {reason}", foreground="red")
+    
+    def review_results(self):
+        """Redisplay finished rows with the metric chosen in the review selector"""
+        self.project_results()
+    
+    def row_result(self, row_idx):
+        """Stored result for the pair currently at a row, with verdicts for the current thresholds"""
+        if row_idx >= len(self.left_files) or row_idx >= len(self.right_files):
+            return None
+        result = self.results.get(self.pair_key(self.left_files[row_idx], self.right_files[row_idx],
+                                                self.current_metric.get()))
+        return self.evaluate_verdicts(result) if result is not None else None
+    
+    def project_results(self, rows=None):
+        """Show stored results on whichever rows currently hold their file pairs (all rows, or only the given ones)
+        
+        Only rows with widgets are redrawn; the others show their result when they are built.
+        """
+        for row_idx in range(min(len(self.left_files), len(self.right_files))) if rows is None else rows:
+            if f"row_{row_idx}" not in self.score_labels:
+                continue
+            result = self.row_result(row_idx)
+            if result is not None:
+                self.show_row_result(f"row_{row_idx}", result)
+                self.update_throughput_display(f"row_{row_idx}", result)
+        self.refresh_file_display("left", rows)
+        self.refresh_file_display("right", rows)
+    
+    def apply_thresholds(self):
+        """Take win thresholds from the entry boxes and re-evaluate every verdict without rescoring"""
+        for attribute, variable in self.threshold_vars.items():
+            try:
+                value = float(variable.get())
+            except (ValueError, tk.TclError):
+                continue  # Keep the last valid value while the user is typing
+            if value >= 0:
+                setattr(self, attribute, value)
+        self.project_results()
+    
+    def update_throughput_display(self, row_id, result):
+        """Show the measured decode/scoring throughput for a row"""
+        if row_id not in self.score_labels:
+            return
+        
+        parts = []
+        if result.get("cached"):
+            parts.append("Cached result")
+        if "video_fps" in result:
+            parts.append(f"Video: {result['video_fps']:.1f} fps, {result['video_realtime']:.2f}x realtime")
+        if "audio_realtime" in result:
+            parts.append(f"Audio: {result['audio_realtime']:.2f}x realtime")
+        if "fused_fps" in result:
+            parts.append(f"Video + audio: {result['fused_fps']:.1f} fps, {result['fused_realtime']:.2f}x realtime")
+        
+        def update_label():
+            try:
+                self.score_labels[row_id]["throughput"].configure(text="  |  ".join(parts), foreground="gray")
+            except Exception as e:
+                print(f"Error updating throughput display: {e}")
         
+        self.root.after(0, update_label)
+    
+    def make_setting(self, value):
+        """Tk variable for a scoring option, so widgets can bind to it"""
+        if isinstance(value, bool):
+            return tk.BooleanVar(value=value)
+        return tk.StringVar(value=value)
+    
+    def on_ffmpeg_missing(self):
+        """Report a missing FFmpeg on the GUI thread"""
+        self.root.after(0, self.report_missing_ffmpeg)
+    
+    def check_ffmpeg_availability(self):
+        """Detect FFmpeg and its capabilities on a background thread so the window opens immediately"""
+        threading.Thread(target=self.detect_ffmpeg_capabilities, daemon=True).start()
+    
+    def report_missing_ffmpeg(self):
+        """Disable scoring and tell the user FFmpeg could not be found"""
         self.log_message("ERROR", "FFmpeg not found. Please install FFmpeg and ensure it's in your PATH.")
         self.start_btn.configure(state="disabled")
         messagebox.showerror(
             "FFmpeg Not Found",
             "FFmpeg is required for this application.\nPlease install FFmpeg and ensure it's accessible from the command line."
         )
-        return False
     
-    def start_comparison(self):
-        """Start the comparison process"""
-        if self.running:
+    def start_comparison(self, resume=False):
+        """Start the comparison process; with resume, only rows without a result are queued"""
+        if self.running or self.batch is not None:
             return
         
         if not self.left_files or not self.right_files:
             messagebox.showwarning("No Files", "Please add files to both panels before starting comparison.")
             return
         
-        # Clear previous results
-        self.results.clear()
-        self.refresh_file_display("left")
-        self.refresh_file_display("right")
+        if self.session_loader is not None and self.session_loader.is_alive():
+            messagebox.showinfo("Loading Session", "Please wait until the session has finished loading.")
+            return
+        
+        self.resolve_backends()
+        
+        # Results are kept by pair identity; rows show them until they are rescored
         self.setup_progress_bars()
+        self.project_results()
         
         self.running = True
         self.stop_event.clear()
         self.start_btn.configure(text="Running...", state="disabled")
+        self.resume_btn.configure(state="disabled")
         self.stop_btn.configure(state="normal")
-        self.log_message("INFO", f"Starting comparison with {self.current_metric.get()} metric using {self.max_workers} workers")
+        self.log_message("INFO", f"{'Resuming' if resume else 'Starting'} comparison with {self.current_metric.get()} "
+                                 f"metric using {self.max_workers} workers")
         
-        # Start worker thread
-        self.worker_thread = threading.Thread(target=self.run_comparisons, daemon=True)
-        self.worker_thread.start()
+        # Rows are submitted to the engine as one batch, keeping their row numbers
+        min_count = min(len(self.left_files), len(self.right_files))
+        rows = list(range(min_count))
+        if resume:
+            metric = self.current_metric.get()
+            rows = [i for i in rows if self.pair_key(self.left_files[i], self.right_files[i], metric) not in self.results]
+            self.log_message("INFO", f"Resuming: {len(rows)} of {min_count} rows still to score")
+        pairs = [(self.left_files[i], self.right_files[i]) for i in rows]
+        self.batch = self.submit(pairs, rows=rows, resume=resume)
+    
+    def resume_comparison(self):
+        """Requeue only the rows without a result: never started, stopped part-way, or failed"""
+        self.start_comparison(resume=True)
     
     def stop_comparison(self):
         """Stop the comparison process"""
@@ -628,598 +840,139 @@ class VideoComparator:
         
         self.log_message("INFO", "Stopping comparison...")
         self.stop_event.set()
-        self.running = False
         
-        # Update UI immediately
-        self.start_btn.configure(text="Start Comparison", state="normal")
+        # Start stays disabled until the batch's "finished" event: starting again while its rows are
+        # still being stopped would clear the stop for them
+        self.start_btn.configure(text="Stopping...", state="disabled")
+        self.resume_btn.configure(state="disabled")
         self.stop_btn.configure(state="disabled")
     
-    def run_comparisons(self):
-        """Run all comparisons using multithreading"""
-        try:
-            min_count = min(len(self.left_files), len(self.right_files))
-            
-            # Create list of comparison tasks
-            tasks = []
-            for i in range(min_count):
-                tasks.append((i, self.left_files[i], self.right_files[i]))
-            
-            # Use ThreadPoolExecutor for parallel processing
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # Submit all tasks
-                future_to_row = {}
-                for row_idx, left_file, right_file in tasks:
-                    if self.stop_event.is_set():
-                        break
-                    
-                    future = executor.submit(self.compare_row, row_idx, left_file, right_file)
-                    future_to_row[future] = row_idx
-                
-                # Process completed tasks
-                for future in concurrent.futures.as_completed(future_to_row):
-                    if self.stop_event.is_set():
-                        break
-                    
-                    row_idx = future_to_row[future]
-                    try:
-                        result = future.result()
-                        if result:
-                            self.results[f"row_{row_idx}"] = result
-                            
-                            # Update display and scores
-                            self.root.after(0, lambda: self.refresh_file_display("left"))
-                            self.root.after(0, lambda: self.refresh_file_display("right"))
-                            
-                            # Update score display
-                            self.update_score_display(
-                                f"row_{row_idx}",
-                                result.get("video_score_left", 0),
-                                result.get("video_score_right", 0),
-                                result.get("audio_score_left", 0),
-                                result.get("audio_score_right", 0),
-                                self.current_metric.get()
-                            )
-                    
-                    except Exception as e:
-                        self.log_queue.put(("ERROR", f"Row {row_idx + 1} comparison failed: {str(e)}"))
-        
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Comparison process failed: {str(e)}"))
-        
-        finally:
-            # Reset UI state
-            self.running = False
-            if self.stop_event.is_set():
-                self.log_queue.put(("INFO", "Comparison stopped by user"))
-            else:
-                self.log_queue.put(("INFO", "All comparisons completed"))
-            
-            self.root.after(0, lambda: self.start_btn.configure(text="Start Comparison", state="normal"))
-            self.root.after(0, lambda: self.stop_btn.configure(state="disabled"))
-    
-    def compare_row(self, row_idx, left_file, right_file):
-        """Compare a single row (video and audio)"""
-        try:
-            if self.stop_event.is_set():
-                return None
-            
-            row_id = f"row_{row_idx}"
-            self.log_queue.put(("INFO", f"Starting row {row_idx + 1}: {os.path.basename(left_file)} vs {os.path.basename(right_file)}"))
-            
-            # Video comparison
-            self.update_progress(row_id, "video", 0)
-            video_result = self.run_video_comparison(left_file, right_file, self.current_metric.get(), row_idx)
-            if self.stop_event.is_set():
-                return None
-            self.update_progress(row_id, "video", 100)
-            
-            # Audio comparison
-            self.update_progress(row_id, "audio", 0)
-            audio_result = self.run_audio_comparison(left_file, right_file, row_idx)
-            if self.stop_event.is_set():
-                return None
-            self.update_progress(row_id, "audio", 100)
-            
-            self.log_queue.put(("INFO", f"Completed row {row_idx + 1}"))
-            
-            return {
-                "video_winner": video_result.get("winner", "tie"),
-                "audio_winner": audio_result.get("winner", "tie"),
-                "video_score_left": video_result.get("left_score", 0),
-                "video_score_right": video_result.get("right_score", 0),
-                "audio_score_left": audio_result.get("left_score", 0),
-                "audio_score_right": audio_result.get("right_score", 0)
-            }
-        
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1} comparison error: {str(e)}"))
-            return None
+    def restore_files(self, left_files, right_files):
+        """Replace both file lists and rebuild the rows, dropping results held for the old lists"""
+        self.left_files[:] = left_files
+        self.right_files[:] = right_files
+        self.results.clear()
+        self.row_progress.clear()
+        self.setup_progress_bars()
+        self.project_results()
     
-    def run_video_comparison(self, left_file, right_file, metric, row_idx):
-        """Run video quality comparison using FFmpeg with bidirectional analysis"""
-        try:
-            if self.stop_event.is_set():
-                return {"winner": "tie", "left_score": 0, "right_score": 0}
-            
-            # First comparison: left as reference, right as distorted
-            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Running {metric} with left as reference..."))
-            self.update_progress(f"row_{row_idx}", "video", 10)
-            left_as_ref_score = self.run_single_video_comparison(left_file, right_file, metric, "left_ref", row_idx)
-            
-            if self.stop_event.is_set():
-                return {"winner": "tie", "left_score": 0, "right_score": 0}
-            
-            # Update progress
-            self.update_progress(f"row_{row_idx}", "video", 55)
-            
-            # Second comparison: right as reference, left as distorted
-            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Running {metric} with right as reference..."))
-            right_as_ref_score = self.run_single_video_comparison(right_file, left_file, metric, "right_ref", row_idx)
-            
-            if self.stop_event.is_set():
-                return {"winner": "tie", "left_score": 0, "right_score": 0}
-            
-            self.update_progress(f"row_{row_idx}", "video", 100)
-            
-            # Determine winner based on both scores
-            return self.determine_video_winner(left_as_ref_score, right_as_ref_score, metric, row_idx)
-        
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Video comparison error: {str(e)}"))
-            return {"winner": "tie", "left_score": 0, "right_score": 0}
+    def apply_session_settings(self, settings):
+        """Restore saved options and thresholds, and show the thresholds in their entry boxes"""
+        super().apply_session_settings(settings)
+        for attribute, variable in self.threshold_vars.items():
+            variable.set(f"{getattr(self, attribute):g}")
     
-    def run_single_video_comparison(self, reference_file, distorted_file, metric, comparison_type, row_idx):
-        """Run a single video comparison with specified reference"""
-        try:
-            if self.stop_event.is_set():
-                return None
-            
-            if metric == "VMAF":
-                cmd = [
-                    "ffmpeg", "-i", reference_file, "-i", distorted_file,
-                    "-lavfi", "libvmaf=log_fmt=json",
-                    "-f", "null", "-"
-                ]
-            else:  # SSIM
-                cmd = [
-                    "ffmpeg", "-i", reference_file, "-i", distorted_file,
-                    "-lavfi", "ssim",
-                    "-f", "null", "-"
-                ]
-            
-            total_frames = max(1, self.get_total_frames(reference_file) or 0)
-
-            # Run process with progress monitoring
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                errors='replace'
-            )
-            
-            # Monitor process progress
-            stderr_output = ""
-            while True:
-                if self.stop_event.is_set():
-                    process.terminate()
-                    try:
-                        process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                    return None
-                
-                output = process.stderr.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    stderr_output += output
-                    # Try to extract progress information from FFmpeg output
-                    self.extract_ffmpeg_progress(output, row_idx, "video", comparison_type, total_frames)
-                
-                time.sleep(0.1)  # Small delay to prevent excessive CPU usage
-            
-            # Get remaining output
-            remaining_stderr = process.stderr.read()
-            stderr_output += remaining_stderr
-            
-            if process.returncode != 0:
-                error_msg = stderr_output.strip() if stderr_output else "Unknown FFmpeg error"
-                self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Video comparison failed ({comparison_type}): {error_msg}"))
-                return None
-            
-            return self.parse_single_video_output(stderr_output, metric, comparison_type, row_idx)
+    def recover_journal(self):
+        """Offer to restore a batch that a crash, reboot or Stop left unfinished"""
+        journal = self.journal.replay()
+        if journal is None or journal["header"] is None or journal["finished"]:
+            return
         
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Single video comparison error ({comparison_type}): {str(e)}"))
-            return None
-    
-    def extract_ffmpeg_progress(self, output_line, row_idx, media_type, comparison_type, total_frames):
-        """Extract progress information from FFmpeg output"""
-        try:
-            # Look for time progress in FFmpeg output
-            frame_match = re.search(r'frame=\s*(\d+)', output_line)
-            if frame_match:
-                curr_frame = int(frame_match.group(1))
-                
-                if curr_frame > 0:
-                    # Estimate progress - this is rough and could be improved
-                    # by getting actual duration first
-                    base_progress = 10 if comparison_type == "left_ref" else 55
-                    additional_progress = int(min(1, (curr_frame/total_frames))*45)
-                    
-                    if media_type == "video":
-                        self.update_progress(f"row_{row_idx}", "video", base_progress + additional_progress)
-                    
-        except:
-            pass  # Ignore parsing errors
-    
-    def run_audio_comparison(self, left_file, right_file, row_idx):
-        """Run audio quality comparison using FFmpeg with bidirectional PSNR analysis"""
-        try:
-            if self.stop_event.is_set():
-                return {"winner": "tie", "left_score": 0, "right_score": 0}
-            
-            # First comparison: left as reference, right as distorted
-            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Running audio PSNR with left as reference..."))
-            self.update_progress(f"row_{row_idx}", "audio", 25)
-            left_as_ref_score = self.run_single_audio_comparison(left_file, right_file, "left_ref", row_idx)
-            if self.stop_event.is_set():
-                return {"winner": "tie", "left_score": 0, "right_score": 0}
-            
-            self.update_progress(f"row_{row_idx}", "audio", 50)
-            
-            # Second comparison: right as reference, left as distorted  
-            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Running audio PSNR with right as reference..."))
-            right_as_ref_score = self.run_single_audio_comparison(right_file, left_file, "right_ref", row_idx)
-            if self.stop_event.is_set():
-                return {"winner": "tie", "left_score": 0, "right_score": 0}
-            
-            self.update_progress(f"row_{row_idx}", "audio", 75)
-            
-            # Determine winner based on both scores
-            return self.determine_audio_winner(left_as_ref_score, right_as_ref_score, row_idx)
+        header = journal["header"]
+        left_files, right_files = header.get("left_files", []), header.get("right_files", [])
+        metric = header.get("settings", {}).get("current_metric", self.current_metric.get())
+        pairs = [self.pair_key(left_file, right_file, metric) for left_file, right_file in zip(left_files, right_files)]
+        done = sum(1 for pair in pairs if journal["states"].get(pair) == "done")
+        started = datetime.fromtimestamp(header.get("time", 0)).strftime("%Y-%m-%d %H:%M")
+        if not messagebox.askyesno("Unfinished Batch",
+                                   f"A batch started {started} did not finish ({done} of {len(pairs)} rows done).\n\n"
+                                   f"Restore it? Press Resume afterwards to score the remaining rows."):
+            self.journal.discard()
+            return
         
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Audio comparison error: {str(e)}"))
-            return {"winner": "tie", "left_score": 0, "right_score": 0}
+        self.apply_session_settings(header.get("settings", {}))
+        self.restore_files(left_files, right_files)
+        self.results.update(journal["results"])
+        self.project_results()
+        self.log_message("INFO", f"Restored unfinished batch: {done} of {len(pairs)} rows done, "
+                                 f"press Resume to score the rest")
     
-    def run_single_audio_comparison(self, reference_file, distorted_file, comparison_type, row_idx):
-        """Run a single audio PSNR comparison with specified reference"""
-        try:
-            if self.stop_event.is_set():
-                return None
-            
-            cmd = [
-                "ffmpeg", "-i", reference_file, "-i", distorted_file,
-                "-lavfi", "[0:a][1:a]apsnr",
-                "-f", "null", "-"
-            ]
-            
-            # Run process with progress monitoring
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                errors='replace'
-            )
-            
-            # Monitor process progress
-            stderr_output = ""
-            while True:
-                if self.stop_event.is_set():
-                    process.terminate()
-                    try:
-                        process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                    return None
-                
-                output = process.stderr.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    stderr_output += output
-                
-                time.sleep(0.1)  # Small delay to prevent excessive CPU usage
-            
-            # Get remaining output
-            remaining_stderr = process.stderr.read()
-            stderr_output += remaining_stderr
-            
-            if process.returncode != 0:
-                error_msg = stderr_output.strip() if stderr_output else "Unknown FFmpeg error"
-                self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Audio PSNR failed ({comparison_type}): {error_msg}"))
-                return None
-            
-            return self.parse_single_audio_output(stderr_output, comparison_type, row_idx)
+    def save_session(self):
+        """Save the file lists, settings and all results to a session file"""
+        path = filedialog.asksaveasfilename(
+            title="Save Session",
+            defaultextension=".vbcsession",
+            filetypes=[("Comparison sessions", "*.vbcsession"), ("All files", "*.*")]
+        )
+        if not path:
+            return
         
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Single audio comparison error ({comparison_type}): {str(e)}"))
-            return None
-    
-    def determine_video_winner(self, left_as_ref_score, right_as_ref_score, metric, row_idx):
-        """Determine video quality winner based on bidirectional comparison"""
+        header = {
+            "version": SESSION_VERSION,
+            "left_files": self.left_files,
+            "right_files": self.right_files,
+            "settings": self.session_settings(),
+            "result_count": len(self.results)
+        }
         try:
-            if left_as_ref_score is None or right_as_ref_score is None:
-                return {"winner": "tie", "left_score": 0, "right_score": 0}
-            
-            if metric == "VMAF":
-                # For VMAF, higher score means better quality
-                # left_as_ref_score: how good right looks compared to left
-                # right_as_ref_score: how good left looks compared to right
-                
-                # If right scores high when left is reference, right is close to left quality
-                # If left scores high when right is reference, left is close to right quality
-                # The one with higher "when used as distorted" score is likely better
-                
-                left_quality = left_as_ref_score
-                right_quality = right_as_ref_score
-                
-                self.log_queue.put(("INFO", f"Row {row_idx + 1}: VMAF results - Left quality: {left_quality:.2f}, Right quality: {right_quality:.2f}"))
-                
-                if abs(left_quality - right_quality) < self.vmaf_win_threshold:  # Very close scores
-                    winner = "tie"
-                elif left_quality > right_quality:
-                    winner = "left"
-                else:
-                    winner = "right"
-                
-                return {
-                    "winner": winner,
-                    "left_score": left_quality,
-                    "right_score": right_quality
-                }
-            
-            else:  # SSIM
-                # For SSIM, higher score (closer to 1.0) means better similarity/quality
-                left_quality = left_as_ref_score
-                right_quality = right_as_ref_score
-                
-                self.log_queue.put(("INFO", f"Row {row_idx + 1}: SSIM results - Left quality: {left_quality:.4f}, Right quality: {right_quality:.4f}"))
-                
-                if abs(left_quality - right_quality) < self.ssim_win_threshold:  # Very close scores
-                    winner = "tie"
-                elif left_quality > right_quality:
-                    winner = "left"
-                else:
-                    winner = "right"
-                
-                return {
-                    "winner": winner,
-                    "left_score": left_quality,
-                    "right_score": right_quality
-                }
-        
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Error determining video winner: {str(e)}"))
-            return {"winner": "tie", "left_score": 0, "right_score": 0}
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(header) + "\n")
+                for key, result in list(self.results.items()):
+                    f.write(json.dumps({"pair": list(key), "result": result}) + "\n")
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            messagebox.showerror("Save Session", f"Could not save the session: {str(e)}")
+            return
+        self.log_message("INFO", f"Saved session with {len(header['left_files'])} rows and "
+                                 f"{header['result_count']} results to {path}")
     
-    def determine_audio_winner(self, left_as_ref_score, right_as_ref_score, row_idx):
-        """Determine audio quality winner based on bidirectional PSNR comparison"""
-        try:
-            if left_as_ref_score is None or right_as_ref_score is None:
-                # Fallback to individual audio analysis if PSNR fails
-                return self.run_audio_analysis_fallback(self.left_files[row_idx], self.right_files[row_idx], row_idx)
-            
-            # For PSNR, higher score means better quality
-            # left_as_ref_score: how good right sounds compared to left
-            # right_as_ref_score: how good left sounds compared to right
-            
-            left_quality = left_as_ref_score
-            right_quality = right_as_ref_score
-            
-            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Audio PSNR results - Left quality: {left_quality:.2f} dB, Right quality: {right_quality:.2f} dB"))
-            
-            if abs(left_quality - right_quality) < 1.0:  # Within 1 dB difference
-                winner = "tie"
-            elif left_quality > right_quality:
-                winner = "left"
-            else:
-                winner = "right"
-            
-            return {
-                "winner": winner,
-                "left_score": left_quality,
-                "right_score": right_quality
-            }
+    def load_session(self):
+        """Open a session file: file lists and settings at once, results streamed in behind them"""
+        if self.running or (self.session_loader is not None and self.session_loader.is_alive()):
+            return
         
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Error determining audio winner: {str(e)}"))
-            return {"winner": "tie", "left_score": 0, "right_score": 0}
-    
-    def run_audio_analysis_fallback(self, left_file, right_file, row_idx):
-        """Fallback audio analysis using EBU R128"""
-        try:
-            if self.stop_event.is_set():
-                return {"winner": "tie", "left_score": 0, "right_score": 0}
-            
-            left_loudness = self.get_audio_loudness(left_file, row_idx)
-            if self.stop_event.is_set():
-                return {"winner": "tie", "left_score": 0, "right_score": 0}
-            
-            right_loudness = self.get_audio_loudness(right_file, row_idx)
-            if self.stop_event.is_set():
-                return {"winner": "tie", "left_score": 0, "right_score": 0}
-            
-            if left_loudness is None or right_loudness is None:
-                return {"winner": "tie", "left_score": 0, "right_score": 0}
-            
-            # Higher (less negative) loudness is generally better for most content
-            winner = "left" if left_loudness > right_loudness else "right"
-            if abs(left_loudness - right_loudness) < 1.0:  # Within 1 LUFS
-                winner = "tie"
-            
-            self.log_queue.put(("INFO", f"Row {row_idx + 1}: Audio loudness - Left: {left_loudness:.1f} LUFS, Right: {right_loudness:.1f} LUFS"))
-            
-            return {
-                "winner": winner,
-                "left_score": left_loudness,
-                "right_score": right_loudness
-            }
+        path = filedialog.askopenfilename(
+            title="Load Session",
+            filetypes=[("Comparison sessions", "*.vbcsession"), ("All files", "*.*")]
+        )
+        if not path:
+            return
         
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Audio analysis fallback error: {str(e)}"))
-            return {"winner": "tie", "left_score": 0, "right_score": 0}
-    
-    def get_audio_loudness(self, file_path, row_idx):
-        """Get audio loudness using EBU R128"""
         try:
-            if self.stop_event.is_set():
-                return None
-            
-            cmd = [
-                "ffmpeg", "-i", file_path,
-                "-af", "ebur128=peak=true",
-                "-f", "null", "-"
-            ]
-            
-            # Run process with monitoring for stop event
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                errors='replace'
-            )
-            
-            stderr_output = ""
-            while True:
-                if self.stop_event.is_set():
-                    process.terminate()
-                    try:
-                        process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                    return None
-                
-                output = process.stderr.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    stderr_output += output
-                
-                time.sleep(0.1)
-            
-            # Get remaining output
-            remaining_stderr = process.stderr.read()
-            stderr_output += remaining_stderr
-            
-            # Parse integrated loudness from output
-            for line in stderr_output.split('\n'):
-                if 'Integrated loudness:' in line:
-                    match = re.search(r'Integrated loudness:\s*(-?\d+\.?\d*)\s*LUFS', line)
-                    if match:
-                        return float(match.group(1))
-            
-            return None
+            f = open(path, "r", encoding="utf-8")
+            header = json.loads(f.readline())
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Load Session", f"Could not read the session: {str(e)}")
+            return
+        if header.get("version") != SESSION_VERSION:
+            f.close()
+            messagebox.showerror("Load Session", f"Unsupported session version: {header.get('version')}")
+            return
         
-        except Exception:
-            return None
-    
-    def parse_single_video_output(self, output, metric, comparison_type, row_idx):
-        """Parse single video comparison output"""
-        try:
-            if metric == "VMAF":
-                return self.parse_single_vmaf_output(output, comparison_type, row_idx)
-            else:  # SSIM
-                return self.parse_single_ssim_output(output, comparison_type, row_idx)
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Failed to parse {metric} output ({comparison_type}): {str(e)}"))
-            return None
-    
-    def parse_single_vmaf_output(self, output, comparison_type, row_idx):
-        """Parse single VMAF output"""
-        try:
-            # Look for VMAF score in the output
-            vmaf_match = re.search(r'VMAF score:\s*([0-9.]+)', output)
-            if vmaf_match:
-                score = float(vmaf_match.group(1))
-                self.log_queue.put(("INFO", f"Row {row_idx + 1}: VMAF score ({comparison_type}): {score:.2f}"))
-                return score
-            
-            # Alternative parsing for different VMAF output formats
-            vmaf_matches = re.findall(r'VMAF.*?([0-9.]+)', output)
-            if vmaf_matches:
-                score = float(vmaf_matches[-1])  # Take the last (usually average) score
-                self.log_queue.put(("INFO", f"Row {row_idx + 1}: VMAF score ({comparison_type}): {score:.2f}"))
-                return score
-            
-            self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Could not parse VMAF score from output ({comparison_type})"))
-            return None
+        self.apply_session_settings(header.get("settings", {}))
+        self.restore_files(header.get("left_files", []), header.get("right_files", []))
+        self.log_message("INFO", f"Loaded session {os.path.basename(path)}: {len(self.left_files)} rows, "
+                                 f"reading {header.get('result_count', 0)} results...")
         
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Error parsing VMAF output ({comparison_type}): {str(e)}"))
-            return None
+        # Results are read in the background so large sessions open immediately
+        self.session_loader = threading.Thread(target=self.read_session_results, args=(f,), daemon=True)
+        self.session_loader.start()
     
-    def parse_single_ssim_output(self, output, comparison_type, row_idx):
-        """Parse single SSIM output"""
-        try:
-            # Look for SSIM mean/average values in the stats output
-            # SSIM stats typically show: n:1 Y:0.123456 U:0.234567 V:0.345678 All:0.456789 (12.345678)
-            ssim_match = re.search(r'All:([0-9.]+)', output)
-            if ssim_match:
-                score = float(ssim_match.group(1))
-                self.log_queue.put(("INFO", f"Row {row_idx + 1}: SSIM score ({comparison_type}): {score:.4f}"))
-                return score
-            
-            # Alternative parsing - look for SSIM values in different formats
-            # Sometimes appears as "SSIM Y:x.xxx U:x.xxx V:x.xxx All:x.xxx"
-            ssim_all_match = re.search(r'SSIM.*?All:([0-9.]+)', output)
-            if ssim_all_match:
-                score = float(ssim_all_match.group(1))
-                self.log_queue.put(("INFO", f"Row {row_idx + 1}: SSIM score ({comparison_type}): {score:.4f}"))
-                return score
-            
-            # Look for the last line that contains SSIM stats
-            lines = output.strip().split('\n')
-            for line in reversed(lines):
-                if 'All:' in line and ('Y:' in line or 'SSIM' in line):
-                    all_match = re.search(r'All:([0-9.]+)', line)
-                    if all_match:
-                        score = float(all_match.group(1))
-                        self.log_queue.put(("INFO", f"Row {row_idx + 1}: SSIM score ({comparison_type}): {score:.4f}"))
-                        return score
-            
-            # If no "All:" found, try to get Y channel value as fallback
-            y_match = re.search(r'Y:([0-9.]+)', output)
-            if y_match:
-                score = float(y_match.group(1))
-                self.log_queue.put(("INFO", f"Row {row_idx + 1}: SSIM Y-channel score ({comparison_type}): {score:.4f}"))
-                return score
-            
-            self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Could not parse SSIM score from output ({comparison_type})"))
-            self.log_queue.put(("DEBUG", f"Row {row_idx + 1}: SSIM output sample: {output[-200:]}"))  # Log last 200 chars for debugging
-            return None
-        
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Error parsing SSIM output ({comparison_type}): {str(e)}"))
-            return None
+    def read_session_results(self, f):
+        """Read a session's result lines and hand them to the GUI in batches"""
+        batch = {}
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    batch[tuple(record["pair"])] = record["result"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if len(batch) >= SESSION_BATCH_ROWS:
+                    self.root.after(0, self.merge_session_results, batch, False)
+                    batch = {}
+        self.root.after(0, self.merge_session_results, batch, True)
     
-    def parse_single_audio_output(self, output, comparison_type, row_idx):
-        try:
-            psnr_match = re.search(r'PSNR\s+ch0:\s*([0-9.]+)', output)
-            if psnr_match:
-                score = float(psnr_match.group(1))
-                self.log_queue.put(("INFO", f"Row {row_idx + 1}: Audio PSNR score ({comparison_type}): {score:.2f} dB"))
-                return score
-
-            psnr_matches = re.findall(r'([0-9.]+)\s*dB', output)
-            if psnr_matches:
-                score = float(psnr_matches[-1])
-                self.log_queue.put(("INFO", f"Row {row_idx + 1}: Audio PSNR score ({comparison_type}): {score:.2f} dB"))
-                return score
-
-            self.log_queue.put(("WARNING", f"Row {row_idx + 1}: Could not parse audio PSNR score from output ({comparison_type})"))
-            return None
-
-        except Exception as e:
-            self.log_queue.put(("ERROR", f"Row {row_idx + 1}: Error parsing audio PSNR output ({comparison_type}): {str(e)}"))
-            return None
+    def merge_session_results(self, batch, last):
+        """Add a batch of loaded results and redisplay only the rows holding those pairs (runs on the GUI thread)"""
+        self.results.update(batch)
+        positions = {}
+        for row_idx, (left_file, right_file) in enumerate(zip(self.left_files, self.right_files)):
+            positions.setdefault(self.pair_key(left_file, right_file, None)[:2], []).append(row_idx)
+        self.project_results(sorted({row_idx for key in batch for row_idx in positions.get(key[:2], [])}))
+        if last:
+            self.log_message("INFO", f"Session loaded with {len(self.results)} results")
     
     def process_log_queue(self):
         """Process log messages from queue"""
@@ -1261,10 +1014,14 @@ class VideoComparator:
         if self.running:
             if messagebox.askokcancel("Exit", "Processing is still running. Do you want to stop and exit?"):
                 self.stop_comparison()
+                if self.metric_pool is not None:
+                    self.metric_pool.shutdown(wait=False, cancel_futures=True)
                 # Wait a moment for processes to stop
                 self.root.after(1000, self.root.destroy)
             return
         
+        if self.metric_pool is not None:
+            self.metric_pool.shutdown(wait=False, cancel_futures=True)
         self.root.destroy()
     
     def run(self):